@@ -0,0 +1,668 @@
+#Behaviour Checks: quick pass/fail checks that need neither Discord nor Spotify
+#Run from the repository root:  python -m benchmarks.checks [group ...]
+import aiohttp, argparse, asyncio, gc, inspect, io, json, os, socket, sys, tempfile, time
+from contextlib import asynccontextmanager, contextmanager, redirect_stdout
+
+from benchmarks.fakes import FakeBrowserPage, FakeBrowserContext
+from benchmarks.looplag import BlockingMonitor
+from benchmarks.mockserver import MockSpotify, MockServerThread, load_fixture
+from wrapper import datascraper as scraper
+from wrapper import apiwrapper as spotifyapi
+from wrapper import authorizer, batcher, filestore, metrics, ratelimiter, tracing
+from botmodules import commands, dispatcher, pages, savedstore, scrapejobs
+
+#Terminal colour codes, same as bot.py
+RED, GREEN, RESET = "\033[91m", "\033[92m", "\033[0m"
+
+#Longest a single event loop step may take (ms) while scrapes run. A blocking request or
+#sleep on the loop takes at least the mock's latency (50 ms), so it cannot stay under this
+BLOCKING_LIMIT_MS = 10
+SCRAPE_LATENCY = 0.05
+#Measured rounds before a step over the limit counts: a blocking call repeats every round,
+#a one-off stall of the single shared CPU does not
+BLOCKING_ATTEMPTS = 3
+
+#Group name -> check functions, filled by @check
+CHECKS = {}
+
+def check(group):
+    """
+    Registers a check (sync or async function) under a group. A check fails by raising.
+    """
+    def decorator(func):
+        CHECKS.setdefault(group, []).append(func)
+        return func
+    return decorator
+
+def expect(condition, message):
+    if not condition:
+        raise AssertionError(message)
+
+@contextmanager
+def patched(target, **attrs):
+    """
+    Sets attributes (e.g. a module's singletons) for the duration of a check and restores them.
+    """
+    saved = {name: getattr(target, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(target, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(target, name, value)
+
+async def longest_blocking_step(operation, runs, concurrency=10):
+    """
+    Runs `operation(index)` `runs` times, `concurrency` at once, after one unmeasured round
+    of `concurrency` runs so opening the first connections (mostly work of the mock server,
+    which shares the CPU) is not counted. Objects that existed before are frozen meanwhile,
+    so a full garbage collection of everything imported is not blamed on the operation, and
+    the GIL switch interval is shortened so the mock server's thread cannot hold up a step
+    for long. A measured round whose longest step is over BLOCKING_LIMIT_MS is repeated, up
+    to BLOCKING_ATTEMPTS rounds, and the shortest longest step is kept.
+
+    Returns:
+        tuple: (longest event loop step in milliseconds, what ran in it, operations run)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(index):
+        async with semaphore:
+            await operation(index)
+
+    await asyncio.gather(*(operation(index) for index in range(concurrency)))
+    started = concurrency
+    best = None
+    switch_interval = sys.getswitchinterval()
+    gc.collect()
+    gc.freeze()
+    sys.setswitchinterval(0.0005)
+    try:
+        for _ in range(BLOCKING_ATTEMPTS):
+            with BlockingMonitor() as monitor:
+                await asyncio.gather(*(limited(started + index) for index in range(runs)))
+            started += runs
+            if best is None or monitor.longest_ms < best[0]:
+                best = (monitor.longest_ms, monitor.culprit)
+            if best[0] < BLOCKING_LIMIT_MS:
+                break
+    finally:
+        sys.setswitchinterval(switch_interval)
+        gc.unfreeze()
+    return best + (started,)
+
+#================Fast Path Parsers================
+#Saved open.spotify.com pages -> ID of the page's entity, parser and the figure it must read
+#(None: nothing to read, the browser is used)
+ARTIST_ID, TRACK_ID = "0TnOYISbd1XYRBk9myaseg", "11dFghVXANMlKmJXsNCbNl"
+FIXTURE_CASES = [
+    ("artist_page.html", ARTIST_ID, "base64 initialState", scraper.extract_monthly_listeners, "48213377"),
+    ("artist_page_meta.html", ARTIST_ID, "og:description only, rounded figure", scraper.extract_monthly_listeners, "12.3M"),
+    ("artist_page_meta_exact.html", ARTIST_ID, "og:description only, exact figure and HTML entity", scraper.extract_monthly_listeners, "1234567"),
+    ("artist_page_bad_base64.html", ARTIST_ID, "malformed base64 states, falls back to og:description", scraper.extract_monthly_listeners, "48.2M"),
+    ("artist_page_no_state.html", ARTIST_ID, "no initialState and no figure in og:description", scraper.extract_monthly_listeners, None),
+    ("artist_page.html", "1dfeR4HaWDbWqFHLkxsg1d", "state of another artist, falls back to og:description", scraper.extract_monthly_listeners, "48.2M"),
+    ("track_page.html", TRACK_ID, "JSON initialState", scraper.extract_playcount, "1,873,254,460"),
+    ("track_page_base64.html", "2takcwOaAZWiXQijPHIx7B", "base64 initialState, numeric playcount", scraper.extract_playcount, "987,654"),
+    ("track_page_no_playcount.html", "2takcwOaAZWiXQijPHIx7B", "initialState without a playcount", scraper.extract_playcount, None),
+    ("track_page_related.html", "3n3Ppam7vgaVa1iaRUc9Lp", "other tracks' playcounts come first in the state", scraper.extract_playcount, "42,000,000"),
+    ("track_page.html", "7qiZfU4dY1lWllzX7mPBI3", "state of another track", scraper.extract_playcount, None),
+    ("track_page.html", TRACK_ID, "track page has no monthly listeners", scraper.extract_monthly_listeners, None),
+    ("artist_page_bad_base64.html", TRACK_ID, "malformed base64 states have no playcount", scraper.extract_playcount, None),
+]
+
+def fixture_check(fixture, entity_id, label, extract, expected):
+    def check_fixture():
+        value = extract(load_fixture(fixture), entity_id)
+        expect(value == expected, f"{label}: expected {expected!r}, got {value!r}")
+    check_fixture.__name__ = f"{extract.__name__}({fixture}, {entity_id})"
+    return check_fixture
+
+for case in FIXTURE_CASES:
+    check("fixtures")(fixture_check(*case))
+
+#================Scraper Event Loop Lag================
+#Bodies of the web player's pathfinder responses, read by the browser path
+PATHFINDER_STATES = {
+    "artist": '{"data":{"artistUnion":{"uri":"spotify:artist:$id","stats":{"followers":1520331,"monthlyListeners":48213377}}}}',
+    "track": '{"data":{"trackUnion":{"uri":"spotify:track:$id","name":"Benchmark","playcount":"1873254460"}}}'
+}
+
+class StubbedScraperService(scraper.ScraperService):
+    """
+    ScraperService whose pool hands out FakeBrowserPages instead of launching Chromium,
+    so browser_scrape runs its real lease, listener and cleanup code without Playwright.
+    """
+    def __init__(self, latency, states=PATHFINDER_STATES, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.states = states
+
+    async def _new_page(self):
+        page = FakeBrowserPage(latency=self.latency, states=self.states)
+        return scraper._PooledPage(FakeBrowserContext(page), page, self._generation)
+
+def scrape_both(prefix):
+    async def operation(index):
+        entity_id = f"{prefix}{index:0{22 - len(prefix)}d}"
+        listeners, msg = await scraper.scrape_monthly_listeners(entity_id)
+        expect((listeners, msg) == ("48213377", None), f"monthly listeners read as {listeners!r} ({msg})")
+        playcount, msg = await scraper.scrape_track_playcount(entity_id)
+        expect((playcount, msg) == ("1,873,254,460", None), f"playcount read as {playcount!r} ({msg})")
+    return operation
+
+@check("blocking")
+async def fast_path_does_not_block():
+    server = MockServerThread(MockSpotify(latency=SCRAPE_LATENCY))
+    mock = await asyncio.to_thread(server.start)
+    service = scraper.ScraperService(fast_path=True)
+    try:
+        with patched(scraper, SCRAPER=service, SCRAPE_CACHE=None, SPOTIFY_WEB_ENDPOINT=mock.url):
+            longest, culprit, runs = await longest_blocking_step(scrape_both("fst"), runs=40)
+    finally:
+        await service.close()
+        await asyncio.to_thread(server.stop)
+    expect(service.fast_path_hits == 2 * runs, f"only {service.fast_path_hits} of {2 * runs} scrapes used the fast path")
+    expect(longest < BLOCKING_LIMIT_MS, f"fast path scrapes blocked the event loop for {longest} ms in {culprit}")
+
+@check("blocking")
+async def browser_scrape_does_not_block():
+    service = StubbedScraperService(SCRAPE_LATENCY, pool_size=4, fast_path=False)
+    try:
+        with patched(scraper, SCRAPER=service, SCRAPE_CACHE=None):
+            longest, culprit, runs = await longest_blocking_step(scrape_both("brw"), runs=40)
+    finally:
+        await service.close()
+    expect(service.navigations == 2 * runs, f"{service.navigations} of {2 * runs} scrapes went through browser_scrape")
+    expect(longest < BLOCKING_LIMIT_MS, f"browser scrapes blocked the event loop for {longest} ms in {culprit}")
+
+@check("blocking")
+async def monitor_catches_blocking_call():
+    # Guards the two checks above: a blocking call like the old requests.get preflight must trip the limit
+    async def blocking(index):
+        await asyncio.sleep(0.005)
+        time.sleep(SCRAPE_LATENCY)
+    longest, _, _ = await longest_blocking_step(blocking, runs=2, concurrency=1)
+    expect(longest >= BLOCKING_LIMIT_MS, f"a {int(SCRAPE_LATENCY * 1000)} ms blocking call was only measured as {longest} ms")
+
+#================Browser Path================
+#Pathfinder responses of pages that also load related entities, whose figures come first
+RELATED_TOP_TRACKS = ('{"track":{"uri":"spotify:track:7qiZfU4dY1lWllzX7mPBI3","playcount":"2891364512"}},'
+                      '{"track":{"uri":"spotify:track:0VjIjW4GlUZAMYd2vXMi3b","playcount":"3405629771"}}')
+RELATED_STATES = {
+    "artist": [
+        '{"data":{"artistUnion":{"uri":"spotify:artist:1dfeR4HaWDbWqFHLkxsg1d","stats":{"monthlyListeners":91250000}}}}',
+        '{"data":{"artistUnion":{"uri":"spotify:artist:$id","relatedContent":{"relatedArtists":{"items":['
+        '{"uri":"spotify:artist:6eUKZXaKkcviH0Ku9w2n3V","stats":{"monthlyListeners":77310000}}]}},'
+        '"stats":{"followers":1520331,"monthlyListeners":48213377}}}}'
+    ],
+    "track": [
+        '{"data":{"artistUnion":{"uri":"spotify:artist:0TnOYISbd1XYRBk9myaseg","discography":{"topTracks":{"items":['
+        + RELATED_TOP_TRACKS + ']}}}}}',
+        '{"data":{"trackUnion":{"uri":"spotify:track:$id","firstArtist":{"items":[{"uri":"spotify:artist:0TnOYISbd1XYRBk9myaseg",'
+        '"discography":{"topTracks":{"items":[' + RELATED_TOP_TRACKS + ']}}}]},"playcount":"42000000"}}}'
+    ]
+}
+
+@check("browser")
+async def browser_scrape_reads_the_requested_entity():
+    # Every body carries several figures: only the requested artist's or track's own may be read
+    service = StubbedScraperService(0.005, states=RELATED_STATES, pool_size=2, fast_path=False)
+    try:
+        with patched(scraper, SCRAPER=service, SCRAPE_CACHE=None):
+            listeners = await scraper.scrape_monthly_listeners("3TVXtAsR1Inumwj472S9r4")
+            playcount = await scraper.scrape_track_playcount("3n3Ppam7vgaVa1iaRUc9Lp")
+    finally:
+        await service.close()
+    expect(listeners == ("48213377", None), f"monthly listeners read as {listeners}")
+    expect(playcount == ("42,000,000", None), f"playcount read as {playcount}")
+
+#================Request Batching================
+@check("batching")
+async def cancelled_batch_releases_its_callers():
+    async def fetch_many(ids, token, priority):
+        await asyncio.sleep(60)
+
+    loader = batcher.BatchLoader(fetch_many, max_batch_size=50, window=0.001)
+    callers = [asyncio.create_task(loader.load(f"batch{index:017d}", "token")) for index in range(3)]
+    await asyncio.sleep(0.01)
+    for task in list(loader._tasks):
+        task.cancel()
+    done, pending = await asyncio.wait(callers, timeout=1)
+    for task in pending:
+        task.cancel()
+    expect(not pending, f"{len(pending)} of 3 callers still wait for the cancelled batch")
+    expect(all(task.cancelled() for task in done), "callers of the cancelled batch were not cancelled")
+
+#================File Store================
+@check("filestore")
+async def concurrent_saves_coalesce():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "settings.json")
+        store = filestore.JSONFileStore()
+        await asyncio.gather(*(store.save(path, {"toggle": index}) for index in range(50)))
+        expect(store.writes <= 2, f"50 concurrent saves took {store.writes} writes")
+        expect(filestore.read_json(path) == {"toggle": 49}, f"file holds {filestore.read_json(path)}, not the last save")
+        expect(os.listdir(directory) == ["settings.json"], f"temp files left behind: {os.listdir(directory)}")
+
+@check("filestore")
+async def loads_are_cached_copies():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "settings.json")
+        filestore.write_json_atomic(path, {"ml_scrape": True, "nested": {"a": 1}})
+        store = filestore.JSONFileStore()
+        first = await store.load(path)
+        first["nested"]["a"] = 2
+        second = await store.load(path)
+        expect(second == {"ml_scrape": True, "nested": {"a": 1}}, f"changing a loaded copy changed the cache: {second}")
+        expect(store.reads == 1, f"two loads read the file {store.reads} times")
+
+@check("filestore")
+async def failed_write_reaches_merged_saves():
+    # The second and third save share one write: both must see it fail, not only the one that ran it
+    def failing_write(path, data, indent=None):
+        time.sleep(0.01)
+        raise OSError(28, "No space left on device")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "settings.json")
+        filestore.write_json_atomic(path, {"toggle": "on disk"})
+        store = filestore.JSONFileStore()
+        with patched(filestore, write_json_atomic=failing_write):
+            results = await asyncio.gather(*(store.save(path, {"toggle": index}) for index in range(3)),
+                                           return_exceptions=True)
+        expect(all(isinstance(result, OSError) for result in results), f"saves returned {results}")
+        loaded = await store.load(path)
+        expect(loaded == {"toggle": "on disk"}, f"load after failed saves returned {loaded}")
+
+@check("filestore")
+async def slow_disk_does_not_block():
+    def slow_write(path, data, indent=None):
+        time.sleep(SCRAPE_LATENCY)
+        write_json_atomic(path, data, indent)
+
+    write_json_atomic = filestore.write_json_atomic
+    with tempfile.TemporaryDirectory() as directory:
+        store = filestore.JSONFileStore()
+        with patched(filestore, write_json_atomic=slow_write):
+            longest, culprit, _ = await longest_blocking_step(
+                lambda index: store.save(os.path.join(directory, f"{index % 4}.json"), {"index": index}), runs=20)
+    expect(longest < BLOCKING_LIMIT_MS, f"saving with a slow disk blocked the event loop for {longest} ms in {culprit}")
+
+#================Saved Items================
+@check("savedstore")
+async def unreadable_json_is_migrated_on_the_next_open():
+    def write(directory, name, text):
+        with open(os.path.join(directory, name), "w") as file:
+            file.write(text)
+
+    async def open_store(directory):
+        store = savedstore.SQLiteSavedStore(os.path.join(directory, "saved.db"), json_dir=directory)
+        log = io.StringIO()
+        with redirect_stdout(log):
+            artists, _ = await store.page_user("1", "artists")
+            tracks, _ = await store.page_user("1", "tracks")
+        await store.close()
+        return artists, tracks, log.getvalue()
+
+    artists_json = json.dumps({"1": [{"artist": "A", "artist_url": "a" * 22}, {"artist": "B", "artist_url": "b" * 22}]})
+    with tempfile.TemporaryDirectory() as directory:
+        write(directory, "savedartists.json", artists_json)
+        write(directory, "savedtracks.json", '{"1": [{"track": "T", "track_url": ')
+        artists, tracks, log = await open_store(directory)
+        expect(len(artists) == 2 and not tracks, f"first open imported {len(artists)} artists and {len(tracks)} tracks")
+        expect("savedtracks.json" in log and "retried" in log, f"the skipped file was not logged: {log!r}")
+
+        write(directory, "savedtracks.json", json.dumps({"1": [{"track": "T", "track_url": "t" * 22}]}))
+        artists, tracks, log = await open_store(directory)
+        expect(len(artists) == 2 and len(tracks) == 1, f"second open holds {len(artists)} artists and {len(tracks)} tracks")
+        expect("Migrated 1 saved items" in log, f"second open logged {log!r}")
+
+        write(directory, "savedtracks.json", json.dumps({"1": [{"track": "U", "track_url": "u" * 22}]}))
+        _, tracks, _ = await open_store(directory)
+        expect(len(tracks) == 1, "the migration ran again after a clean import")
+
+#================Command Dispatch================
+CONTEXT = {"call_type": "message", "author": "author", "bot": "bot", "token": "token"}
+
+def bound(handler, params):
+    return dispatcher.Command(handler.__name__, handler).bind(CONTEXT, params)
+
+@check("dispatch")
+def binds_typed_words_and_context():
+    args = bound(commands.get, ["artist", "0TnOYISbd1XYRBk9myaseg", "extra"])
+    expect(args == {"call_type": "message", "author": "author", "bot": "bot", "searchtarget": "artist",
+                    "u_input": "0TnOYISbd1XYRBk9myaseg", "token": "token"}, f"get bound to {args}")
+
+@check("dispatch")
+def search_input_takes_the_rest():
+    # Every remaining word is the query, and the token after it is still supplied
+    args = bound(commands.search, ["artists", "daft", "punk"])
+    expect(args["searchinput"] == "daft punk" and args["token"] == "token", f"search bound to {args}")
+
+@check("dispatch")
+def optional_parameters_use_defaults():
+    expect(bound(commands.bulkscrape, [])["scope"] == "me", "bulkscrape without a scope did not default to me")
+    expect(bound(commands.bulkscrape, ["server"])["scope"] == "server", "bulkscrape server was not bound")
+
+@check("dispatch")
+def missing_parameter_is_reported():
+    try:
+        bound(commands.save, ["artists"])
+    except ValueError as err:
+        expect("missing a required parameter" in str(err), f"unexpected message: {err}")
+    else:
+        raise AssertionError("save without an ID was bound")
+
+@check("dispatch")
+async def registry_resolves_aliases():
+    calls = []
+    async def bulkscrape(call_type, author, scope="me", *args):
+        calls.append(scope)
+
+    registry = dispatcher.CommandRegistry()
+    registry.register("bulkscrape", bulkscrape, aliases=("bulk",))
+    expect(await registry.dispatch("BULK", ["server"], CONTEXT), "the alias was not dispatched case insensitively")
+    expect(not await registry.dispatch("unknown", [], CONTEXT), "an unknown command was dispatched")
+    expect(calls == ["server"] and registry.names() == ["bulkscrape"], f"calls {calls}, names {registry.names()}")
+    try:
+        registry.register("bulk", bulkscrape)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("registering a taken alias did not fail")
+
+#================Paged Views================
+@check("pages")
+async def overlapping_presses_share_one_stream():
+    # Two Next presses at once used to read the item stream twice at the same time (RuntimeError)
+    pulled = []
+    async def item_pages():
+        for page in range(5):
+            await asyncio.sleep(0.01)
+            pulled.append(page)
+            yield [f"{page}-{index}" for index in range(10)]
+
+    provider = pages.StreamedPages(item_pages(), str, lambda lines, index, start: lines, size=10)
+    first, second, third = await asyncio.gather(provider.get(1), provider.get(1), provider.get(2))
+    expect(first == second == [f"1-{index}" for index in range(10)], f"page 1 rendered as {first} and {second}")
+    expect(third[0] == "2-0" and pulled == [0, 1, 2], f"page 2 starts at {third[0]}, pages pulled: {pulled}")
+    await provider.close()
+
+#================Access Token================
+@asynccontextmanager
+async def spotify_mock(token_provider=None, auth_path="/api/token"):
+    """
+    Starts a MockSpotify on this loop and points the shared API client at it.
+
+    Yields:
+        tuple: (MockSpotify, SpotifyClient)
+    """
+    mock = await MockSpotify(latency=0.01).start()
+    client = spotifyapi.SpotifyClient(base_url=mock.url, auth_url=f"{mock.url}{auth_path}", batch_window=0,
+                                      scheduler=ratelimiter.RequestScheduler(rate=1000, burst=1000),
+                                      token_provider=token_provider)
+    try:
+        with patched(spotifyapi, CLIENT=client):
+            yield mock, client
+    finally:
+        await client.close()
+        await mock.close()
+
+def token_manager(token, expires_in):
+    manager = authorizer.TokenManager("client-id", "client-secret", refresh_margin=300)
+    manager.token, manager.expires_at = token, time.time() + expires_in
+    return manager
+
+async def discard_token(token, expires_at):
+    # Checks must not overwrite the bot's stored token
+    pass
+
+@check("tokens")
+async def concurrent_401s_share_one_refresh():
+    manager = token_manager("revoked-token", 3600)
+    with patched(authorizer, store_token=discard_token), redirect_stdout(io.StringIO()):
+        async with spotify_mock(manager) as (mock, client):
+            mock.revoked.add("revoked-token")
+            results = await asyncio.gather(*(client.get(f"/v1/artists/{index:022d}", "revoked-token") for index in range(20)))
+    statuses = {status for _, status in results}
+    expect(statuses == {200}, f"requests answered with 401 were retried with statuses {statuses}")
+    expect(mock.tokens_issued == 1 and manager.refreshes == 1, f"20 concurrent 401s requested {mock.tokens_issued} tokens")
+    expect(manager.token == "benchmark-token-1", f"manager holds {manager.token!r} instead of the new token")
+
+@check("tokens")
+async def failed_refresh_is_not_retried():
+    manager = token_manager("revoked-token", 3600)
+    with patched(authorizer, store_token=discard_token), redirect_stdout(io.StringIO()):
+        async with spotify_mock(manager, auth_path="/api/unavailable") as (mock, client):
+            mock.revoked.add("revoked-token")
+            data, status = await client.get(f"/v1/artists/{0:022d}", "revoked-token")
+    expect((data, status) == (None, 401), f"request with a failed refresh returned {status}")
+    expect(manager.failures == 1 and manager.token == "revoked-token", f"{manager.failures} failed refreshes, token {manager.token!r}")
+
+@check("tokens")
+async def expired_token_is_renewed_once():
+    manager = token_manager("expired-token", -10)
+    with patched(authorizer, store_token=discard_token), redirect_stdout(io.StringIO()):
+        async with spotify_mock() as (mock, client):
+            tokens = await asyncio.gather(*(manager.get_token() for _ in range(10)))
+    expect(set(tokens) == {"benchmark-token-1"}, f"callers got {set(tokens)}")
+    expect(mock.tokens_issued == 1, f"10 callers of an expired token requested {mock.tokens_issued} tokens")
+
+@check("tokens")
+async def token_near_expiry_renews_in_background():
+    manager = token_manager("expiring-token", 120)
+    with patched(authorizer, store_token=discard_token), redirect_stdout(io.StringIO()):
+        async with spotify_mock() as (mock, client):
+            token = await manager.get_token()
+            await manager._refresh_task
+    expect(token == "expiring-token", f"a still valid token was not returned right away ({token!r})")
+    expect(manager.token == "benchmark-token-1", f"the token inside the refresh margin was not renewed ({manager.token!r})")
+
+#================Metrics================
+@check("metrics")
+def histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("check_seconds", "Check.", ("stage",), buckets=(0.01, 0.1))
+    for value in (0.003, 0.03, 100):
+        histogram.observe(value, stage="scrape")
+    lines = list(histogram.collect())
+    expected = [
+        'check_seconds_bucket{stage="scrape",le="0.01"} 1',
+        'check_seconds_bucket{stage="scrape",le="0.1"} 2',
+        'check_seconds_bucket{stage="scrape",le="+Inf"} 3',
+        'check_seconds_sum{stage="scrape"} 100.033',
+        'check_seconds_count{stage="scrape"} 3',
+    ]
+    expect(lines == expected, f"histogram rendered as {lines}")
+
+@check("metrics")
+def labels_are_stringified_and_escaped():
+    counter = metrics.Counter("check_total", "Check.", ("endpoint", "status"))
+    counter.inc(endpoint="/v1/artists", status=200)
+    counter.inc(endpoint="/v1/artists", status="200")
+    counter.inc(endpoint='say "hi"\n', status=404)
+    lines = list(counter.collect())
+    expect(counter.value(endpoint="/v1/artists", status=200) == 2, f"int and str status were counted apart: {lines}")
+    expect('check_total{endpoint="say \\"hi\\"\\n",status="404"} 1' in lines, f"label value not escaped: {lines}")
+
+@check("metrics")
+def endpoints_fold_ids():
+    cases = {
+        "/v1/artists/0TnOYISbd1XYRBk9myaseg/top-tracks?market=US": "/v1/artists/{id}/top-tracks",
+        "/v1/artists": "/v1/artists",
+        "/v1/playlists/37i9dQZF1DXcBWIGoYBM5M/tracks": "/v1/playlists/{id}/tracks",
+    }
+    for path, label in cases.items():
+        expect(metrics.endpoint_label(path) == label, f"{path} labelled {metrics.endpoint_label(path)}")
+
+@check("metrics")
+def failing_collector_is_skipped():
+    registry = metrics.MetricsRegistry()
+    registry.counter("check_commands_total", "Commands.", ("command",)).inc(command="get")
+    def broken():
+        raise RuntimeError("stats unavailable")
+    registry.add_collector(broken)
+    registry.add_collector(lambda: [("check_queue_depth", "gauge", "Queue depth.", [({"lane": "background"}, 3)])])
+    with redirect_stdout(io.StringIO()):
+        page = registry.render()
+    expected = [
+        "# HELP check_commands_total Commands.", "# TYPE check_commands_total counter", 'check_commands_total{command="get"} 1',
+        "# HELP check_queue_depth Queue depth.", "# TYPE check_queue_depth gauge", 'check_queue_depth{lane="background"} 3',
+    ]
+    expect(page.splitlines() == expected, f"registry rendered as {page.splitlines()}")
+
+@check("metrics")
+async def api_requests_are_recorded():
+    endpoint = "/v1/artists/{id}"
+    before = metrics.SPOTIFY_REQUESTS.value(endpoint=endpoint, status=200), metrics.SPOTIFY_DURATION.count(endpoint=endpoint)
+    async with spotify_mock() as (mock, client):
+        await asyncio.gather(*(client.get(f"/v1/artists/{index:022d}", "token") for index in range(3)))
+    after = metrics.SPOTIFY_REQUESTS.value(endpoint=endpoint, status=200), metrics.SPOTIFY_DURATION.count(endpoint=endpoint)
+    expect((after[0] - before[0], after[1] - before[1]) == (3, 3), f"3 requests changed counter/histogram from {before} to {after}")
+
+@check("metrics")
+async def endpoint_serves_the_registry():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    registry = metrics.MetricsRegistry()
+    registry.counter("check_up_total", "Up.").inc()
+    server = metrics.MetricsServer(registry, port=port)
+    with redirect_stdout(io.StringIO()):
+        await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                body, content_type = await response.text(), response.content_type
+    finally:
+        await server.close()
+    expect(content_type == "text/plain" and "check_up_total 1" in body, f"/metrics returned {content_type}: {body!r}")
+
+#================Tracing================
+def span_tree(span):
+    return [span.name, [span_tree(child) for child in span.children]]
+
+@check("tracing")
+async def spans_nest_and_slow_traces_are_reported():
+    @tracing.traced()
+    async def fetch_artist():
+        with tracing.span("spotify_get", endpoint="/v1/artists/{id}"):
+            await asyncio.sleep(0)
+
+    tracer = tracing.Tracer(sample_rate=1, slow_threshold=0)
+    output = io.StringIO()
+    with patched(tracing, TRACER=tracer), redirect_stdout(output):
+        with tracer.trace("get", source="slash") as root:
+            await fetch_artist()
+            with tracing.span("discord_send"):
+                pass
+    expected = ["get", [["fetch_artist", [["spotify_get", []]]], ["discord_send", []]]]
+    expect(span_tree(root) == expected, f"spans recorded as {span_tree(root)}")
+    report = json.loads(output.getvalue().split("Slow command trace: ", 1)[1])
+    expect(report["attrs"] == {"source": "slash"} and report["spans"][0]["spans"][0]["attrs"] == {"endpoint": "/v1/artists/{id}"},
+           f"slow trace reported as {report}")
+
+@check("tracing")
+def unsampled_commands_record_nothing():
+    tracer = tracing.Tracer(sample_rate=0)
+    with patched(tracing, TRACER=tracer):
+        with tracer.trace("get") as root, tracing.span("spotify_get") as child:
+            expect(root is None and child is None, "an unsampled command recorded spans")
+    expect(tracer.traced == 0, f"{tracer.traced} commands traced at sample rate 0")
+
+@check("tracing")
+def spans_are_capped_per_trace():
+    tracer = tracing.Tracer(sample_rate=1, slow_threshold=0, max_spans=5)
+    output = io.StringIO()
+    with patched(tracing, TRACER=tracer), redirect_stdout(output):
+        with tracer.trace("get playlists") as root:
+            for page in range(10):
+                with tracing.span("spotify_get", page=page):
+                    pass
+    expect(len(root.children) == 4 and root.dropped == 6, f"kept {len(root.children)} spans, dropped {root.dropped}")
+    expect('"dropped_spans": 6' in output.getvalue(), "the report does not mention the dropped spans")
+
+@check("tracing")
+async def errors_and_background_tasks():
+    tracer = tracing.Tracer(sample_rate=1, slow_threshold=3600)
+    release = asyncio.Event()
+
+    async def late_work():
+        await release.wait()
+        with tracing.span("after_reply") as late:
+            return late
+
+    with patched(tracing, TRACER=tracer):
+        with tracer.trace("get") as root:
+            try:
+                with tracing.span("format_embed"):
+                    raise KeyError("name")
+            except KeyError:
+                pass
+            with tracing.span("scrape"):
+                background = asyncio.create_task(late_work())
+        release.set()
+        late = await background
+    expect(root.children[0].attrs == {"error": "KeyError"}, f"failed span has attributes {root.children[0].attrs}")
+    expect(late is None and root.children[1].children == [], "a task outliving its command kept adding spans")
+
+@check("tracing")
+async def queued_scrapes_join_the_command_trace():
+    async def scrape(entity_id):
+        with tracing.span("browser_scrape"):
+            await asyncio.sleep(0)
+        return entity_id, None
+
+    tracer = tracing.Tracer(sample_rate=1, slow_threshold=3600)
+    queue = scrapejobs.ScrapeJobQueue(workers=1)
+    with patched(tracing, TRACER=tracer):
+        with tracer.trace("get") as root:
+            await queue.submit(scrape, "traced").wait()
+        # Submitted outside any trace, must not end up in the previous command's tree
+        await queue.submit(scrape, "untraced").wait()
+    expect(span_tree(root) == ["get", [["browser_scrape", []]]], f"queued scrapes recorded as {span_tree(root)}")
+    for worker in queue._workers:
+        worker.cancel()
+
+#================Runner================
+async def run_checks(groups=None):
+    """
+    Runs the checks of the given groups (all by default) and prints one line per check.
+
+    Returns:
+        list: Failure messages, empty if every check passed.
+    """
+    failures = []
+    for group in groups or CHECKS:
+        for func in CHECKS[group]:
+            name = f"{group}.{func.__name__}"
+            try:
+                result = func()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as err:
+                failures.append(f"{name}: {type(err).__name__}: {err}")
+                print(f"{RED}FAIL {name}: {type(err).__name__}: {err}{RESET}")
+            else:
+                print(f"{GREEN}ok   {name}{RESET}")
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Behaviour checks of the bot's building blocks.")
+    parser.add_argument("groups", nargs="*", help=f"Groups to run (default: all of {', '.join(CHECKS)})")
+    args = parser.parse_args(argv)
+    unknown = [group for group in args.groups if group not in CHECKS]
+    if unknown:
+        parser.error(f"Unknown group(s): {', '.join(unknown)}")
+
+    failures = asyncio.run(run_checks(args.groups))
+    total = sum(len(CHECKS[group]) for group in args.groups or CHECKS)
+    if failures:
+        print(f"{RED}{len(failures)} of {total} checks failed{RESET}")
+    else:
+        print(f"{GREEN}All {total} checks passed{RESET}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#Stand-ins for Discord Messages, Interactions and Browser Pages
+import asyncio, discord
+from types import SimpleNamespace
+
+def fake_author(user_id=100000000000000001, name="benchmark"):
+    return SimpleNamespace(id=user_id, display_name=name, name=name, bot=False,
+                           avatar=SimpleNamespace(url="https://cdn.discordapp.com/embed/avatars/0.png"))
+
+class SentMessage:
+    """
+    A message the bot sent. Records every edit so a benchmark can check what was shown.
+    """
+    def __init__(self, content=None, embed=None, view=None):
+        self.content = content
+        self.embed = embed
+        self.view = view
+        self.edits = 0
+
+    async def edit(self, **kwargs):
+        self.edits += 1
+        self.content = kwargs.get("content", self.content)
+        self.embed = kwargs.get("embed", self.embed)
+        self.view = kwargs.get("view", self.view)
+        return self
+
+def _sent(args, kwargs):
+    content = args[0] if args else kwargs.get("content")
+    return SentMessage(content, kwargs.get("embed"), kwargs.get("view"))
+
+class FakeMessage(discord.Message):
+    """
+    A prefix (s!) command message. Subclasses discord.Message so the command handlers take
+    their real message code paths, but never touches Discord.
+    """
+    def __init__(self, author=None, content=""):
+        self.author = author or fake_author()
+        self.content = content
+        self.guild = None
+        self.replies = []
+
+    async def reply(self, *args, **kwargs):
+        message = _sent(args, kwargs)
+        self.replies.append(message)
+        return message
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send_message(self, *args, **kwargs):
+        self.interaction.replies.append(_sent(args, kwargs))
+
+    async def defer(self, *args, **kwargs):
+        pass
+
+    async def edit_message(self, **kwargs):
+        if self.interaction.replies:
+            await self.interaction.replies[-1].edit(**kwargs)
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, *args, **kwargs):
+        message = _sent(args, kwargs)
+        self.interaction.replies.append(message)
+        return message
+
+class FakeInteraction(discord.Interaction):
+    """
+    A slash command interaction, following the same idea as FakeMessage.
+    """
+    def __init__(self, user=None):
+        self.user = user or fake_author()
+        self.replies = []
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    async def original_response(self):
+        return self.replies[-1]
+
+    async def edit_original_response(self, **kwargs):
+        return await self.replies[-1].edit(**kwargs)
+
+#================Browser================
+class FakeBrowserResponse:
+    """
+    A response seen by a browser page: the navigation itself, or one of the web player's API calls.
+    """
+    def __init__(self, url, status=200, body="", resource_type="document"):
+        self.url = url
+        self.status = status
+        self.ok = 200 <= status < 300
+        self.request = SimpleNamespace(url=url, resource_type=resource_type)
+        self._body = body
+
+    async def text(self):
+        return self._body
+
+class FakeBrowserPage:
+    """
+    Stands in for a Playwright page. goto() takes `latency` seconds like a real navigation,
+    then the page "loads" the figure from its pathfinder API calls, like the web player does.
+    Nothing renders, so wait_for_selector() only times out.
+
+    Args:
+        latency (float): Seconds the navigation and the API calls each take.
+        states (dict): Path segment ("artist", "track") -> body, or list of bodies sent in order,
+            of the API responses for those pages. "$id" in a body is replaced by the page's ID.
+    """
+    def __init__(self, latency=0.02, states=None):
+        self.latency = latency
+        self.states = states or {}
+        self.closed = False
+        self.navigations = 0
+        self._listeners = {}
+        self._tasks = set()
+
+    def on(self, event, handler):
+        self._listeners.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        if handler in self._listeners.get(event, []):
+            self._listeners[event].remove(handler)
+
+    def _emit(self, event, payload):
+        for handler in list(self._listeners.get(event, [])):
+            task = asyncio.create_task(handler(payload))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _load_state(self, url):
+        await asyncio.sleep(self.latency)
+        kind, entity_id = url.split("/")[-2:]
+        bodies = self.states.get(kind, "{}")
+        for body in [bodies] if isinstance(bodies, str) else bodies:
+            self._emit("response", FakeBrowserResponse("https://api-partner.spotify.com/pathfinder/v1/query",
+                                                       body=body.replace("$id", entity_id), resource_type="fetch"))
+
+    async def goto(self, url, wait_until=None, timeout=None):
+        self.navigations += 1
+        await asyncio.sleep(self.latency)
+        task = asyncio.create_task(self._load_state(url))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return FakeBrowserResponse(url)
+
+    async def wait_for_selector(self, selector, timeout=None):
+        await asyncio.sleep((timeout or 30000) / 1000)
+        return None
+
+    async def evaluate(self, expression):
+        return None
+
+    def is_closed(self):
+        return self.closed
+
+class FakeBrowserContext:
+    def __init__(self, page):
+        self.page = page
+
+    async def close(self):
+        self.page.closed = True
@@ -0,0 +1,102 @@
+#Event Loop Lag Measurement
+import asyncio, math, threading, time
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+class LoopLagProbe:
+    """
+    Measures how late a periodic timer fires while a scenario runs. Anything that blocks the
+    event loop (synchronous file, network or CPU work in a handler) shows up as lag.
+
+    Args:
+        interval (float): Seconds between timer ticks.
+    """
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.lags = []
+        self._expected = None
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(loop.time() - self._expected, 0.0))
+
+    def start(self):
+        self.lags = []
+        self._expected = None
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # The tick spanning a stall right before stop() may not have run yet, count it here
+        if self._expected is not None:
+            self.lags.append(max(asyncio.get_running_loop().time() - self._expected, 0.0))
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        lags = sorted(self.lags)
+        return {
+            "loop_lag_p99_ms": round(percentile(lags, 99) * 1000, 2),
+            "loop_lag_max_ms": round((lags[-1] if lags else 0.0) * 1000, 2)
+        }
+
+class BlockingMonitor:
+    """
+    Times every callback and task step the event loop of the current thread runs inside the
+    with block. The lag probe also counts ready work queued behind other callbacks, this finds
+    the single longest stretch in which the loop could not switch to anything else, i.e. a
+    blocking call. Loops of other threads (like MockServerThread's) are not timed.
+
+    Example:
+        with BlockingMonitor() as monitor:
+            await scrape()
+        print(monitor.longest_ms, monitor.culprit)
+    """
+    def __init__(self):
+        self.longest = 0.0
+        self.culprit = None
+        self._original = None
+
+    @property
+    def longest_ms(self):
+        return round(self.longest * 1000, 2)
+
+    def __enter__(self):
+        self._original = original = asyncio.events.Handle._run
+        monitor = self
+        thread = threading.get_ident()
+
+        def timed_run(handle):
+            if threading.get_ident() != thread:
+                return original(handle)
+            start = time.perf_counter()
+            try:
+                return original(handle)
+            finally:
+                elapsed = time.perf_counter() - start
+                if elapsed > monitor.longest:
+                    monitor.longest = elapsed
+                    monitor.culprit = describe_handle(handle)
+
+        asyncio.events.Handle._run = timed_run
+        return self
+
+    def __exit__(self, *exc_info):
+        asyncio.events.Handle._run = self._original
+        return False
+
+def describe_handle(handle):
+    # Task steps are scheduled as bound methods of the task, name its coroutine instead
+    owner = getattr(handle._callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        return f"task {owner.get_coro().__qualname__}"
+    return repr(handle)
@@ -0,0 +1,259 @@
+#Local Mock of the Spotify Web API and open.spotify.com Pages
+import asyncio, base64, binascii, copy, json, os, re, threading
+from aiohttp import web
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+#Albums the top tracks point at, so the album lookups of an artist page batch and cache like real ones
+TOP_TRACK_ALBUMS = ("2noRn2Aes5aoNVsU6iWThc", "4yP0hdKOZPNshxUOjY0cZj", "6DEjYFkNZh67HP7R9PSZvv")
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), "r") as file:
+        return file.read() if name.endswith(".html") else json.load(file)
+
+def with_id(fixture, entity_type, entity_id, name=None):
+    """
+    Copies a fixture and points its id, uri and links at another entity.
+    """
+    entity = copy.deepcopy(fixture)
+    entity["id"] = entity_id
+    entity["uri"] = f"spotify:{entity_type}:{entity_id}"
+    entity["external_urls"] = {"spotify": f"https://open.spotify.com/{entity_type}/{entity_id}"}
+    if name is not None:
+        entity["name"] = name
+    return entity
+
+#Entities the HTML fixtures' page state describes, and the state scripts holding them
+PAGE_FIXTURE_IDS = {"artist": "0TnOYISbd1XYRBk9myaseg", "track": "11dFghVXANMlKmJXsNCbNl"}
+STATE_SCRIPT_PATTERN = re.compile(r"(<script[^>]*>)(.*?)(</script>)", re.DOTALL)
+
+def page_with_id(page_html, fixture_id, entity_id):
+    """
+    Copies an HTML fixture and points its page state (JSON or base64 encoded JSON) at another entity.
+    """
+    def replace(match):
+        opening, body, closing = match.groups()
+        if body.strip().startswith("{"):
+            return opening + body.replace(fixture_id, entity_id) + closing
+        try:
+            state = base64.b64decode(body.strip(), validate=True).decode("utf-8")
+        except (binascii.Error, ValueError):
+            return match.group(0)
+        return opening + base64.b64encode(state.replace(fixture_id, entity_id).encode("utf-8")).decode("ascii") + closing
+    return STATE_SCRIPT_PATTERN.sub(replace, page_html)
+
+class MockSpotify:
+    """
+    aiohttp server answering the Web API endpoints used by apiwrapper.py (and the token
+    endpoint) from the JSON fixtures, plus the artist and track pages read by the scraper's
+    fast path from the HTML fixtures, with their page state pointed at the requested ID. Any ID
+    is accepted, IDs starting with "missing" get 404.
+    Any token is accepted too, except those added to `revoked`, which get 401. The token
+    endpoint hands out a new token on every request.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to listen on, 0 picks a free one.
+        latency (float): Seconds every response is delayed by, like the round trip to Spotify.
+        throttle_every (int): Answer every n-th API request with 429, 0 never does.
+        retry_after (float): Retry-After sent with injected 429 responses.
+        playlist_size (int): Number of tracks in every playlist.
+    """
+    def __init__(self, host="127.0.0.1", port=0, latency=0.02, throttle_every=0, retry_after=0.1, playlist_size=250):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.playlist_size = playlist_size
+        self.requests = 0
+        self.throttled = 0
+        self.paths = {}
+        self.revoked = set()
+        self.tokens_issued = 0
+        self._runner = None
+
+        self.artist = load_fixture("artist.json")
+        self.track = load_fixture("track.json")
+        self.album = load_fixture("album.json")
+        self.playlist = load_fixture("playlist.json")
+        self.artist_page = load_fixture("artist_page.html")
+        self.track_page = load_fixture("track_page.html")
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    #================Server================
+    @web.middleware
+    async def _middleware(self, request, handler):
+        self.requests += 1
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        self.paths[route] = self.paths.get(route, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.throttle_every and request.path.startswith("/v1/") and self.requests % self.throttle_every == 0:
+            self.throttled += 1
+            return web.json_response({"error": {"status": 429, "message": "API rate limit exceeded"}},
+                                     status=429, headers={"Retry-After": str(self.retry_after)})
+        if request.path.startswith("/v1/") and request.headers.get("Authorization", "").removeprefix("Bearer ") in self.revoked:
+            return web.json_response({"error": {"status": 401, "message": "The access token expired"}}, status=401)
+        entity_id = request.match_info.get("id", "")
+        if entity_id.startswith("missing"):
+            return web.json_response({"error": {"status": 404, "message": "Resource not found"}}, status=404)
+        return await handler(request)
+
+    async def start(self):
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post("/api/token", self.token)
+        app.router.add_get("/v1/artists", self.artists)
+        app.router.add_get("/v1/artists/{id}", self.artist_info)
+        app.router.add_get("/v1/artists/{id}/top-tracks", self.top_tracks)
+        app.router.add_get("/v1/albums", self.albums)
+        app.router.add_get("/v1/albums/{id}", self.album_info)
+        app.router.add_get("/v1/albums/{id}/tracks", self.album_tracks)
+        app.router.add_get("/v1/tracks", self.tracks)
+        app.router.add_get("/v1/tracks/{id}", self.track_info)
+        app.router.add_get("/v1/playlists/{id}", self.playlist_info)
+        app.router.add_get("/v1/playlists/{id}/tracks", self.playlist_tracks)
+        app.router.add_get("/v1/search", self.search)
+        app.router.add_get("/artist/{id}", self.artist_html)
+        app.router.add_get("/track/{id}", self.track_html)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Resolve the port picked by the OS when port=0
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    #================Entities================
+    def make_artist(self, artist_id):
+        return with_id(self.artist, "artist", artist_id, f"Artist {artist_id[-6:]}")
+
+    def make_track(self, track_id, album_id=None):
+        track = with_id(self.track, "track", track_id, f"Track {track_id[-6:]}")
+        if album_id is not None:
+            track["album"] = with_id(track["album"], "album", album_id, f"Album {album_id[-6:]}")
+        return track
+
+    def make_album(self, album_id):
+        return with_id(self.album, "album", album_id, f"Album {album_id[-6:]}")
+
+    def paging(self, path, items, offset, limit, total):
+        next_offset = offset + limit
+        return {
+            "href": f"{self.url}{path}?offset={offset}&limit={limit}",
+            "items": items,
+            "limit": limit,
+            "offset": offset,
+            "total": total,
+            "next": f"{self.url}{path}?offset={next_offset}&limit={limit}" if next_offset < total else None,
+            "previous": None
+        }
+
+    def playlist_items(self, playlist_id, offset, limit):
+        end = min(offset + limit, self.playlist_size)
+        return [{"added_at": "2024-01-01T00:00:00Z", "track": self.make_track(f"{playlist_id[:12]}{index:010d}")}
+                for index in range(offset, end)]
+
+    #================Handlers================
+    async def token(self, request):
+        self.tokens_issued += 1
+        return web.json_response({"access_token": f"benchmark-token-{self.tokens_issued}", "token_type": "Bearer", "expires_in": 3600})
+
+    async def artists(self, request):
+        return web.json_response({"artists": [self.make_artist(i) for i in request.query["ids"].split(",")]})
+
+    async def artist_info(self, request):
+        return web.json_response(self.make_artist(request.match_info["id"]))
+
+    async def top_tracks(self, request):
+        artist_id = request.match_info["id"]
+        tracks = [self.make_track(f"{artist_id[:12]}{index:010d}", TOP_TRACK_ALBUMS[index % len(TOP_TRACK_ALBUMS)])
+                  for index in range(10)]
+        return web.json_response({"tracks": tracks})
+
+    async def albums(self, request):
+        return web.json_response({"albums": [self.make_album(i) for i in request.query["ids"].split(",")]})
+
+    async def album_info(self, request):
+        return web.json_response(self.make_album(request.match_info["id"]))
+
+    async def album_tracks(self, request):
+        items = self.album["tracks"]["items"]
+        offset, limit = int(request.query.get("offset", 0)), int(request.query.get("limit", 20))
+        return web.json_response(self.paging(request.path, items[offset:offset + limit], offset, limit, len(items)))
+
+    async def tracks(self, request):
+        return web.json_response({"tracks": [self.make_track(i) for i in request.query["ids"].split(",")]})
+
+    async def track_info(self, request):
+        return web.json_response(self.make_track(request.match_info["id"]))
+
+    async def playlist_info(self, request):
+        playlist_id = request.match_info["id"]
+        playlist = with_id(self.playlist, "playlist", playlist_id)
+        path = f"/v1/playlists/{playlist_id}/tracks"
+        playlist["tracks"] = self.paging(path, self.playlist_items(playlist_id, 0, 100), 0, 100, self.playlist_size)
+        return web.json_response(playlist)
+
+    async def playlist_tracks(self, request):
+        playlist_id = request.match_info["id"]
+        offset, limit = int(request.query.get("offset", 0)), int(request.query.get("limit", 100))
+        items = self.playlist_items(playlist_id, offset, limit)
+        return web.json_response(self.paging(request.path, items, offset, limit, self.playlist_size))
+
+    async def search(self, request):
+        search_type = request.query.get("type", "artist")
+        query = request.query.get("q", "")
+        makers = {
+            "artist": self.make_artist,
+            "track": self.make_track,
+            "album": self.make_album,
+            "playlist": lambda entity_id: with_id(self.playlist, "playlist", entity_id)
+        }
+        items = [makers[search_type](f"search{index:016d}") for index in range(20)]
+        if items and search_type == "artist":
+            items[0]["name"] = query
+        return web.json_response({f"{search_type}s": self.paging("/v1/search", items, 0, 20, 20)})
+
+    async def artist_html(self, request):
+        page = page_with_id(self.artist_page, PAGE_FIXTURE_IDS["artist"], request.match_info["id"])
+        return web.Response(text=page, content_type="text/html")
+
+    async def track_html(self, request):
+        page = page_with_id(self.track_page, PAGE_FIXTURE_IDS["track"], request.match_info["id"])
+        return web.Response(text=page, content_type="text/html")
+
+class MockServerThread:
+    """
+    Runs a MockSpotify on its own event loop in a background thread, so the time the mock
+    spends building responses does not show up as event loop lag of the code being measured.
+    """
+    def __init__(self, mock):
+        self.mock = mock
+        self._loop = None
+        self._thread = None
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mock-spotify", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.mock.start(), self._loop).result()
+        return self.mock
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.mock.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
@@ -0,0 +1,271 @@
+#Offline Benchmarks: drives the command handlers against the local mock Spotify server
+#Run from the repository root:  python -m benchmarks.run [--scenarios fetch_artists,save] [--update-baseline]
+import argparse, asyncio, json, os, shutil, sys, tempfile, time
+
+from benchmarks.mockserver import MockSpotify, MockServerThread
+from benchmarks.fakes import FakeMessage, FakeInteraction, fake_author
+from benchmarks.looplag import BlockingMonitor, LoopLagProbe, percentile
+from benchmarks.checks import run_checks
+from botmodules import commands, savedstore
+from wrapper import apiwrapper as spotifyapi
+from wrapper import datascraper as scraper
+from wrapper import ratelimiter, tracing
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TOKEN = "benchmark-token"
+
+#Settings a baseline was recorded with, results are only compared when these match
+COMPARED_SETTINGS = ("iterations", "concurrency", "latency", "throttle_every", "playlist_size")
+
+#Absolute slack (ms) on top of the relative tolerance, so sub-millisecond jitter is not a regression
+LATENCY_SLACK_MS = 2.0
+
+#Terminal colour codes, same as bot.py
+RED, GREEN, LIGHT_BLUE, RESET = "\033[91m", "\033[92m", "\033[94m", "\033[0m"
+
+def spotify_id(prefix, index):
+    """
+    Builds a valid 22 character Spotify ID, unique per benchmark iteration.
+    """
+    return f"{prefix}{index:0{22 - len(prefix)}d}"
+
+#================Scenarios================
+async def release(replies):
+    # Stop the views the handlers attached, like their timeout would, so no streams stay open
+    for message in replies:
+        view = getattr(message, "view", None)
+        if view is not None:
+            if hasattr(view, "on_timeout"):
+                await view.on_timeout()
+            view.stop()
+
+def expect(condition, message):
+    if not condition:
+        raise AssertionError(message)
+
+async def bench_fetch_artists(index):
+    message = FakeMessage(fake_author())
+    await commands.fetch_artists(message, spotify_id("art", index), message.author, TOKEN, message.reply)
+    expect(message.replies and message.replies[0].embed is not None, "fetch_artists sent no embed")
+    expect(message.replies[0].view is not None and await message.replies[0].view.pages.has_page(1), "fetch_artists is missing the top track pages")
+    await release(message.replies)
+
+async def bench_fetch_artists_slash(index):
+    interaction = FakeInteraction(fake_author())
+    await commands.fetch_artists(interaction, spotify_id("sla", index), interaction.user, TOKEN,
+                                 commands.get_reply_method(interaction))
+    expect(interaction.replies and interaction.replies[0].embed is not None, "slash fetch_artists sent no embed")
+    await release(interaction.replies)
+
+async def bench_fetch_playlists(index):
+    message = FakeMessage(fake_author())
+    await commands.fetch_playlists(message, spotify_id("pls", index), message.author, TOKEN, message.reply)
+    expect(message.replies and message.replies[0].embed is not None, "fetch_playlists sent no embed")
+    await release(message.replies)
+
+async def bench_search_data(index):
+    message = FakeMessage(fake_author())
+    await commands.search_data(message, message.author, None, f"benchmark {index}", "artists", TOKEN, message.reply)
+    expect(message.replies and message.replies[0].embed is not None, "search_data sent no embed")
+    await release(message.replies)
+
+async def bench_save(index):
+    # A few users saving many artists, like a busy server
+    message = FakeMessage(fake_author(user_id=100000000000000000 + index % 8))
+    await commands.save(message, message.author, "artists", spotify_id("sav", index), TOKEN)
+    expect(message.replies and "Successfully saved" in str(message.replies[0].content), f"save replied {message.replies[0].content if message.replies else None!r}")
+
+async def bench_scrape_fast_path(index):
+    listeners, msg = await scraper.fetch_monthly_listeners(spotify_id("scr", index))
+    expect((listeners, msg) == ("48213377", None), f"monthly listeners read as {listeners!r} ({msg})")
+    playcount, msg = await scraper.fetch_track_playcount(spotify_id("plc", index))
+    expect((playcount, msg) == ("1,873,254,460", None), f"playcount read as {playcount!r} ({msg})")
+
+SCENARIOS = {
+    "fetch_artists": bench_fetch_artists,
+    "fetch_artists_slash": bench_fetch_artists_slash,
+    "fetch_playlists": bench_fetch_playlists,
+    "search_data": bench_search_data,
+    "save": bench_save,
+    "scrape_fast_path": bench_scrape_fast_path,
+}
+
+async def run_scenario(name, operation, mock, iterations, concurrency, warmup):
+    """
+    Runs one scenario `iterations` times with up to `concurrency` in flight.
+
+    Returns:
+        dict: Throughput, latency percentiles, loop lag, longest loop step, errors and mock server request counts.
+    """
+    for index in range(warmup):
+        await operation(1_000_000 + index)
+
+    requests_before, throttled_before = mock.requests, mock.throttled
+    latencies, errors = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+    probe = LoopLagProbe()
+
+    async def timed(index):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await operation(index)
+            except Exception as err:
+                errors.append(f"{type(err).__name__}: {err}")
+                return
+            latencies.append(time.perf_counter() - start)
+
+    probe.start()
+    start = time.perf_counter()
+    with BlockingMonitor() as monitor:
+        await asyncio.gather(*(timed(index) for index in range(iterations)))
+    elapsed = time.perf_counter() - start
+    lag = await probe.stop()
+
+    latencies.sort()
+    result = {
+        "iterations": iterations,
+        "errors": len(errors),
+        "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round((latencies[-1] if latencies else 0.0) * 1000, 2),
+        **lag,
+        "longest_step_ms": monitor.longest_ms,
+        "api_requests": mock.requests - requests_before,
+        "throttled": mock.throttled - throttled_before
+    }
+    if errors:
+        result["first_error"] = errors[0]
+    return result
+
+#================Baseline================
+def compare(results, baseline, tolerance):
+    """
+    Flags scenarios whose p95 latency rose or throughput fell by more than `tolerance`.
+
+    Returns:
+        list: Regression messages.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance) + LATENCY_SLACK_MS:
+            regressions.append(f"{name}: p95 {result['p95_ms']} ms vs baseline {base['p95_ms']} ms")
+        if result["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {result['throughput']}/s vs baseline {base['throughput']}/s")
+    return regressions
+
+def print_results(results):
+    header = (f"{'scenario':<22}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'lag max':>10}"
+              f"{'step max':>10}{'API req':>9}{'429s':>6}{'errors':>8}")
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        print(f"{name:<22}{result['throughput']:>10}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}"
+              f"{result['max_ms']:>10}{result['loop_lag_max_ms']:>10}{result['longest_step_ms']:>10}{result['api_requests']:>9}{result['throttled']:>6}{result['errors']:>8}")
+        if "first_error" in result:
+            print(f"{RED}  first error: {result['first_error']}{RESET}")
+
+#================Runner================
+async def run(args):
+    settings = {name: getattr(args, name) for name in COMPARED_SETTINGS}
+    server = MockServerThread(MockSpotify(latency=args.latency, throttle_every=args.throttle_every,
+                                          retry_after=args.retry_after, playlist_size=args.playlist_size))
+    mock = await asyncio.to_thread(server.start)
+    saved_dir = tempfile.mkdtemp(prefix="statistify-bench-")
+
+    # Same wiring as bot.py, pointed at the mock server and a throwaway saved data store
+    client = spotifyapi.set_client(spotifyapi.SpotifyClient(
+        base_url=mock.url,
+        auth_url=f"{mock.url}/api/token",
+        scheduler=ratelimiter.RequestScheduler(rate=args.rate, burst=args.burst),
+    ))
+    store = savedstore.set_saved_store(savedstore.SQLiteSavedStore(path=os.path.join(saved_dir, "saved.db")))
+    scraper_service = scraper.set_scraper(scraper.ScraperService(fast_path=True))
+    scraper.set_scrape_cache(None)
+    scraper.SPOTIFY_WEB_ENDPOINT = mock.url
+    tracing.set_tracer(tracing.Tracer(sample_rate=0))
+
+    results = {}
+    try:
+        for name in args.scenarios:
+            # Every scenario starts with a cold entity cache
+            client.cache.clear()
+            print(f"{LIGHT_BLUE}Running {name} ({args.iterations} iterations, {args.concurrency} concurrent)...{RESET}")
+            results[name] = await run_scenario(name, SCENARIOS[name], mock, args.iterations, args.concurrency, args.warmup)
+    finally:
+        await client.close()
+        await scraper_service.close()
+        await store.close()
+        await asyncio.to_thread(server.stop)
+        shutil.rmtree(saved_dir, ignore_errors=True)
+
+    return settings, results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks against a local mock Spotify server.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma separated scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--iterations", type=int, default=200, help="Measured runs per scenario")
+    parser.add_argument("--concurrency", type=int, default=10, help="Runs in flight at once")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured runs before each scenario")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds the mock server delays every response")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every n-th API request with 429 (0 = never)")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--playlist-size", type=int, default=250, help="Tracks per mock playlist")
+    parser.add_argument("--rate", type=float, default=1000, help="Request scheduler rate (requests per second)")
+    parser.add_argument("--burst", type=int, default=1000, help="Request scheduler burst")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression before failing")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenario(s): {', '.join(unknown)}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # The fast path parsers must read the saved pages, and scrapes must never block the event
+    # loop, whatever their latency compared to the baseline
+    check_failures = asyncio.run(run_checks(["fixtures", "blocking"]))
+
+    settings, results = asyncio.run(run(args))
+    print_results(results)
+    report = {"settings": settings, "scenarios": results}
+
+    if args.json_path:
+        with open(args.json_path, "w") as file:
+            json.dump(report, file, indent=4)
+
+    failed = bool(check_failures) or any(result["errors"] for result in results.values())
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=4)
+        print(f"{GREEN}Baseline written to {args.baseline}{RESET}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+        if baseline.get("settings") != settings:
+            print(f"{LIGHT_BLUE}Baseline was recorded with different settings {baseline.get('settings')}, not comparing.{RESET}")
+        else:
+            regressions = compare(results, baseline, args.tolerance)
+            for regression in regressions:
+                print(f"{RED}Regression: {regression}{RESET}")
+            if not regressions:
+                print(f"{GREEN}No regressions against the baseline (tolerance {int(args.tolerance * 100)}%).{RESET}")
+            failed = failed or bool(regressions)
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,22 @@
 #Load required libraries
-import discord, json, os, inspect, asyncio
+import discord, json, os, asyncio
 from botmodules import slash_commands
 from botmodules import commands as b_commands
+from botmodules import scrapejobs, savedstore
+from botmodules.dispatcher import CommandRegistry
 from wrapper import authorizer as auth
+from wrapper import apiwrapper as spotifyapi
+from wrapper import datascraper as scraper
+from wrapper import ratelimiter, metrics, tracing
+from wrapper.cache import EntityCache
+from wrapper.scrapecache import ScrapeCache
+from wrapper.filestore import get_filestore
 from datetime import datetime
 from dotenv import load_dotenv
 
 #TERMINAL COLOR CODE
 RED, GREEN, LIGHT_BLUE, RESET = "\033[91m", "\033[92m", "\033[94m", "\033[0m" 
 
-#Establish Global Variable access_token
-access_token = ""
-TOKEN_REFRESH_TASK = None
-
 #-------------------------------------------------------------------------------------------------
 
 #Load Token and Set Bot Parameters - Discord Application
@@ -20,7 +24,138 @@ load_dotenv()
 bot_token, spotify_cid, spotify_csecret = os.getenv("DISCORD_TOKEN"), os.getenv("CLIENT_ID"), os.getenv("CLIENT_SECRET") 
 bot = discord.Client(intents=discord.Intents.all())
 
-def load_settings():
+#Spotify API access token, kept in memory and renewed ahead of its expiry
+token_manager = auth.set_token_manager(auth.TokenManager(
+    spotify_cid, spotify_csecret,
+    refresh_margin=int(os.getenv("TOKEN_REFRESH_MARGIN", 300)),
+))
+
+#Shared Spotify HTTP client (one pooled session for the lifetime of the bot)
+spotify_client = spotifyapi.set_client(spotifyapi.SpotifyClient(
+    base_url=os.getenv("SPOTIFY_API_URL", spotifyapi.web_endpoint),
+    auth_url=os.getenv("SPOTIFY_AUTH_URL", spotifyapi.auth_endpoint),
+    limit_per_host=int(os.getenv("SPOTIFY_MAX_CONNECTIONS", 20)),
+    total_timeout=float(os.getenv("SPOTIFY_TIMEOUT", 15)),
+    scheduler=ratelimiter.RequestScheduler(
+        rate=float(os.getenv("SPOTIFY_RATE_LIMIT", 10)),
+        burst=int(os.getenv("SPOTIFY_RATE_BURST", 20)),
+    ),
+    cache=EntityCache(max_size=int(os.getenv("SPOTIFY_CACHE_SIZE", 2048))),
+    batch_window=float(os.getenv("SPOTIFY_BATCH_WINDOW", 0.01)),
+    token_provider=token_manager,
+))
+
+#Shared headless browser for the optional web scraper (launched on first scrape)
+scraper_service = scraper.set_scraper(scraper.ScraperService(
+    pool_size=int(os.getenv("SCRAPER_POOL_SIZE", 2)),
+    max_page_uses=int(os.getenv("SCRAPER_MAX_PAGE_USES", 50)),
+    fast_path=os.getenv("SCRAPER_FAST_PATH", "on").lower() not in ("0", "off", "false"),
+))
+
+#Scraped monthly listeners and playcounts are kept on disk so they survive restarts
+scrape_cache = scraper.set_scrape_cache(ScrapeCache(
+    path=os.getenv("SCRAPE_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "saved_data", "scrape_cache.json")),
+    ttl=int(os.getenv("SCRAPE_CACHE_TTL", 43200)),
+))
+
+#Saved artists, tracks, playlists and albums: SQLite (imported once from the JSON files) or the JSON files themselves
+saved_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "saved_data")
+if os.getenv("SAVED_BACKEND", "sqlite").lower() == "json":
+    saved_store = savedstore.set_saved_store(savedstore.JSONSavedStore(json_dir=saved_folder))
+else:
+    saved_store = savedstore.set_saved_store(savedstore.SQLiteSavedStore(
+        path=os.getenv("SAVED_DB_PATH", os.path.join(saved_folder, "saved.db")),
+        json_dir=saved_folder,
+    ))
+
+#Scrapes run in the background so commands reply before the scraped figures are in
+scrape_jobs = scrapejobs.set_scrape_jobs(scrapejobs.ScrapeJobQueue(
+    workers=scraper_service.pool_size,
+    max_pending=int(os.getenv("SCRAPE_QUEUE_SIZE", 100)),
+    timeout=float(os.getenv("SCRAPE_TIMEOUT", 30)),
+))
+
+#Prefix (s!) commands, resolved once here instead of looked up on every message
+COMMANDS = CommandRegistry()
+COMMANDS.register("help", b_commands.help)
+COMMANDS.register("ping", b_commands.ping)
+COMMANDS.register("list", b_commands.list)
+COMMANDS.register("get", b_commands.get)
+COMMANDS.register("save", b_commands.save)
+COMMANDS.register("search", b_commands.search)
+COMMANDS.register("settings", b_commands.settings)
+COMMANDS.register("bulkscrape", b_commands.bulkscrape, aliases=("bulk",))
+
+#Sampled per-command traces, commands slower than the threshold are logged with their phase breakdown
+tracer = tracing.set_tracer(tracing.Tracer(
+    sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", 0.05)),
+    slow_threshold=float(os.getenv("TRACE_SLOW_MS", 2000)) / 1000,
+))
+
+#Prometheus metrics on a local port, off unless METRICS_PORT is set
+metrics_port = int(os.getenv("METRICS_PORT", 0))
+metrics_server = metrics.MetricsServer(host=os.getenv("METRICS_HOST", "127.0.0.1"), port=metrics_port) if metrics_port else None
+
+def collect_runtime_stats():
+    """
+    Turns the stats() of the caches, rate limiter, scraper and token manager into metric samples.
+    Runs only when the metrics page is requested.
+    """
+    entity_cache = spotify_client.cache.stats()
+    scheduler = spotify_client.scheduler.stats()
+    browser = scraper_service.stats()
+    jobs = scrape_jobs.stats()
+    figures = scrape_cache.stats()
+    token = token_manager.stats()
+    return [
+        ("statistify_cache_lookups_total", "counter", "Cache lookups, by cache and result.", [
+            ({"cache": "entity", "result": "hit"}, entity_cache["hits"]),
+            ({"cache": "entity", "result": "miss"}, entity_cache["misses"]),
+            ({"cache": "scrape", "result": "hit"}, figures["hits"]),
+            ({"cache": "scrape", "result": "stale_hit"}, figures["stale_hits"]),
+            ({"cache": "scrape", "result": "miss"}, figures["misses"]),
+        ]),
+        ("statistify_cache_entries", "gauge", "Entries held, by cache.", [
+            ({"cache": "entity"}, entity_cache["size"]),
+            ({"cache": "scrape"}, figures["size"]),
+        ]),
+        ("statistify_cache_evictions_total", "counter", "Entity cache entries dropped to stay within its size.", [
+            ({}, entity_cache["evictions"]),
+        ]),
+        ("statistify_api_queue_depth", "gauge", "Spotify API requests waiting in the rate limiter, by lane.", [
+            ({"lane": lane}, depth) for lane, depth in scheduler["queue_depth"].items()
+        ]),
+        ("statistify_api_throttled_total", "counter", "Times the Spotify API answered 429 and requests were paused.", [
+            ({}, scheduler["throttled"]),
+        ]),
+        ("statistify_scraper_pages", "gauge", "Scraper browser pages, by state.", [
+            ({"state": "active"}, browser["active"]),
+            ({"state": "waiting"}, browser["waiting"]),
+        ]),
+        ("statistify_scraper_fast_path_hits_total", "counter", "Scrapes answered by the plain HTTP fast path.", [
+            ({}, browser["fast_path_hits"]),
+        ]),
+        ("statistify_scraper_failures_total", "counter", "Failed browser scrapes, by reason.", [
+            ({"reason": reason}, count) for reason, count in browser["failures"].items()
+        ]),
+        ("statistify_scrape_jobs_total", "counter", "Finished background scrape jobs, by outcome.", [
+            ({"outcome": outcome}, jobs[outcome]) for outcome in ("completed", "failed", "rejected", "cancelled")
+        ]),
+        ("statistify_scrape_jobs_pending", "gauge", "Background scrape jobs waiting for a worker.", [
+            ({}, jobs["pending"]),
+        ]),
+        ("statistify_token_expires_in_seconds", "gauge", "Seconds until the Spotify access token expires.", [
+            ({}, token["expires_in"]),
+        ]),
+        ("statistify_token_refreshes_total", "counter", "Spotify access token refreshes, by outcome.", [
+            ({"outcome": "ok"}, token["refreshes"]),
+            ({"outcome": "failed"}, token["failures"]),
+        ]),
+    ]
+
+metrics.REGISTRY.add_collector(collect_runtime_stats)
+
+async def load_settings():
     root_folder = os.path.dirname(os.path.abspath(__file__))
     file_path = os.path.join(root_folder, "settings.json")
     
@@ -30,10 +165,9 @@ def load_settings():
         "syncslash_onstart": False
     } 
     try:
-        with open(file_path, "r") as file:
-            settings_from_file = json.load(file)
-            print("Loaded Settings File! Passing it...")
-            return settings_from_file  # Return the loaded settings as a dictionary
+        settings_from_file = await get_filestore().load(file_path)
+        print("Loaded Settings File! Passing it...")
+        return settings_from_file  # Return the loaded settings as a dictionary
                 
     except FileNotFoundError:
         print(f"{RED}settings.json not found, using default settings values.{RESET}")
@@ -43,59 +177,33 @@ def load_settings():
         print(f"{RED}Error decoding settings.json. Check the file format. Using default settings values{RESET}")
         return default
 
-async def refresh_token():
-    """
-    Periodically refresh the Spotify API access token.
-    """
-    global access_token
-    while True:
-        try:
-            token, response_code, response_msg = await auth.request_token(spotify_cid, spotify_csecret)
-            if token != 0:
-                access_token = token
-                print(f"{GREEN}Spotify API token refreshed: {access_token}{RESET}")
-            else:
-                print(f"{RED}Failed to refresh Spotify API token. Code: {response_code}, Message: {response_msg}{RESET}")
-        except Exception as e:
-            print(f"{RED}Unexpected error during token refresh: {e}{RESET}")
-        
-        await asyncio.sleep(3590)
-
 #Report when Bot is Ready and Sync Slash Commands
 @bot.event
 async def on_ready():
     """
     Establishes required functions and request for Spotify API access token when bot finishes connecting to Discord
     """
-    global TOKEN_REFRESH_TASK
     print(f"{GREEN}{bot.user.name} has connected to Discord Successfully!{RESET}")
     
-    # Start Token Request
-    token, response_code, response_msg = await auth.request_token(spotify_cid, spotify_csecret)
-    if token != 0:
-        global access_token
-        access_token = token
-        print(f"{GREEN}Spotify API access granted with token: {access_token}{RESET}")
+    # Load or request the token, the manager renews it in the background from here on
+    token, response_code, response_msg = await token_manager.start()
+    if token:
+        print(f"{GREEN}Spotify API access granted. Token expires at: {token_manager.expiry_time()}{RESET}")
     else:
         print(f"{RED}Spotify API access error with code: {response_code}\nError Message: {response_msg}")
         print(f"Bot has no access to Spotify API, please troubleshoot and restart!{RESET}")
         return
     
-    if TOKEN_REFRESH_TASK is None or TOKEN_REFRESH_TASK.done():
-        TOKEN_REFRESH_TASK = asyncio.create_task(refresh_token())
-    else:
-        print(f"{LIGHT_BLUE}Token refresh task is already running.{RESET}")
-    
-    settings = load_settings()
+    settings = await load_settings()
     print(b_commands.sync_settings(settings))
     
     try:
-        await slash_commands.setup_slash_commands(access_token, bot)
+        await slash_commands.setup_slash_commands(bot)
     except Exception as e:
         print(e)    
 
     if settings.get("syncslash_onstart", False) is True:
-        # Load and Sync Slash Commands Module and Pass access_token to Module
+        # Load and Sync Slash Commands Module
         try:
             synced = await slash_commands.automatic_sync(bot)
             print(f"{LIGHT_BLUE}Bot has automatically synced {len(synced)} command(s){RESET}")
@@ -106,60 +214,6 @@ async def on_ready():
         
     print(f"{GREEN}Bot is Ready{RESET}")
         
-def gather_command_argument(command, cmd_func, message, author, bot, token, params):
-    """
-    Gathers and maps arguments to the parameters of a command function.
-
-    Args:
-        command (str): The name of the command being executed.
-        cmd_func (function): The function to execute for the command.
-        message (discord.Message): The message object containing the command.
-        author (discord.User): The user who issued the command.
-        bot (discord.Client): The bot instance.
-        token (str): The access token for authorization.
-        params (list): The additional parameters passed with the command.
-
-    Returns:
-        dict: A dictionary of arguments to pass to the command function.
-    
-    Raises:
-        ValueError: If a required parameter is missing and no default value is provided.
-    """
-    # Get the parameters of the command function
-    func_params = inspect.signature(cmd_func).parameters
-
-    # Define potential arguments
-    possible_args = {
-        'call_type': message, 
-        'author': author,
-        'bot': bot,
-        'token': access_token,
-    }
-
-    # Filter arguments to match the command function's signature
-    pass_args = {arg: possible_args[arg] for arg in func_params if arg in possible_args}
-
-    # Iterate over remaining params
-    param_iter = iter(params)
-    for param_name, param in func_params.items():
-        if param_name not in pass_args and param.kind in (param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY):
-            if param.default is not param.empty:
-                # Assign default if no parameter is available
-                pass_args[param_name] = next(param_iter, param.default)
-            else:
-                # Assign remaining parameters as a single string for specific cases
-                if param_name == "searchinput":
-                    pass_args[param_name] = " ".join(param_iter)
-                    break  # Remaining params captured
-                else:
-                    try:
-                        pass_args[param_name] = next(param_iter)
-                    except StopIteration:
-                        raise ValueError(f"The command '{command}' is missing a required parameter. See help for details.")
-
-    return pass_args
-
-
 @bot.event
 async def on_message(message):
     """
@@ -183,30 +237,46 @@ async def on_message(message):
 
         # Identify the command and parameters
         command, params = b_commands.identify_commands(ctx)
-        cmd_func = globals().get(command) or getattr(b_commands, command, None)
-
-        # Validate the command
-        if not (cmd_func and callable(cmd_func)):
-            await message.reply(f"The command you entered '{command}' is invalid.")
-            return
+        context = {
+            'call_type': message,
+            'author': message.author,
+            'bot': bot,
+            'token': await token_manager.get_token(),
+        }
 
         try:
-            # Prepare and pass arguments to the command function
-            pass_args = gather_command_argument(
-                command=command,
-                cmd_func=cmd_func,
-                message=message,
-                author=message.author,
-                bot=bot,
-                token=access_token,
-                params=params
-            )
-            await cmd_func(**pass_args)
+            # Bind the parameters with the command's precomputed plan and run it
+            if not await COMMANDS.dispatch(command, params, context):
+                await message.reply(f"The command you entered '{command}' is invalid.")
 
         except ValueError as ve:
             # Handle ValueErrors raised by command execution
             await message.reply(str(ve))
 
+async def main():
+    """
+    Runs the bot and releases shared resources once it disconnects.
+    """
+    discord.utils.setup_logging()
+    try:
+        if metrics_server is not None:
+            await metrics_server.start()
+        async with bot:
+            await bot.start(bot_token)
+    finally:
+        await token_manager.close()
+        await spotify_client.close()
+        await scrape_jobs.close()
+        await scraper_service.close()
+        await scrape_cache.close()
+        await saved_store.close()
+        if metrics_server is not None:
+            await metrics_server.close()
+        print(f"{LIGHT_BLUE}Spotify client, scraper and saved data store closed.{RESET}")
+
 # Run the bot using bot token located in .env
 if __name__ == "__main__":
-    bot.run(bot_token)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
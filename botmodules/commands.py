@@ -1,7 +1,12 @@
-import discord, json, os, asyncio
+import discord, os, asyncio, time, functools
 from wrapper import datascraper as scraper
 from wrapper import apiwrapper as spotifyapi
+from wrapper.filestore import get_filestore
+from wrapper import metrics, ratelimiter, tracing
 from botmodules import response_formatter as embedder
+from botmodules import scrapejobs, savedstore
+from botmodules.fanout import FanOut
+from botmodules.pages import StaticPages
 from urllib.parse import urlparse
 from discord.ui import View, Select, Button
 
@@ -12,6 +17,16 @@ SETTINGS = {
     "pertrack_scrape": False   
 }
 
+#Per-branch timeouts (seconds) for concurrent fetches in command handlers
+API_BRANCH_TIMEOUT = 20
+
+#Shown in place of a scraped figure until its background scrape finishes
+SCRAPE_PLACEHOLDER = "loading…"
+
+#Running bulk scrapes, at most one per user or server
+BULK_SCRAPES = {}
+BULK_PROGRESS_INTERVAL = 5
+
 #Sync Global Settings for Bot
 def sync_settings(new_settings):
     SETTINGS["ml_scrape"] = new_settings.get("monthly_listener_scraping", False)
@@ -22,32 +37,78 @@ def sync_settings(new_settings):
 #================DISCORD UI Generation================
 #Custom View Class for Dropdown
 class CustomView(View):
-    def __init__(self, *items):
+    def __init__(self, *items, pages=None):
         super().__init__(*items)
         self.msg = None
+        self.pages = pages
+        self.current_page = 0
+        self.scrape_jobs = []
 
     def set_message(self, msg):
         self.msg = msg
 
+    def attach_scrape(self, job, on_done):
+        """
+        Patches the view's message once a background scrape finishes. The scrape is
+        cancelled if the view times out first.
+        """
+        self.scrape_jobs.append(job)
+        job.then(on_done)
+
+    async def patch_page(self, index, embed):
+        """
+        Swaps the embed of a static page (e.g. once a background scrape finished) and
+        edits the sent message if that page is the one being shown.
+        """
+        self.pages.replace(index, embed)
+        if self.msg is None or self.current_page != index:
+            return
+        try:
+            if self.is_finished():
+                await edit_message(self.msg, embed=embed)
+            else:
+                await edit_message(self.msg, embed=embed, view=self)
+        except discord.HTTPException as err:
+            print(f"Could not update message with scraped data: {err}")
+
+    async def on_timeout(self):
+        # Nobody is looking at this reply anymore, stop its unfinished scrapes
+        for job in self.scrape_jobs:
+            job.cancel()
+        # Release the page provider (and any open track stream) once the view stops listening
+        if self.pages is not None:
+            await self.pages.close()
+
 #================DROPDOWN MENU================
 #Saved Retrieval
 #Generate Dropdown for Saved Pathway
-async def generate_dropdown(author, call_type, saved_data, token, reply_func, data_type):
+@tracing.traced()
+async def generate_dropdown(author, call_type, token, reply_func, data_type):
+    saved_type = data_type
     data_type = data_type.rstrip("s")
     label_key = data_type
     url_key = f"{data_type}_url"
+
+    # Only the requesting user's items are read, one menu's worth at a time
+    store = savedstore.get_saved_store()
+    saved_data, next_cursor = await store.page_user(author.id, saved_type, limit=embedder.MAX_DROPDOWN_OPTIONS)
+    if not saved_data:
+        await reply_func(f"No saved {saved_type.capitalize()} found.", ephemeral=True)
+        return
+    state = {"next_cursor": next_cursor}
+
+    def build_options(items):
+        return [discord.SelectOption(label=item[label_key][:100], value=item[url_key]) for item in items]
     
     selections = Select(
         placeholder=f"Select a {data_type}...",
         min_values=1,
         max_values=1,
-        options=[
-            discord.SelectOption(label=item[label_key], value=item[url_key])
-            for item in saved_data
-        ]
+        options=build_options(saved_data)
     )
     
     async def select_callback(interaction: discord.Interaction):
+        set_request_priority(interaction)
         selected_uri = selections.values[0]
         await interaction.response.defer()  # Acknowledge the interaction to prevent timeout
         selections.disabled = True
@@ -73,6 +134,19 @@ async def generate_dropdown(author, call_type, saved_data, token, reply_func, da
     view = View()
     view.add_item(selections)
 
+    if next_cursor is not None:
+        # Page through longer lists, wrapping back to the start after the last page
+        async def more_click(interaction: discord.Interaction):
+            items, state["next_cursor"] = await store.page_user(author.id, saved_type, state["next_cursor"],
+                                                                limit=embedder.MAX_DROPDOWN_OPTIONS)
+            selections.options = build_options(items)
+            more_button.label = "More ➡️" if state["next_cursor"] is not None else "Back to Start"
+            await interaction.response.edit_message(view=view)
+
+        more_button = Button(label="More ➡️", style=discord.ButtonStyle.secondary)
+        more_button.callback = more_click
+        view.add_item(more_button)
+
     # Send the dropdown menu to the user
     await reply_func(
         f"Please specify which saved {data_type} you want to retrieve:",
@@ -82,6 +156,7 @@ async def generate_dropdown(author, call_type, saved_data, token, reply_func, da
     
 #Track Retrievals
 #Track Selection Dropdown for Artist, Playlist and Album modules
+@tracing.traced()
 async def generate_track_selection(author, call_type, track_items, token, reply_func):
     
     # Create a dropdown menu with track options
@@ -97,6 +172,7 @@ async def generate_track_selection(author, call_type, track_items, token, reply_
 
     # Handle track selection and fetch track information
     async def select_callback(interaction: discord.Interaction):
+        set_request_priority(interaction)
         selected_track_id = selections.values[0]
         await interaction.response.defer()
         selections.disabled = True
@@ -116,10 +192,11 @@ async def generate_track_selection(author, call_type, track_items, token, reply_
 #================DROPDOWN MENU================
 
 #Generate Previous, Next, and Get Track Info Buttons for Get Function
-async def generate_getmodules_buttons(author, call_type, allembeds, track_items, reply_func, token, 
+@tracing.traced()
+async def generate_getmodules_buttons(author, call_type, pages, track_items, reply_func, token, 
                                       data_name, data_id, data_type):
     
-    view = CustomView()
+    view = CustomView(pages=pages)
 
         
     async def track_info_click(call_type):
@@ -127,7 +204,7 @@ async def generate_getmodules_buttons(author, call_type, allembeds, track_items,
         await call_type.response.defer()
             
     async def save_button_click(call_type):
-        statusmsg, saved = append_saved(author, data_id, data_name, data_type)
+        statusmsg, saved = await append_saved(author, data_id, data_name, data_type)
         
         if saved is True:
             save_button.disabled = True
@@ -145,26 +222,24 @@ async def generate_getmodules_buttons(author, call_type, allembeds, track_items,
     save_button.callback = save_button_click
         
 
-    if len(allembeds) > 1:
-        state = {"current_page": 0}  # Store current page state here
-        
+    if await pages.has_page(1):
         async def prev_click(call_type):
-            if state["current_page"] > 0:
-                state["current_page"] -= 1
+            if view.current_page > 0:
+                view.current_page -= 1
                 await update_embed(call_type)
 
         async def next_click(call_type):
-            if state["current_page"] < len(allembeds) - 1:
-                state["current_page"] += 1
+            if await pages.has_page(view.current_page + 1):
+                view.current_page += 1
                 await update_embed(call_type)
                 
         async def update_embed(call_type):
 
-            current_page = state["current_page"]  # Retrieve the current page from state
+            current_page = view.current_page
             prev_button.disabled = current_page == 0
-            next_button.disabled = current_page == len(allembeds) - 1
+            next_button.disabled = not await pages.has_page(current_page + 1)
             
-            await view.msg.edit(embed=allembeds[current_page], view=view)
+            await edit_message(view.msg, embed=await pages.get(current_page), view=view)
             await call_type.response.defer()
 
             
@@ -180,7 +255,7 @@ async def generate_getmodules_buttons(author, call_type, allembeds, track_items,
         view.add_item(next_button)
     else:
         async def update_embed(call_type):
-            await view.msg.edit(embed=allembeds[0], view=view)
+            await edit_message(view.msg, embed=await pages.get(0), view=view)
             await call_type.response.defer()
 
         view.add_item(get_track_info_button)
@@ -200,7 +275,7 @@ async def generate_settings_buttons(author, call_type, settingsdata):
         updated_embed = embedder.format_settings(author, settingsdata)
 
         # Update the JSON with the new setting
-        modify_setting(settingsdata)
+        await modify_setting(settingsdata)
         sync_settings(settingsdata)
 
         # Update the button label and style
@@ -210,7 +285,7 @@ async def generate_settings_buttons(author, call_type, settingsdata):
                 item.style = discord.ButtonStyle.green if not current_value else discord.ButtonStyle.red
 
         # Update the message with the new button states
-        await view.msg.edit(embed=updated_embed, view=view)
+        await edit_message(view.msg, embed=updated_embed, view=view)
         await call_type.response.defer()
 
     # Add buttons dynamically based on the settings
@@ -228,9 +303,10 @@ async def generate_settings_buttons(author, call_type, settingsdata):
     return view
     
 #Generate list Next and Previous buttons if there's more than 6 elements:
-async def generate_list_buttons(author, call_type, allembeds):
+@tracing.traced()
+async def generate_list_buttons(author, call_type, pages):
     
-    view = CustomView()
+    view = CustomView(pages=pages)
 
     state = {"current_page": 0}
     msg: None
@@ -241,16 +317,16 @@ async def generate_list_buttons(author, call_type, allembeds):
             await update_embed(call_type)
 
     async def next_click(call_type):
-        if state["current_page"] < len(allembeds) - 1:
+        if await pages.has_page(state["current_page"] + 1):
             state["current_page"] += 1
             await update_embed(call_type)
     
     async def update_embed(call_type):
         prev_button.disabled = state["current_page"] == 0
-        next_button.disabled = state["current_page"] == len(allembeds) - 1
+        next_button.disabled = not await pages.has_page(state["current_page"] + 1)
         
         page = int(state["current_page"]) 
-        await view.msg.edit(embed=allembeds[page], view=view)
+        await edit_message(view.msg, embed=await pages.get(page), view=view)
         await call_type.response.defer()
 
     prev_button = Button(label="⬅️ Previous", style=discord.ButtonStyle.primary)
@@ -266,15 +342,16 @@ async def generate_list_buttons(author, call_type, allembeds):
 
     
 #Generate Previous and Next Buttons for Get Command - Tracks Module
+@tracing.traced()
 async def generate_tracks_get_buttons(author, call_type, embed, reply_func, data_name, data_id, data_type):
     
-    view = CustomView()
+    view = CustomView(pages=StaticPages([embed]))
     
     #state = {"current_page": 0}
     msg: None
     
     async def save_button_click(call_type):
-        statusmsg, saved = append_saved(author, data_id, data_name, data_type)
+        statusmsg, saved = await append_saved(author, data_id, data_name, data_type)
         
         if saved is True:
             save_button.disabled = True
@@ -302,7 +379,7 @@ async def generate_tracks_get_buttons(author, call_type, embed, reply_func, data
         #next_button.disabled = state["current_page"] == len(allembeds) - 1
         
         #page = int(state["current_page"]) 
-        await view.msg.edit(embed=embed, view=view)
+        await edit_message(view.msg, embed=await view.pages.get(0), view=view)
         await call_type.response.defer()
 
     #prev_button = Button(label="⬅️ Previous", style=discord.ButtonStyle.primary)
@@ -320,14 +397,15 @@ async def generate_tracks_get_buttons(author, call_type, embed, reply_func, data
 
     return view
 
-async def generate_search_button(author, call_type, allembeds, reply_func, data_list, data_type):
+@tracing.traced()
+async def generate_search_button(author, call_type, pages, reply_func, data_list, data_type):
     """
     Generates a paginated button interface with dynamic buttons for fetching info.
 
     Args:
     - author: The author of the message.
     - call_type: The type of call for response handling.
-    - allembeds: The list of embeds to paginate.
+    - pages: The page provider rendering the embeds to paginate.
     - reply_func: The function to handle replies (e.g., ctx.reply).
     - data_list: The list of items to generate buttons for.
     - data_type: The type of data (e.g., 'artist', 'album').
@@ -345,7 +423,7 @@ async def generate_search_button(author, call_type, allembeds, reply_func, data_
             await update_embed(call_type)
 
     async def next_click(call_type):
-        if state["current_page"] < len(allembeds) - 1:
+        if await pages.has_page(state["current_page"] + 1):
             state["current_page"] += 1
             await update_embed(call_type)
 
@@ -361,7 +439,7 @@ async def generate_search_button(author, call_type, allembeds, reply_func, data_
             button = Button(label=name, style=discord.ButtonStyle.success)
 
             async def save_callback(call_type, name=name, spotify_id=spotify_id, current_button=button):
-                statusmsg, saved = append_saved(author, spotify_id, name, data_type)
+                statusmsg, saved = await append_saved(author, spotify_id, name, data_type)
                 
                 if saved is True:
                     current_button.disabled = True
@@ -377,14 +455,14 @@ async def generate_search_button(author, call_type, allembeds, reply_func, data_
             view.add_item(button)
 
         # Update the view
-        await call_type.response.edit_message(embed=allembeds[current_page], view=view)
+        await call_type.response.edit_message(embed=await pages.get(current_page), view=view)
 
     async def update_embed(call_type):
         prev_button.disabled = state["current_page"] == 0
-        next_button.disabled = state["current_page"] == len(allembeds) - 1
+        next_button.disabled = not await pages.has_page(state["current_page"] + 1)
         
         page = state["current_page"]
-        await view.msg.edit(embed=allembeds[page], view=view)
+        await edit_message(view.msg, embed=await pages.get(page), view=view)
         await call_type.response.defer()
 
     # Pagination buttons
@@ -398,7 +476,7 @@ async def generate_search_button(author, call_type, allembeds, reply_func, data_
     save_button.callback = save_button_click
 
     # Initial view setup
-    view = CustomView()
+    view = CustomView(pages=pages)
     view.add_item(prev_button)
     view.add_item(save_button)
     view.add_item(next_button)
@@ -421,55 +499,54 @@ def identify_commands(ctx):
 #Reply based on interactiont type (slash or legacy)
 def get_reply_method(call_type):
     if isinstance(call_type, discord.Message):
-        return call_type.reply
+        send = call_type.reply
     else:
-        return call_type.response.send_message
-
-
-#================JSON ACCESS & MODIFICATION================
-#Loads presaved data from JSON
-def load_ps_data(data_type):
-    root_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    file_path = os.path.join(root_folder, 'saved_data', f'saved{data_type}.json')
-    
-    try:
-        with open(file_path, "r") as file:
-            return json.load(file)
-    except FileNotFoundError:
-        print(f"saved{data_type}.json not found, make sure it's not deleted.")
-        return {}
-    except json.JSONDecodeError:
-        print(f"Error decoding saved{data_type}.json. Check if the file is correctly formatted.")
-        return {}
-
-
-#Add new artists to database (user based)
-def modify_ps_data(new_data, data_type):    
-    root_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    file_path = os.path.join(root_folder, 'saved_data', f'saved{data_type}.json')
-    
-    try:
-        with open(file_path, "w") as file:
-            json.dump(new_data, file, indent=4)
-        return new_data  # Return the saved data if successful
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        print(f"Error saving {data_type}: {e}")
-        return []  # Return an empty list if any error
-    
-    
-#Retrieve Saved Values from Database based on Selection (TO BE CHANGED TO SUPPORT ALL THREE)
-def retrieve_saved_on_select(author, data_type, interaction_msg):
-    author_id = str(author.id)
-    
+        send = call_type.response.send_message
+
+    async def timed_send(*args, **kwargs):
+        with tracing.span("discord_send"), metrics.DISCORD_DURATION.time(operation="send"):
+            return await send(*args, **kwargs)
+    return timed_send
+
+#Edit a sent message, timed for the metrics endpoint
+async def edit_message(msg, **kwargs):
+    with tracing.span("discord_edit"), metrics.DISCORD_DURATION.time(operation="edit"):
+        return await msg.edit(**kwargs)
+
+#Count, time and (if sampled) trace a command handler (prefix and slash alike)
+def tracked_command(func):
+    @functools.wraps(func)
+    async def wrapper(call_type, *args, **kwargs):
+        source = "prefix" if isinstance(call_type, discord.Message) else "slash"
+        outcome = "ok"
+        start = time.perf_counter()
+        try:
+            with tracing.get_tracer().trace(func.__name__, source=source):
+                return await func(call_type, *args, **kwargs)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            metrics.COMMAND_DURATION.observe(time.perf_counter() - start, command=func.__name__, source=source)
+            metrics.COMMANDS_TOTAL.inc(command=func.__name__, source=source, outcome=outcome)
+    return wrapper
+
+#Slash command interactions are served first by the API request scheduler
+def set_request_priority(call_type):
+    if isinstance(call_type, discord.Interaction):
+        ratelimiter.request_priority.set(ratelimiter.PRIORITY_INTERACTIVE)
+
+#================SAVED DATA ACCESS & MODIFICATION================
+#Retrieve Saved Values from Database based on Selection (numbering of the user's own list)
+async def retrieve_saved_on_select(author, data_type, interaction_msg):
     try:
         user_index = int(interaction_msg)
-        presaved_data = load_ps_data(data_type)
-        user_saved_data = presaved_data.get(author_id, [])
+        selected_item = await savedstore.get_saved_store().item_at(author.id, data_type, user_index - 1) if user_index >= 1 else None
         
         # Check if the user index is within range
-        if 1 <= user_index <= len(user_saved_data):
+        if selected_item is not None:
             # Dynamically access the appropriate URL key based on data_type
-            selected_item_uri = user_saved_data[user_index - 1][f"{data_type.rstrip("s")}_url"]
+            selected_item_uri = selected_item[f"{data_type.rstrip("s")}_url"]
             return selected_item_uri, None
         
         else:
@@ -480,39 +557,19 @@ def retrieve_saved_on_select(author, data_type, interaction_msg):
 
     
 # Add data to existing list for speific user 
-def append_saved(author, data_id, data_name, data_type):
-    author_id = str(author.id)
-    presaved_data = load_ps_data(data_type)
- 
+async def append_saved(author, data_id, data_name, data_type):
     data_type_formatted = data_type.rstrip("s")
-    # Construct the dynamic key based on data_type
-    url_key = f"{data_type_formatted}_url"
-
-    # Check if any item in presaved_data has the same URI
-    if any(item.get(url_key) == data_id for item in presaved_data.get(author_id, [])):
-        return f"You have already saved `{data_name}` in your {data_type} list", True
-
 
-    def sanitize_json_string(value):
-        if isinstance(value, str):
-            return json.dumps(value)[1:-1]  # Removes extra quotes added by json.dumps
-        return value
-
-    # Only apply `sanitize_json_string` to `data_name`
-    presaved_data.setdefault(author_id, []).append({
-        f"{data_type_formatted}": sanitize_json_string(data_name),
-        f"{data_type_formatted}_url": data_id 
-    })
-
-    
-    # Attempt to save changes
     try:
-        modify_ps_data(presaved_data, data_type)
-        return f"Successfully saved the {data_type_formatted} `{data_name}`", False
+        saved = await savedstore.get_saved_store().add(author.id, data_type, data_id, data_name)
     except Exception as e:
         return f"Save command encountered an exception: {str(e)}", False
+
+    if not saved:
+        return f"You have already saved `{data_name}` in your {data_type} list", True
+    return f"Successfully saved the {data_type_formatted} `{data_name}`", False
     
-#================JSON ACCESS & MODIFICATION================
+#================SAVED DATA ACCESS & MODIFICATION================
 
 #Extract ID from User Input
 def extract_id(u_input, input_type):
@@ -540,102 +597,100 @@ def extract_id(u_input, input_type):
     raise ValueError(f"The {input_type} parameter must be a valid Spotify {input_type} URI, URL, or ID")
         
 #Fetch an easily readable and formattable list based on data_type
-def fetch_saved_list(data_type):
+@tracing.traced()
+async def fetch_saved_pages(author, data_type):
     """
-    Retrieves saved data for a specific data type.
+    Builds the list pages of a user's own saved items, read from the store as pages are shown.
     
     Parameters:
-        data_type (str): The type of data to retrieve (e.g., 'artist', 'track', 'playlist', 'album).
+        author (discord.User): The user whose saved items are listed.
+        data_type (str): The type of data to retrieve (e.g., 'artists', 'tracks', 'playlists', 'albums').
         
     Returns:
-        list: A list of saved items for the given data type.
+        tuple: (page provider or None if the type is invalid, first page embed or None if nothing is saved)
     """
-    presaved_data = load_ps_data(data_type)
-    user_saved_data = []
-    
-    for _, items in presaved_data.items():
-        user_saved_data.extend(items)
-    
-    return user_saved_data
+    if data_type not in savedstore.SAVED_TYPES:
+        return None, None
+
+    pages = embedder.format_list(author, data_type.rstrip("s"), savedstore.iter_saved_pages(author.id, data_type))
+    first_page = await pages.get(0)
+    if not pages.lines:
+        await pages.close()
+        return pages, None
+    return pages, first_page
 
         
 # ------------------- BOT ASYNC FUNCTIONS ----------------------------
 
-async def fetch_artists(call_type, artist_uri, author, token, reply_func, is_slash_withsaved=False):
-    # Fetch artist information and top tracks
-    data, response_code_a = await spotifyapi.request_artist_info(artist_uri, token)
+#Fetch top tracks of an artist and format them into embeds (one fan-out branch of fetch_artists)
+async def fetch_artist_track_pages(author, artist_uri, token):
     track_data, response_code_t = await spotifyapi.request_artist_toptracks(artist_uri, token)
+    if track_data and response_code_t == 200:
+        return await embedder.format_track_embed(author, track_data, token), response_code_t
+    return None, response_code_t
+
+@tracing.traced()
+async def fetch_artists(call_type, artist_uri, author, token, reply_func, is_slash_withsaved=False):
+    # Monthly listeners are scraped in the background and patched into the embed once ready
+    scrape_job = None
+    if SETTINGS.get("ml_scrape"):
+        scrape_job = scrapejobs.get_scrape_jobs().submit(scraper.scrape_monthly_listeners, artist_uri, name="monthly_listeners")
+
+    # Fetch artist information and top tracks concurrently
+    async with FanOut() as fan:
+        fan.add("artist", spotifyapi.request_artist_info(artist_uri, token),
+                timeout=API_BRANCH_TIMEOUT, default=(None, 504))
+        fan.add("top_tracks", fetch_artist_track_pages(author, artist_uri, token),
+                timeout=API_BRANCH_TIMEOUT, default=(None, 504))
+
+        data, response_code_a = await fan.result("artist")
+        track_pages, response_code_t = await fan.result("top_tracks")
 
     if data and response_code_a == 200:
         data_name, data_id, data_type = data["name"], data["uri"], "Artist"
-                    
-        if SETTINGS.get("ml_scrape"):  
-            content = f"Selected {data_name}. "
-            note = "Retrieval of Monthly Listener Data is `On`, response might take some time."
-            
-            if isinstance(call_type, discord.Interaction):
-                if is_slash_withsaved:
-                    await call_type.edit_original_response(content=content+note, view=None)
-                else:
-                    await reply_func(content=content+note)
-            else:
-                await reply_func(note)
-        
-            try:
-                monthly_listener, msg = await scraper.scrape_monthly_listeners(artist_uri)
-            except Exception as e:
-                monthly_listener, msg = "N/A", None
-                print(f"Encountered unexpected scraper error {e}")
-        else:
+
+        # A cached figure is usually ready by now, otherwise show a placeholder
+        if scrape_job is None:
             monthly_listener, msg = None, None
-        
+        elif scrape_job.done():
+            monthly_listener, msg = scrape_job.result()
+        else:
+            monthly_listener, msg = SCRAPE_PLACEHOLDER, None
+
         allembeds = [embedder.format_get_artist(author, data, monthly_listener, msg)]
         
-        if track_data and response_code_t == 200:
-            track_embeds_list, tracks_list = await embedder.format_track_embed(author, track_data, token)
+        if track_pages:
+            track_embeds_list, tracks_list = track_pages
             allembeds.extend(track_embeds_list)
             track_fetch_failmsg = None
         else:
+            tracks_list = []
             track_fetch_failmsg = "Could you not fetch for track data, only artist data will be displayed"
         
-        view = await generate_getmodules_buttons(author, call_type, allembeds, tracks_list, reply_func, token, 
+        view = await generate_getmodules_buttons(author, call_type, StaticPages(allembeds), tracks_list, reply_func, token, 
                                                  data_name, extract_id(data_id, data_type), "artists")
-        if SETTINGS["ml_scrape"]:
-            if is_slash_withsaved:
-                msg = await call_type.followup.send(content=track_fetch_failmsg, embed=allembeds[0], view=view)
-                view.set_message(msg)
-            else:
-                if isinstance(call_type, discord.Interaction):
-                    msg = await call_type.followup.send(embed=allembeds[0], view=view)
-                else:
-                    msg = await reply_func(embed=allembeds[0], view=view)
-                view.set_message(msg)
+        if is_slash_withsaved:
+            await call_type.edit_original_response(content = f"Selected {data["name"]}", view = None)
+            msg = await call_type.followup.send(content = track_fetch_failmsg, embed = allembeds[0], view = view)
+        elif isinstance(call_type, discord.Interaction):
+            await reply_func(embed=allembeds[0], view = view)
+            msg = await call_type.original_response()
         else:
-            if is_slash_withsaved:
-                if SETTINGS["ml_scrape"]:
-                    content = f"Selected {data["name"]}. Retrieval of Monthly Listener Data is `On`, response might take some time."
-                else: 
-                    content = f"Selected {data["name"]}."
-                await call_type.edit_original_response(content = content, view = None)
-                msg = await call_type.followup.send(content = track_fetch_failmsg, embed = allembeds[0], view = view)
-                view.set_message(msg)
-            else:
-                if is_slash_withsaved:
-                    await call_type.edit_original_response(content = f"Selected {data["name"]}", view = None)
-                    msg = await call_type.followup.send(content = track_fetch_failmsg, embed = allembeds[0], view = view)
-                    view.set_message(msg)
-                else:
-                    if isinstance(call_type, discord.Interaction):
-                        await reply_func(embed=allembeds[0], view = view)
-                        msg = await call_type.original_response()
-                        view.set_message(msg)
-                    else:
-                        msg = await reply_func(embed=allembeds[0], view = view)
-                        view.set_message(msg)
+            msg = await reply_func(embed=allembeds[0], view = view)
+        view.set_message(msg)
+
+        if scrape_job is not None and monthly_listener == SCRAPE_PLACEHOLDER:
+            async def patch_monthly_listeners(result):
+                await view.patch_page(0, embedder.format_get_artist(author, data, *result))
+            view.attach_scrape(scrape_job, patch_monthly_listeners)
 
         return  
         
     else:
+        # There is no reply to patch the scraped figure into
+        if scrape_job is not None:
+            scrape_job.cancel()
+
         if response_code_a == 400 and response_code_t == 400:
             bot_msg = "Invalid artist URI." 
         elif response_code_a == 404:
@@ -650,78 +705,56 @@ async def fetch_artists(call_type, artist_uri, author, token, reply_func, is_sla
         else:
             await reply_func(bot_msg)
         
+@tracing.traced()
 async def fetch_tracks(call_type, track_uri, author, token, reply_func, dropdown_pathway=False, is_slash_withsaved=False):
+    # Playcount is scraped in the background and patched into the embed once ready
+    scrape_job = None
+    if SETTINGS["pertrack_scrape"] and not dropdown_pathway:
+        scrape_job = scrapejobs.get_scrape_jobs().submit(scraper.scrape_track_playcount, track_uri, name="playcount")
+
     data, response_code_t = await spotifyapi.request_track_info(track_uri, token)
-    
+
     #Audio Data depracated
     #audio_data, response_code_taf = await spotifyapi.request_track_audiofeatures(track_uri, token)
-    
+
     if data and response_code_t == 200:
         data_name, data_id, data_type = data["name"], data["uri"], "Track"
-    
-        if SETTINGS["pertrack_scrape"] and not dropdown_pathway:
-            if is_slash_withsaved:
-                if SETTINGS["pertrack_scrape"]:
-                    content = f"Selected {data_name}. Retrieval of Playcount Data is `On`, response might take some time."
-                else:
-                    content = f"Selected {data_name}."
-                await call_type.edit_original_response(content=content, view=None)
-            else:
-                if isinstance(call_type, discord.Interaction):
-                    if SETTINGS["pertrack_scrape"]:
-                        content = "Note: Retrieval of Playcount Data is `On`, response might take some time."
-                        await reply_func(content=content)
-                else:
-                    msg = await reply_func(embed=embed, view=view)
-                    view.set_message(msg)
-            
-            try:
-                playcount, msg = await scraper.scrape_track_playcount(track_uri)
-            except Exception as e:
-                playcount, msg = "N/A", None
-                print(f"Encountered unexpected scraper error {e}")
-        else:
+
+        if scrape_job is None:
             playcount, msg = None, None
+        elif scrape_job.done():
+            playcount, msg = scrape_job.result()
+        else:
+            playcount, msg = SCRAPE_PLACEHOLDER, None
         
         embed = embedder.format_get_track(author, data, playcount, msg)
         view = await generate_tracks_get_buttons(author, call_type, embed, reply_func,
                                                     data_name, extract_id(data_id, data_type), "tracks")
         
-        if SETTINGS["pertrack_scrape"] and not dropdown_pathway:
-            if is_slash_withsaved:
-                msg = await call_type.followup.send(embed=embed, view=view)
-                view.set_message(msg)
-            else:
-                if isinstance(call_type, discord.Interaction):
-                    await reply_func(embed=embed, view=view)
-                    msg = await call_type.original_response()
-                    view.set_message(msg)
-                else:
-                    msg = await reply_func(embed=embed, view=view)
-                    view.set_message(msg)
+        if is_slash_withsaved:
+            await call_type.edit_original_response(content=f"Selected {data['name']}", view=None)
+            msg = await call_type.followup.send(embed=embed, view=view)
+        elif dropdown_pathway:
+            msg = await call_type.original_response()
+            await edit_message(msg, embed=embed, view=view)
+        elif isinstance(call_type, discord.Interaction):
+            await reply_func(embed=embed, view=view)
+            msg = await call_type.original_response()
         else:
-        
-            if is_slash_withsaved:
-                await call_type.edit_original_response(content=f"Selected {data['name']}", view=None)
-                msg = await call_type.followup.send(embed=embed, view=view)
-                view.set_message(msg)
-            else:
-                if not dropdown_pathway:
-                    if isinstance(call_type, discord.Interaction):
-                        await reply_func(embed=embed, view=view)
-                        msg = await call_type.original_response()
-                        view.set_message(msg)
-                    else:
-                        msg = await reply_func(embed=embed, view=view)
-                        view.set_message(msg)
-                else:
-                    msg = await call_type.original_response()
-                    view.set_message(msg)
-                    await msg.edit(embed=embed, view=view)
+            msg = await reply_func(embed=embed, view=view)
+        view.set_message(msg)
+
+        if scrape_job is not None and playcount == SCRAPE_PLACEHOLDER:
+            async def patch_playcount(result):
+                await view.patch_page(0, embedder.format_get_track(author, data, *result))
+            view.attach_scrape(scrape_job, patch_playcount)
                     
         return
         
     # Error Handling 
+    if scrape_job is not None:
+        scrape_job.cancel()
+
     if response_code_t == 400:
         bot_msg = "Invalid artist URI." 
     elif response_code_t == 404:
@@ -730,6 +763,7 @@ async def fetch_tracks(call_type, track_uri, author, token, reply_func, dropdown
         bot_msg = f"API Requests failed with status codes: {response_code_t}"
     await reply_func(bot_msg)
     
+@tracing.traced()
 async def fetch_playlists(call_type, playlist_uri, author, token, reply_func, is_slash_withsaved=False):
 
     data, response_code = await spotifyapi.request_playlist_info(playlist_uri, token)
@@ -740,21 +774,23 @@ async def fetch_playlists(call_type, playlist_uri, author, token, reply_func, is
         data_id = data["uri"]
         data_type = "Playlist"
         
-        allembeds, track_lists = embedder.format_get_playlist(author, data)
-        view = await generate_getmodules_buttons(author, call_type, allembeds, track_lists, reply_func, token,
+        track_pages = spotifyapi.iter_playlist_tracks(extract_id(data["uri"], "Playlist"), token, data["tracks"])
+        pages, track_lists = embedder.format_get_playlist(author, data, track_pages)
+        first_embed = await pages.get(0)
+        view = await generate_getmodules_buttons(author, call_type, pages, track_lists, reply_func, token,
                                                  data_name, extract_id(data_id, data_type), "playlists")
         
         if is_slash_withsaved:
             await call_type.edit_original_response(content = f"Selected {data["name"]}", view = None)
-            msg = await call_type.followup.send(embed = allembeds[0], view = view)
+            msg = await call_type.followup.send(embed = first_embed, view = view)
             view.set_message(msg)
         else:
             if isinstance(call_type, discord.Interaction):
-                await reply_func(embed=allembeds[0], view = view)
+                await reply_func(embed=first_embed, view = view)
                 msg = await call_type.original_response()
                 view.set_message(msg)
             else:
-                msg = await reply_func(embed=allembeds[0], view = view)
+                msg = await reply_func(embed=first_embed, view = view)
                 view.set_message(msg)
         return  
     
@@ -767,28 +803,31 @@ async def fetch_playlists(call_type, playlist_uri, author, token, reply_func, is
         bot_msg = f"API Requests failed with status codes: {response_code}"
     await reply_func(bot_msg)
     
+@tracing.traced()
 async def fetch_albums(call_type, album_uri, author, token, reply_func, is_slash_withsaved=False):
     data, response_code = await spotifyapi.request_album_info(album_uri, token)
     if data and response_code == 200:
-        allembeds, track_lists = embedder.format_get_album(author, data)
+        track_pages = spotifyapi.iter_album_tracks(extract_id(data["uri"], "Album"), token, data["tracks"])
+        pages, track_lists = embedder.format_get_album(author, data, track_pages)
+        first_embed = await pages.get(0)
         data_name = data.get("name", "Unknown Album")
         data_id = data["uri"]
         data_type = "Album"
         
-        view = await generate_getmodules_buttons(author, call_type, allembeds, track_lists, reply_func, token,
+        view = await generate_getmodules_buttons(author, call_type, pages, track_lists, reply_func, token,
                                                  data_name, extract_id(data_id, data_type), "albums")
         
         if is_slash_withsaved:
             await call_type.edit_original_response(content = f"Selected {data["name"]}", view = None)
-            msg = await call_type.followup.send(embed = allembeds[0], view = view)
+            msg = await call_type.followup.send(embed = first_embed, view = view)
             view.set_message(msg)
         else:
             if isinstance(call_type, discord.Interaction):
-                await reply_func(embed=allembeds[0], view = view)
+                await reply_func(embed=first_embed, view = view)
                 msg = await call_type.original_response()
                 view.set_message(msg)
             else:
-                msg = await reply_func(embed=allembeds[0], view = view)
+                msg = await reply_func(embed=first_embed, view = view)
                 view.set_message(msg)
         return  
             
@@ -801,6 +840,7 @@ async def fetch_albums(call_type, album_uri, author, token, reply_func, is_slash
         bot_msg = f"API Requests failed with status codes: {response_code}"
     await reply_func(bot_msg)
     
+@tracing.traced()
 async def fetch_users(call_type, user_uri, author, token, reply_func):
     data, response_code = await spotifyapi.request_user_info(user_uri, token)
 
@@ -831,13 +871,128 @@ async def wait_for_user_input(call_type, author, bot):
         await reply_func("Sorry, you took too long to respond. Please try again.")
 
 # Bot Latency Function
+@tracked_command
 async def ping(call_type, bot):
     ping = round(bot.latency * 1000, 2)
-    bot_msg = f"Pong! Bot latency is currently `{ping} ms`"
+    api_stats = spotifyapi.scheduler_stats()
+    queued = sum(api_stats["queue_depth"].values())
+    avg_wait = round(api_stats["overall_avg_wait"] * 1000, 2)
+    cache = spotifyapi.cache_stats()
+    bot_msg = (
+        f"Pong! Bot latency is currently `{ping} ms`\n"
+        f"Spotify API queue: `{queued}` waiting, average wait `{avg_wait} ms`\n"
+        f"Spotify cache: `{cache['hits']}` hits, `{cache['misses']}` misses, `{cache['evictions']}` evictions"
+    )
+    browser = scraper.get_scraper().stats()
+    failures = sum(browser["failures"].values())
+    bot_msg += (
+        f"\nScrape queue: `{scrapejobs.get_scrape_jobs().stats()['pending']}` waiting, "
+        f"`{browser['active']}` running, average page wait `{round(browser['avg_wait'] * 1000, 2)} ms`, "
+        f"average page load `{round(browser['avg_navigation'] * 1000, 2)} ms`, `{failures}` failures"
+    )
+    scrape_cache = scraper.get_scrape_cache()
+    if scrape_cache is not None:
+        scrape_stats = scrape_cache.stats()
+        bot_msg += f"\nScrape cache: `{scrape_stats['size']}` entries, `{scrape_stats['hits'] + scrape_stats['stale_hits']}` hits, `{scrape_stats['misses']}` misses"
     reply_func = get_reply_method(call_type)
     await reply_func(bot_msg)
 
+#Bulk Scrape: monthly listeners of every saved artist of a user or server
+async def run_bulk_scrape(artists, on_progress=None):
+    """
+    Scrapes the monthly listeners of many artists, using every browser slot at once.
+    Results go through (and into) the scrape cache like a regular s!get.
+
+    Args:
+        artists (dict): Artist ID mapped to its name.
+        on_progress (callable, optional): Coroutine function (done, total) called as artists finish.
+
+    Returns:
+        list[tuple]: (artist name, artist id, monthly listeners, error message) per artist.
+    """
+    concurrency = asyncio.Semaphore(scraper.get_scraper().pool_size)
+    timeout = scrapejobs.get_scrape_jobs().timeout
+    results = []
+
+    async def scrape_one(artist_id, name):
+        async with concurrency:
+            try:
+                monthly_listener, msg = await asyncio.wait_for(scraper.scrape_monthly_listeners(artist_id), timeout)
+            except asyncio.TimeoutError:
+                monthly_listener, msg = "N/A", "Request timed out"
+        results.append((name, artist_id, monthly_listener, msg))
+        if on_progress is not None:
+            await on_progress(len(results), len(artists))
+
+    await asyncio.gather(*(scrape_one(artist_id, name) for artist_id, name in artists.items()))
+    return results
+
+async def bulk_scrape_job(author, msg, scope_label, artists):
+    started = time.monotonic()
+    last_update = {"at": started}
+
+    async def on_progress(done, total):
+        if done < total and time.monotonic() - last_update["at"] >= BULK_PROGRESS_INTERVAL:
+            last_update["at"] = time.monotonic()
+            try:
+                await edit_message(msg, content=f"Scraping monthly listeners... `{done}/{total}` artists done.")
+            except discord.HTTPException:
+                pass
+
+    results = await run_bulk_scrape(artists, on_progress)
+    report = embedder.format_bulk_scrape(author, scope_label, results, time.monotonic() - started)
+    await edit_message(msg, content=None, embed=report)
+
+@tracked_command
+async def bulkscrape(call_type, author, scope="me", *args):
+    reply_func = get_reply_method(call_type)
+    scope = scope.lower()
+
+    if not SETTINGS.get("ml_scrape"):
+        await reply_func("Monthly Listener scraping is `Off`. Turn it on in the settings to use bulk scraping.")
+        return
+
+    if scope in ("me", "mine"):
+        key, scope_label, owner_ids = f"user:{author.id}", "your", [str(author.id)]
+    elif scope in ("server", "guild"):
+        if call_type.guild is None:
+            await reply_func("Server bulk scrapes can only be run inside a server.")
+            return
+        key, scope_label = f"guild:{call_type.guild.id}", "this server's"
+        owner_ids = [str(member.id) for member in call_type.guild.members]
+    else:
+        await reply_func(f"The parameter of the bulkscrape command `{scope}` is invalid. Use `me` or `server`.")
+        return
+
+    if key in BULK_SCRAPES:
+        await reply_func("A bulk scrape for these saved artists is already running, please wait for its report.")
+        return
+
+    artists = await savedstore.get_saved_store().list_for_users(owner_ids, "artists")
+    if not artists:
+        await reply_func(f"There are no saved artists to scrape in {scope_label} list.")
+        return
+
+    note = f"Scraping monthly listeners of `{len(artists)}` saved artists, the report will appear here once done."
+    if isinstance(call_type, discord.Interaction):
+        await reply_func(note)
+        msg = await call_type.original_response()
+    else:
+        msg = await reply_func(note)
+
+    # Runs in the background so the command handler returns right away
+    task = asyncio.create_task(bulk_scrape_job(author, msg, scope_label, artists))
+    BULK_SCRAPES[key] = task
+
+    def on_done(task):
+        BULK_SCRAPES.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Bulk scrape {key} failed: {task.exception()}")
+
+    task.add_done_callback(on_done)
+
 # Help Function
+@tracked_command
 async def help(call_type, author):
     embed = discord.Embed(
         title="Statistify Help Menu",  
@@ -874,6 +1029,8 @@ Example: `s!search artists Shep`
 \n
 **`Ping`** pings the bot
 **`Settings`** opens the bot settings menu
+**`Bulkscrape`** ranks the monthly listeners of your (`me`) or the server's (`server`) saved artists
+Example: `s!bulkscrape server` (short form: `s!bulk`)
 **`Help`** requests the help menu
                     """, inline=False)
 
@@ -882,30 +1039,39 @@ Example: `s!search artists Shep`
     await reply_func(embed=embed)
 
 # List Saved Artists
+@tracked_command
 async def list(call_type, author, listtarget, *args):
     data_type = listtarget.lower().rstrip("s")
     reply_func = get_reply_method(call_type)
     
-    saved_list = fetch_saved_list(listtarget)
-    
-    if_error = f"The parameter of the list function `{listtarget}` is invalid."
+    listpages, first_page = await fetch_saved_pages(author, f"{data_type}s")
     
-    # Check if saved_list is empty to confirm data_type validity
-    if saved_list:
-        listembeds = embedder.format_list(author, data_type, saved_list)
-        if len(listembeds) > 1:
-            view = generate_list_buttons(author, call_type, listembeds)
+    if listpages is None:
+        await reply_func(f"The parameter of the list function `{listtarget}` is invalid.")
+    elif first_page is None:
+        await reply_func(f"You have not saved any {data_type}s yet.")
+    else:
+        if await listpages.has_page(1):
+            view = await generate_list_buttons(author, call_type, listpages)
         else:
             view = None
-        await reply_func(embed=listembeds[0], view = view)
-    else:
-        await reply_func(if_error)
+            await listpages.close()
+
+        if view is None:
+            await reply_func(embed=first_page)
+        elif isinstance(call_type, discord.Interaction):
+            await reply_func(embed=first_page, view = view)
+            view.set_message(await call_type.original_response())
+        else:
+            view.set_message(await reply_func(embed=first_page, view = view))
     
     return
 
 #Get Command        
+@tracked_command
 async def get(call_type, author, bot, searchtarget, u_input, token, *args):
     reply_func = get_reply_method(call_type)
+    set_request_priority(call_type)
     
     #ALl Search Targets
     search_mappings = {
@@ -957,40 +1123,38 @@ async def get_saved_module(call_type, reply_func, author, bot, token, data_type)
         token (str): Authorization token.
         data_type (str): The type of data to retrieve (e.g., 'artist', 'track', 'playlist').
     """
-    # Use the unified fetch function for retrieving saved data
-    saved_data_list = fetch_saved_list(data_type)
-    
-    # Ensure format_list function exists for the specified data type
-    if not saved_data_list:
-        await reply_func(f"No saved {data_type.capitalize()} found.")
+    # For discord.Interaction type
+    if isinstance(call_type, discord.Interaction):
+        await generate_dropdown(author, call_type, token, reply_func, data_type)
         return
 
     # For discord.Message interaction type
-    if isinstance(call_type, discord.Message):
-        list_embed = embedder.format_list(author, data_type.rstrip("s"), saved_data_list)
-        await reply_func(
-            f"Please specify (by number) which of the saved {data_type} you want to retrieve:",
-            embed=list_embed[0]
-        )
-        
-        # Await user input
-        interaction_msg = await wait_for_user_input(call_type, author, bot)
-        data_id, fail = retrieve_saved_on_select(author, data_type, interaction_msg)
-        
-        if fail:
-            await reply_func(fail)
-            return
-        else:
-            return data_id
+    list_pages, first_page = await fetch_saved_pages(author, data_type)
+    if first_page is None:
+        await reply_func(f"No saved {data_type.capitalize()} found.")
+        return
 
-    # For discord.Interaction type
-    elif isinstance(call_type, discord.Interaction):
-        await generate_dropdown(author, call_type, saved_data_list, token, reply_func, data_type)
+    await list_pages.close()
+    await reply_func(
+        f"Please specify (by number) which of the saved {data_type} you want to retrieve:",
+        embed=first_page
+    )
+    
+    # Await user input
+    interaction_msg = await wait_for_user_input(call_type, author, bot)
+    data_id, fail = await retrieve_saved_on_select(author, data_type, interaction_msg)
+    
+    if fail:
+        await reply_func(fail)
         return
+    else:
+        return data_id
 
+@tracked_command
 async def save(call_type, author, savetarget, u_input, token, *args):
     
     reply_func = get_reply_method(call_type)
+    set_request_priority(call_type)
     data_type = savetarget.lower()
 
     # Map each data type to its respective functions and error messages
@@ -1014,7 +1178,7 @@ async def save(call_type, author, savetarget, u_input, token, *args):
             if data and response_code == 200:
                 data_name = data.get('name', f"Unknown {uri_type}")
                 # Save data info
-                statusmsg, saved = append_saved(author, data_id, data_name, data_type)
+                statusmsg, saved = await append_saved(author, data_id, data_name, data_type)
             else:
                 # Handle invalid or failed API responses
                 statusmsg = (
@@ -1034,7 +1198,7 @@ async def save(call_type, author, savetarget, u_input, token, *args):
 
 def extract_items_for_buttons(data, data_type):
 
-    items = data[data_type]["items"]
+    items = [item for item in data[data_type]["items"] if item]
     
     match data_type:
         case "artists":
@@ -1047,6 +1211,7 @@ def extract_items_for_buttons(data, data_type):
             return [(track["name"], track["id"]) for track in items]
     
 #TEMP
+@tracing.traced()
 async def search_data(call_type, author, bot, searchinput, data_type, token, reply_func, *args):
     # Define a mapping of data types to Spotify API search types
     bot_msg = None
@@ -1063,19 +1228,20 @@ async def search_data(call_type, author, bot, searchinput, data_type, token, rep
 
     if data and response_code == 200:
         # Format the data into embeds
-        allembeds = embedder.format_search_data(author, searchinput, data, data_type)
+        pages = embedder.format_search_data(author, searchinput, data, data_type)
+        first_embed = await pages.get(0)
         
         data_list = extract_items_for_buttons(data, data_type)
         
-        view = await generate_search_button(author, call_type, allembeds, reply_func, data_list, data_type)
+        view = await generate_search_button(author, call_type, pages, reply_func, data_list, data_type)
         
         # Send the first embed as a response
         if isinstance(call_type, discord.Interaction):
-            await reply_func(embed=allembeds[0], view = view)
+            await reply_func(embed=first_embed, view = view)
             msg = await call_type.original_response()
             view.set_message(msg)
         else:
-            msg = await reply_func(embed=allembeds[0], view = view)
+            msg = await reply_func(embed=first_embed, view = view)
             view.set_message(msg)
         
         return
@@ -1084,9 +1250,11 @@ async def search_data(call_type, author, bot, searchinput, data_type, token, rep
         bot_msg = f"API Requests failed with status codes: {response_code}"
     await reply_func(bot_msg)
     
+@tracked_command
 async def search(call_type, author, bot, searchtarget, searchinput, token, *args):
     
     reply_func = get_reply_method(call_type)
+    set_request_priority(call_type)
     data_type = searchtarget.lower()
     
     possible_search = ["artists", "albums", "playlists", "tracks"]
@@ -1101,29 +1269,27 @@ async def search(call_type, author, bot, searchtarget, searchinput, token, *args
     return
     
 #==========SETTINGS JSON ACCESS============
-def load_settings():
+async def load_settings():
     root_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     file_path = os.path.join(root_folder, f'settings.json')
     try:
-        with open(file_path, "r") as file:
-            settings_from_file = json.load(file)
-            return settings_from_file
+        return await get_filestore().load(file_path)
         
     except FileNotFoundError:
         print(f"settings.json not found, using default settings values.")
         return None
 
-def modify_setting(new_setting):
+async def modify_setting(new_setting):
     root_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     file_path = os.path.join(root_folder, f'settings.json')
     
     try:
-        with open(file_path, "w") as file:
-            json.dump(new_setting, file, indent=4)
+        await get_filestore().save(file_path, new_setting, indent=4)
     
-    except (FileNotFoundError, json.JSONDecodeError) as e:
+    except OSError as e:
         print(f"Error saving {e}")
     
+@tracked_command
 async def settings(call_type, author, setting_accesstype, *args):
     reply_func = get_reply_method(call_type)
     access_type = ["set", "read"]
@@ -1132,7 +1298,7 @@ async def settings(call_type, author, setting_accesstype, *args):
         
         setting_accesstype = setting_accesstype.lower()
         if setting_accesstype == "set":
-            settings_data = load_settings()
+            settings_data = await load_settings()
             settingembed = embedder.format_settings(author, settings_data)
             
             view = await generate_settings_buttons(author, call_type, settings_data)
@@ -1145,7 +1311,7 @@ async def settings(call_type, author, setting_accesstype, *args):
                 msg = await reply_func(embed=settingembed, view = view)
                 view.set_message(msg)
         elif setting_accesstype == "read":
-            settings_data = load_settings()
+            settings_data = await load_settings()
             settingembed = embedder.format_settings(author, settings_data)
             await reply_func(embed=settingembed)
                 
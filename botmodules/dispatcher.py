@@ -0,0 +1,107 @@
+#Prefix (s!) Command Registry and Dispatcher
+import inspect
+
+#Arguments supplied by the dispatcher rather than typed by the user
+CONTEXT_ARGUMENTS = ("call_type", "author", "bot", "token")
+
+class Command:
+    """
+    A registered prefix command with its argument binding plan worked out up front.
+
+    The plan lists the handler's parameters in order, each tagged with how it is filled:
+    from the message context, from the next typed word (with or without a default), or
+    from all remaining words joined together (`searchinput`).
+    """
+    def __init__(self, name, handler):
+        self.name = name
+        self.handler = handler
+        self.plan = []
+
+        captured_rest = False
+        for param_name, param in inspect.signature(handler).parameters.items():
+            if param_name in CONTEXT_ARGUMENTS:
+                self.plan.append(("context", param_name, None))
+            elif captured_rest or param.kind not in (param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY):
+                continue
+            elif param.default is not param.empty:
+                self.plan.append(("optional", param_name, param.default))
+            elif param_name == "searchinput":
+                # Remaining params are captured as one string, later typed params are left unfilled
+                self.plan.append(("rest", param_name, None))
+                captured_rest = True
+            else:
+                self.plan.append(("required", param_name, None))
+
+    def bind(self, context, params):
+        """
+        Maps the message context and typed parameters onto the handler's arguments.
+
+        Args:
+            context (dict): Values for call_type, author, bot and token.
+            params (list): The words typed after the command name.
+
+        Returns:
+            dict: Keyword arguments for the handler.
+
+        Raises:
+            ValueError: If a required parameter is missing.
+        """
+        pass_args = {}
+        param_iter = iter(params)
+        for kind, param_name, default in self.plan:
+            if kind == "context":
+                pass_args[param_name] = context[param_name]
+            elif kind == "optional":
+                pass_args[param_name] = next(param_iter, default)
+            elif kind == "rest":
+                pass_args[param_name] = " ".join(param_iter)
+            else:
+                try:
+                    pass_args[param_name] = next(param_iter)
+                except StopIteration:
+                    raise ValueError(f"The command '{self.name}' is missing a required parameter. See help for details.")
+        return pass_args
+
+class CommandRegistry:
+    """
+    Maps command names and aliases to their Command, built once at startup so a message
+    is dispatched with a single dict lookup. Only registered commands can be run.
+    """
+    def __init__(self):
+        self._commands = {}
+
+    def register(self, name, handler, aliases=()):
+        command = Command(name, handler)
+        for key in (name, *aliases):
+            key = key.lower()
+            if key in self._commands:
+                raise ValueError(f"Command name '{key}' is already registered.")
+            self._commands[key] = command
+        return command
+
+    def get(self, name):
+        return self._commands.get(name.lower())
+
+    def names(self):
+        return sorted({command.name for command in self._commands.values()})
+
+    async def dispatch(self, name, params, context):
+        """
+        Runs a command.
+
+        Args:
+            name (str): The command name or alias.
+            params (list): The words typed after the command name.
+            context (dict): Values for call_type, author, bot and token.
+
+        Returns:
+            bool: False if no command is registered under `name`.
+
+        Raises:
+            ValueError: If a required parameter is missing.
+        """
+        command = self.get(name)
+        if command is None:
+            return False
+        await command.handler(**command.bind(context, params))
+        return True
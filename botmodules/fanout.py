@@ -0,0 +1,64 @@
+#Fan-out / Fan-in Helper for Command Handlers
+import asyncio
+
+class FanOut:
+    """
+    Runs independent coroutines of a command concurrently and collects their results.
+
+    Every branch starts as soon as it is added and has its own timeout and default value,
+    so a slow or failing branch (e.g. the web scraper) only degrades its own field while
+    the others are used as normal. Used as an async context manager, any branch that is
+    still running when the block exits is cancelled.
+
+    Example:
+        async with FanOut() as fan:
+            fan.add("artist", spotifyapi.request_artist_info(artist_id, token), timeout=20, default=(None, 504))
+            fan.add("listeners", scraper.scrape_monthly_listeners(artist_id), timeout=30, default=("N/A", None))
+            data, status = await fan.result("artist")
+    """
+    def __init__(self):
+        self._tasks = {}
+        self._defaults = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.cancel()
+
+    def add(self, name, coro, timeout=None, default=None):
+        """
+        Starts a branch.
+
+        Args:
+            name (str): Key used to fetch the result.
+            coro (coroutine): The work to run.
+            timeout (float, optional): Seconds before the branch is abandoned.
+            default: Value returned by result() if the branch times out or raises.
+        """
+        if timeout is not None:
+            coro = asyncio.wait_for(coro, timeout)
+        self._defaults[name] = default
+        self._tasks[name] = asyncio.create_task(coro)
+
+    async def result(self, name):
+        """
+        Waits for a branch and returns its result, or its default on timeout, cancellation or error.
+        """
+        task = self._tasks[name]
+        try:
+            # Shielded so cancelling the caller does not look like a cancelled branch
+            return await asyncio.shield(task)
+        except asyncio.TimeoutError:
+            print(f"Command branch '{name}' timed out")
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+        except Exception as e:
+            print(f"Command branch '{name}' failed: {e}")
+        return self._defaults[name]
+
+    def cancel(self):
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,175 @@
+#Lazy Embed Page Providers for Paginated Views
+import asyncio
+from collections import OrderedDict
+from wrapper import tracing
+
+class PageProvider:
+    """
+    Base class for paginated embeds that are rendered only when a page is shown.
+
+    Each view owns its own provider, which keeps the last few rendered pages in a small
+    LRU cache so flipping back and forth does not re-render them.
+
+    Args:
+        cache_size (int): Number of rendered embeds kept per provider.
+    """
+    def __init__(self, cache_size=3):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    async def prepare(self, index):
+        """
+        Makes sure the data for page `index` is available. Returns False if the page does not exist.
+        """
+        raise NotImplementedError
+
+    def render(self, index):
+        """
+        Builds the embed of page `index`. Only called after prepare(index) returned True.
+        """
+        raise NotImplementedError
+
+    async def has_page(self, index):
+        return index >= 0 and await self.prepare(index)
+
+    @tracing.traced("render_page")
+    async def get(self, index):
+        """
+        Returns the embed of page `index` (rendering it if needed), or None if there is no such page.
+        """
+        if index in self._cache:
+            self._cache.move_to_end(index)
+            return self._cache[index]
+
+        if not await self.has_page(index):
+            return None
+
+        embed = self.render(index)
+        if self.cache_size > 0:
+            self._cache[index] = embed
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return embed
+
+    def invalidate(self, index=None):
+        """
+        Drops the cached embed of one page (or every page) so it is rendered again next time.
+        """
+        if index is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(index, None)
+
+    async def close(self):
+        self._cache.clear()
+
+class StaticPages(PageProvider):
+    """
+    Provider over a short list of embeds that were already built (e.g. an artist and its top tracks).
+    """
+    def __init__(self, embeds):
+        super().__init__(cache_size=0)
+        self.embeds = embeds
+
+    async def prepare(self, index):
+        return index < len(self.embeds)
+
+    def render(self, index):
+        return self.embeds[index]
+
+    def replace(self, index, embed):
+        self.embeds[index] = embed
+
+def page_bounds(index, first_size, size):
+    """
+    Returns the (start, end) item slice of page `index` when the first page holds `first_size` items
+    and every following page holds `size`.
+    """
+    if index == 0:
+        return 0, first_size
+    start = first_size + (index - 1) * size
+    return start, start + size
+
+class ChunkedPages(PageProvider):
+    """
+    Provider over an in-memory list of compact items, rendering one chunk per page.
+
+    Args:
+        items (list): Items to paginate.
+        render_page (callable): Function (chunk, index, start) returning the embed of a page.
+        size (int): Items per page.
+        first_size (int, optional): Items on the first page, defaults to size.
+    """
+    def __init__(self, items, render_page, size, first_size=None, cache_size=3):
+        super().__init__(cache_size)
+        self.items = items
+        self.render_page = render_page
+        self.size = size
+        self.first_size = first_size or size
+
+    async def prepare(self, index):
+        start, _ = page_bounds(index, self.first_size, self.size)
+        return index == 0 or start < len(self.items)
+
+    def render(self, index):
+        start, end = page_bounds(index, self.first_size, self.size)
+        return self.render_page(self.items[start:end], index, start)
+
+class StreamedPages(PageProvider):
+    """
+    Provider over an async stream of item pages (e.g. a playlist's track pages).
+
+    Items are pulled from the stream only as far as the requested page needs and are kept as
+    compact lines produced by to_line, so neither the first reply nor memory use depend on the
+    size of the whole collection.
+
+    Args:
+        item_pages (async iterator): Yields lists of raw items.
+        to_line (callable): Converts a raw item to the value stored for rendering, or None to skip it.
+        render_page (callable): Function (lines, index, start) returning the embed of a page.
+        size (int): Lines per page.
+        first_size (int, optional): Lines on the first page, defaults to size.
+    """
+    def __init__(self, item_pages, to_line, render_page, size, first_size=None, cache_size=3):
+        super().__init__(cache_size)
+        self.item_pages = item_pages
+        self.to_line = to_line
+        self.render_page = render_page
+        self.size = size
+        self.first_size = first_size or size
+        self.lines = []
+        self.exhausted = False
+        #One reader of item_pages at a time, overlapping button presses wait for the first one
+        self._fill_lock = asyncio.Lock()
+
+    async def _fill(self, count):
+        if len(self.lines) >= count or self.exhausted:
+            return
+        async with self._fill_lock:
+            #Checked again: the press that held the lock may already have loaded these lines
+            while len(self.lines) < count and not self.exhausted:
+                try:
+                    items = await anext(self.item_pages)
+                except StopAsyncIteration:
+                    self.exhausted = True
+                    break
+                for item in items:
+                    line = self.to_line(item)
+                    if line is not None:
+                        self.lines.append(line)
+
+    async def prepare(self, index):
+        start, end = page_bounds(index, self.first_size, self.size)
+        await self._fill(end)
+        return index == 0 or start < len(self.lines)
+
+    def render(self, index):
+        start, end = page_bounds(index, self.first_size, self.size)
+        return self.render_page(self.lines[start:end], index, start)
+
+    async def close(self):
+        await super().close()
+        async with self._fill_lock:
+            if not self.exhausted and hasattr(self.item_pages, "aclose"):
+                await self.item_pages.aclose()
+            self.exhausted = True
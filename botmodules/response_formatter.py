@@ -1,31 +1,37 @@
-import discord
+import discord, asyncio
 from wrapper import apiwrapper as spotifyapi
+from wrapper import tracing
+from botmodules.pages import ChunkedPages, StreamedPages
+
+#Upper bound on album lookups in flight for one embed (matches the multi-album endpoint limit)
+MAX_ALBUM_FETCHES = 20
+#Tracks shown per album in the artist top track pages (same page size as /albums/{id}/tracks)
+ALBUM_TRACKLIST_LIMIT = 20
+#Discord caps select menus at 25 options
+MAX_DROPDOWN_OPTIONS = 25
 
 #Misc Command - Change Track Duration from ms to s
 def format_track_duration(ms):
     minutes, seconds = ms // 60000, (ms % 60000) // 1000
     return f"{minutes}:{seconds:02}"
 
-def format_list(author, list_data_type, saved_list, chunk_size=6):
+@tracing.traced()
+def format_list(author, list_data_type, saved_pages, chunk_size=6):
     """
-    Format a list into a series of Discord embeds, paginated for readability.
+    Format a list into Discord embed pages, paginated for readability and rendered on demand.
     
     Args:
         author (discord.User): The author who request the list command
         list_data_type (str): The type of data being listed (e.g., "song", "video").
-        saved_list (list[dict]): The list of saved items to be formatted.
+        saved_pages (async iterator): Yields lists of the saved items to be formatted, read only as far as the pages shown need.
         chunk_size (int): The number of items per embed page. Default is 6.
         
     Returns:
-        list[discord.Embed]: A list of embeds formatted for Discord.
+        StreamedPages: Page provider rendering each embed when it is first shown.
     """
-    embeds = []
     avatar_url = author.avatar.url  # Cache avatar URL
 
-    # Split the saved list into chunks for pagination
-    for i, chunk in enumerate(
-        (saved_list[j:j + chunk_size] for j in range(0, len(saved_list), chunk_size)), start=1
-    ):
+    def render_page(chunk, page_index, start):
         embed = discord.Embed(
             title=f"Saved {list_data_type}s",
             description=(
@@ -36,7 +42,7 @@ def format_list(author, list_data_type, saved_list, chunk_size=6):
         )
 
         # Add fields for each item in the current chunk
-        for index, item in enumerate(chunk, start=(i - 1) * chunk_size + 1):
+        for index, item in enumerate(chunk, start=start + 1):
             embed.add_field(
                 name=f"`{index}` - {item[list_data_type]}",
                 value=f"{list_data_type.capitalize()} ID: `{item[f'{list_data_type}_url']}`",
@@ -45,11 +51,12 @@ def format_list(author, list_data_type, saved_list, chunk_size=6):
 
         # Add footer information
         embed.set_footer(text=f"Requested by {author.display_name}", icon_url=avatar_url)
-        embeds.append(embed)
+        return embed
 
-    return embeds
+    return StreamedPages(saved_pages, lambda item: item, render_page, chunk_size)
 
 #Create Embed for Artist (& And Artist Top tracks)
+@tracing.traced()
 def format_get_artist(author, response, monthly_listener=None, errormsg=None):
     """
     Formats artist information into a Discord embed for display.
@@ -81,7 +88,8 @@ def format_get_artist(author, response, monthly_listener=None, errormsg=None):
     embed.add_field(name="Followers", value=f"`{int(response['followers']['total']):,}`", inline=True)
     
     if monthly_listener:
-        embed.add_field(name="Monthly Listeners", value=f"`{int(monthly_listener):,}`", inline=True)
+        value = f"{int(monthly_listener):,}" if str(monthly_listener).isdigit() else monthly_listener
+        embed.add_field(name="Monthly Listeners", value=f"`{value}`", inline=True)
     
     embed.add_field(name="Popularity Index", value=f"`{response['popularity']}`", inline=True)
 
@@ -101,20 +109,36 @@ def format_get_artist(author, response, monthly_listener=None, errormsg=None):
 
     return embed
 
-async def format_track_embed_helper_albums(album_id, token):
+async def format_track_embed_helper_albums(album_ids, token, max_concurrency=MAX_ALBUM_FETCHES):
     """
-    Helper function to retrieve album tracklist from Spotify API.
+    Helper function to retrieve the tracklists of several albums from Spotify API concurrently.
+
+    Duplicate album IDs are fetched once. Lookups go through request_album_info, so concurrent
+    calls are coalesced onto the multi-album endpoint by the API wrapper.
 
     Args:
-        album_id (str): The ID of the album.
+        album_ids (list[str]): The IDs of the albums.
         token (str): Authorization token for Spotify API.
+        max_concurrency (int): Maximum number of album lookups in flight at once.
 
     Returns:
-        tuple: Album tracks data and success flag.
+        dict: Album ID mapped to its tracklist paging object, or None if the lookup failed.
     """
-    album_tracks_data, response_code = await spotifyapi.request_album_tracklist(album_id, token)
-    return (album_tracks_data, True) if album_tracks_data and response_code == 200 else (None, False)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch_tracklist(album_id):
+        async with semaphore:
+            try:
+                album_data, response_code = await spotifyapi.request_album_info(album_id, token)
+            except Exception as e:
+                print(f"Could not retrieve album {album_id}: {e}")
+                return album_id, None
+        return album_id, album_data["tracks"] if album_data and response_code == 200 else None
+
+    results = await asyncio.gather(*(fetch_tracklist(album_id) for album_id in dict.fromkeys(album_ids)))
+    return dict(results)
 
+@tracing.traced()
 async def format_track_embed(author, response, token):
     """
     Format track details into Discord embeds and track list.
@@ -127,9 +151,15 @@ async def format_track_embed(author, response, token):
     Returns:
         tuple: List of Discord embeds and list of tracks with their URIs.
     """
+    embeds = []
     tracks_list = []
     author_avatar_url = author.avatar.url
 
+    # Fetch every multi-track album up front, all at once
+    album_tracklists = await format_track_embed_helper_albums(
+        [track['album']['id'] for track in response['tracks'] if track['album']['total_tracks'] > 1], token
+    )
+
     for track in response['tracks']:
         album = track['album']
         album_name = album['name']
@@ -145,10 +175,10 @@ async def format_track_embed(author, response, token):
 
         # Determine the track list or fallback display
         if album['total_tracks'] > 1:
-            album_tracks, response_succeed = await format_track_embed_helper_albums(album['id'], token)
+            album_tracks = album_tracklists.get(album['id'])
             track_list = (
-                "\n".join(f"{str(t['track_number']).rjust(2, '0')}. {t['name']}" for t in album_tracks['items'])
-                if response_succeed and album_tracks
+                "\n".join(f"{str(t['track_number']).rjust(2, '0')}. {t['name']}" for t in album_tracks['items'][:ALBUM_TRACKLIST_LIMIT])
+                if album_tracks
                 else "Could not retrieve track list."
             )
         else:
@@ -170,8 +200,9 @@ async def format_track_embed(author, response, token):
         embed.add_field(name="Spotify Album URI", value=f"`{album_uri}`", inline=False)
         embed.add_field(name="Spotify Track URI", value=f"`{track_uri}`", inline=False)
         embed.set_footer(text=f"Requested by {author.display_name}", icon_url=author_avatar_url)
-        
-    return embed, tracks_list
+        embeds.append(embed)
+
+    return embeds, tracks_list
 
 #Deprecated, unused
 def format_track_audiofeatures(author, response, audiofeatures_response, allembeds):
@@ -250,6 +281,7 @@ def format_track_audiofeatures(author, response, audiofeatures_response, allembe
 
     return allembeds
 
+@tracing.traced()
 def format_get_track(author, response, playcount=None, errormsg=None):
     album_name = response['album']['name']
     album_type = response['album']['album_type']
@@ -297,7 +329,22 @@ def format_get_track(author, response, playcount=None, errormsg=None):
 
 
 
-def format_get_playlist(author, response):
+@tracing.traced()
+def format_get_playlist(author, response, track_pages):
+    """
+    Formats a playlist into paginated Discord embeds that are rendered on demand.
+
+    Tracks are pulled from track_pages only as far as the pages a user opens.
+
+    Args:
+        author (discord.User): The user requesting the playlist.
+        response (dict): Playlist information from the Spotify API.
+        track_pages (async iterator): Yields lists of playlist track items (see spotifyapi.iter_playlist_tracks).
+
+    Returns:
+        tuple: StreamedPages provider and list of (track name, track url) for the track dropdown,
+               filled as tracks are streamed in.
+    """
     # Extracting playlist information
     playlist_name = response['name']
     playlist_image_url = response['images'][0]['url'] if response['images'] else None
@@ -306,63 +353,51 @@ def format_get_playlist(author, response):
     owner_name = response['owner']['display_name']
     owner_url = response['owner']['external_urls']['spotify']
     playlist_url = response['external_urls']['spotify']
+    avatar_url = author.avatar.url if author.avatar else None
 
-    # Formatting tracks
-    track_list = [
-        f"**{item['track']['name']}** by `{', '.join(artist['name'] for artist in item['track']['artists'])}` | [Link]({item['track']['external_urls']['spotify']})\n"
-        for item in response['tracks']['items']
-    ]
-    track_list_for_dropdown = [(item['track']['name'], item['track']['external_urls']['spotify']) for item in response['tracks']['items']]
-
-    # Embed list initialization
-    embeds = []
+    track_list_for_dropdown = []
     max_first_embed_tracks = 8
     max_following_embed_tracks = 10
 
-    # First embed with playlist information and initial tracks
-    embed = discord.Embed(
-        title=playlist_name,
-        description=f"Playlist by [{owner_name}]({owner_url})\n",
-        color=discord.Color.orange()
-    )
-
-    if playlist_image_url:
-        embed.set_thumbnail(url=playlist_image_url)
-
-    embed.add_field(name="Spotify URL", value=playlist_url, inline=False)
-    embed.add_field(name="Followers", value=f"`{follower_count}`", inline=True)
-    embed.add_field(name="Collaborative", value=f"`{is_collaborative}`", inline=True)
-    embed.add_field(name="Tracks", value="\n".join(track_list[:max_first_embed_tracks]), inline=False)
-
-    # Set footer with requester info
-    avatar_url = author.avatar.url if author.avatar else None
-    embed.set_footer(text=f"Requested by {author.display_name}", icon_url=avatar_url)
-
-    # Append first embed to the list
-    embeds.append(embed)
-
-    # Additional embeds for remaining tracks (10 per page)
-    for i in range(max_first_embed_tracks, len(track_list), max_following_embed_tracks):
-        additional_embed = discord.Embed(
-            title=f"{playlist_name} (Continued)",
-            description=f"Track List Page {i // max_following_embed_tracks + 2}",
-            color=discord.Color.orange()
-        )
-        additional_embed.add_field(
-            name="Tracks List",
-            value="\n".join(track_list[i:i + max_following_embed_tracks]),
-            inline=False
-        )
+    # Formatting tracks as they are streamed in
+    def to_line(item):
+        track = item.get('track')
+        if not track:
+            return None
+        if len(track_list_for_dropdown) < MAX_DROPDOWN_OPTIONS:
+            track_list_for_dropdown.append((track['name'], track['external_urls'].get('spotify')))
+        return f"**{track['name']}** by `{', '.join(artist['name'] for artist in track['artists'])}` | [Link]({track['external_urls'].get('spotify')})\n"
+
+    def render_page(track_list, page_index, start):
+        # First embed with playlist information and initial tracks
+        if page_index == 0:
+            embed = discord.Embed(
+                title=playlist_name,
+                description=f"Playlist by [{owner_name}]({owner_url})\n",
+                color=discord.Color.orange()
+            )
+            embed.add_field(name="Spotify URL", value=playlist_url, inline=False)
+            embed.add_field(name="Followers", value=f"`{follower_count}`", inline=True)
+            embed.add_field(name="Collaborative", value=f"`{is_collaborative}`", inline=True)
+            embed.add_field(name="Tracks", value="\n".join(track_list), inline=False)
+        # Additional embeds for remaining tracks (10 per page)
+        else:
+            embed = discord.Embed(
+                title=f"{playlist_name} (Continued)",
+                description=f"Track List Page {page_index + 1}",
+                color=discord.Color.orange()
+            )
+            embed.add_field(name="Tracks List", value="\n".join(track_list), inline=False)
 
         if playlist_image_url:
-            additional_embed.set_thumbnail(url=playlist_image_url)
-        additional_embed.set_footer(text=f"Requested by {author.display_name}", icon_url=avatar_url)
-
-        # Append each additional embed to the list
-        embeds.append(additional_embed)
+            embed.set_thumbnail(url=playlist_image_url)
+        embed.set_footer(text=f"Requested by {author.display_name}", icon_url=avatar_url)
+        return embed
 
-    return embeds, track_list_for_dropdown
+    pages = StreamedPages(track_pages, to_line, render_page, max_following_embed_tracks, max_first_embed_tracks)
+    return pages, track_list_for_dropdown
 
+@tracing.traced()
 def format_get_user(author, response):
     # Extracting user data from the response
     display_name = response.get("display_name", "Unknown User")
@@ -392,7 +427,20 @@ def format_get_user(author, response):
 
     return embed
 
-def format_get_album(author, response):
+@tracing.traced()
+def format_get_album(author, response, track_pages):
+    """
+    Formats an album into paginated Discord embeds that are rendered on demand.
+
+    Args:
+        author (discord.User): The user requesting the album.
+        response (dict): Album information from the Spotify API.
+        track_pages (async iterator): Yields lists of album track items (see spotifyapi.iter_album_tracks).
+
+    Returns:
+        tuple: StreamedPages provider and list of (track name, track uri) for the track dropdown,
+               filled as tracks are streamed in.
+    """
     # Extract album data
     album_name = response.get("name", "Unknown Album")
     album_url = response["external_urls"]["spotify"]
@@ -402,57 +450,101 @@ def format_get_album(author, response):
     artists = ", ".join(artist["name"] for artist in response["artists"])
     genres = ", ".join(response.get("genres", [])) if response.get("genres") else "N/A"
     popularity = response.get("popularity", "Not available")
+    avatar_url = author.avatar.url if author.avatar else None
 
-    # Prepare track list entries
-    track_list = [
-        f"**{item['name']}** by `{', '.join(artist['name'] for artist in item['artists'])}` | [Link]({item['external_urls']['spotify']})"
-        for item in response["tracks"]["items"]
-    ]
-    track_list_for_dropdown = [(item["name"], item["uri"]) for item in response["tracks"]["items"]]
-
-    # Embed list initialization
-    embeds = []
+    track_list_for_dropdown = []
     max_first_embed_tracks = 4
     max_following_embed_tracks = 6
 
-    # Create the first embed with album information and up to 4 tracks
-    first_embed = discord.Embed(
-        title=album_name,
-        description=f"Album by [{artists}]({response['artists'][0]['external_urls']['spotify']})",
-        color=discord.Color.purple()
-    )
-    first_embed.add_field(name="Spotify URL", value=album_url, inline=False)
-    first_embed.add_field(name="Total Tracks", value=f"`{total_tracks}`", inline=True)
-    first_embed.add_field(name="Release Date", value=f"`{release_date}`", inline=True)
-    first_embed.add_field(name="Genres", value=f"`{genres}`", inline=True)
-    first_embed.add_field(name="Popularity", value=f"`{popularity}/100`", inline=True)
-    first_embed.add_field(name="Tracks List", value="\n\n".join(track_list[:max_first_embed_tracks]), inline=False)
-
-    # Set album cover and footer
-    if album_image_url:
-        first_embed.set_thumbnail(url=album_image_url)
-    avatar_url = author.avatar.url if author.avatar else None
-    first_embed.set_footer(text=f"Requested by {author.display_name}", icon_url=avatar_url)
-    
-    # Add the first embed to the list
-    embeds.append(first_embed)
+    # Prepare track list entries as they are streamed in
+    def to_line(item):
+        if len(track_list_for_dropdown) < MAX_DROPDOWN_OPTIONS:
+            track_list_for_dropdown.append((item["name"], item["uri"]))
+        return f"**{item['name']}** by `{', '.join(artist['name'] for artist in item['artists'])}` | [Link]({item['external_urls']['spotify']})"
+
+    def render_page(track_list, page_index, start):
+        # Create the first embed with album information and up to 4 tracks
+        if page_index == 0:
+            embed = discord.Embed(
+                title=album_name,
+                description=f"Album by [{artists}]({response['artists'][0]['external_urls']['spotify']})",
+                color=discord.Color.purple()
+            )
+            embed.add_field(name="Spotify URL", value=album_url, inline=False)
+            embed.add_field(name="Total Tracks", value=f"`{total_tracks}`", inline=True)
+            embed.add_field(name="Release Date", value=f"`{release_date}`", inline=True)
+            embed.add_field(name="Genres", value=f"`{genres}`", inline=True)
+            embed.add_field(name="Popularity", value=f"`{popularity}/100`", inline=True)
+            embed.add_field(name="Tracks List", value="\n\n".join(track_list), inline=False)
+        # Create additional embeds for remaining tracks, with 6 tracks per embed
+        else:
+            embed = discord.Embed(
+                title=f"{album_name} (Continued)",
+                description=f"Track List Page {page_index + 1}",
+                color=discord.Color.purple()
+            )
+            embed.add_field(name="Tracks List", value="\n\n".join(track_list), inline=False)
 
-    # Create additional embeds for remaining tracks, with 6 tracks per embed
-    for i in range(max_first_embed_tracks, len(track_list), max_following_embed_tracks):
-        embed = discord.Embed(
-            title=f"{album_name} (Continued)",
-            description=f"Track List Page {(i - max_first_embed_tracks) // max_following_embed_tracks + 2}",
-            color=discord.Color.purple()
-        )
-        embed.add_field(name="Tracks List", value="\n\n".join(track_list[i:i + max_following_embed_tracks]), inline=False)
+        # Set album cover and footer
         if album_image_url:
             embed.set_thumbnail(url=album_image_url)
         embed.set_footer(text=f"Requested by {author.display_name}", icon_url=avatar_url)
-        
-        # Add each additional embed to the list
-        embeds.append(embed)
+        return embed
+
+    pages = StreamedPages(track_pages, to_line, render_page, max_following_embed_tracks, max_first_embed_tracks)
+    return pages, track_list_for_dropdown
 
-    return embeds, track_list_for_dropdown
+def listener_count_value(monthly_listener):
+    """
+    Converts a scraped monthly listener figure ("1234567" or a rounded "12.3M") to a number for sorting.
+
+    Returns:
+        float: The figure, or -1 if it is missing.
+    """
+    figure = str(monthly_listener or "").upper().replace(",", "")
+    multiplier = {"K": 1e3, "M": 1e6, "B": 1e9}.get(figure[-1:], 1)
+    try:
+        return float(figure.rstrip("KMB")) * multiplier
+    except ValueError:
+        return -1
+
+@tracing.traced()
+def format_bulk_scrape(author, scope_label, results, elapsed, max_lines=50):
+    """
+    Formats the results of a bulk monthly listener scrape into a single report embed.
+
+    Args:
+        author (discord.User): The user who started the scrape.
+        scope_label (str): Whose saved artists were scraped (e.g. "your", "this server's").
+        results (list[tuple]): (artist name, artist id, monthly listeners, error message) for every artist.
+        elapsed (float): Seconds the scrape took.
+        max_lines (int): Maximum artists listed, the rest are summarised.
+
+    Returns:
+        discord.Embed: The artists sorted by monthly listeners, highest first.
+    """
+    ranked = sorted(results, key=lambda row: listener_count_value(row[2]), reverse=True)
+    failed = sum(1 for row in results if listener_count_value(row[2]) < 0)
+
+    lines = []
+    for index, (name, artist_id, monthly_listener, _) in enumerate(ranked[:max_lines], start=1):
+        value = f"{int(monthly_listener):,}" if str(monthly_listener).isdigit() else (monthly_listener or "N/A")
+        lines.append(f"`{index}.` **{name}** - `{value}`")
+    if len(ranked) > max_lines:
+        lines.append(f"...and {len(ranked) - max_lines} more")
+
+    embed = discord.Embed(
+        title="Monthly Listeners Report",
+        description="\n".join(lines)[:4096],
+        color=discord.Color.green()
+    )
+    embed.add_field(name="Artists", value=f"`{len(results)}` scraped in `{elapsed:.1f}s`", inline=True)
+    if failed:
+        embed.add_field(name="Unavailable", value=f"`{failed}` could not be retrieved", inline=True)
+
+    avatar_url = author.avatar.url if author.avatar else None
+    embed.set_footer(text=f"{scope_label.capitalize()} saved artists - Requested by {author.display_name}", icon_url=avatar_url)
+    return embed
 
 def format_settings(author, data):
     embed = discord.Embed(
@@ -477,6 +569,7 @@ def format_settings(author, data):
     
     return embed
     
+@tracing.traced()
 def format_search_data(author, search_input, data, data_type):
     """
     Formats search results into Discord embeds for artists, albums, playlists, or tracks.
@@ -488,9 +581,8 @@ def format_search_data(author, search_input, data, data_type):
         data_type (str): The type of data being searched (e.g., 'artists', 'albums', 'playlists', 'tracks').
 
     Returns:
-        list[discord.Embed]: A list of embeds containing the search results.
+        ChunkedPages: Page provider rendering each page of results when it is first shown.
     """
-    embeds = []
     chunk_size = 4
     avatar_url = getattr(author.avatar, 'url', None)
 
@@ -545,18 +637,17 @@ def format_search_data(author, search_input, data, data_type):
     # Mapping of data type to appropriate formatting function and data key
     data_type_mapping = {
         "artists": ("artists", "Artist Search Results", discord.Color.pink(), format_artist),
-        "albums": ("items", "Album Search Results", discord.Color.purple(), format_album),
+        "albums": ("albums", "Album Search Results", discord.Color.purple(), format_album),
         "playlists": ("playlists", "Playlist Search Results", discord.Color.orange(), format_playlist),
         "tracks": ("tracks", "Track Search Results", discord.Color.green(), format_track),
     }
 
     data_key, title, color, formatter = data_type_mapping[data_type]
-    items = data[data_key]["items"] if data_type == "artists" else data[data_key]
-    pages = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    items = [item for item in data[data_key]["items"] if item]
 
-    for page_index, page in enumerate(pages, start=1):
+    def render_page(page, page_index, start):
         embed = discord.Embed(
-            title=f"{title} - Page {page_index}",
+            title=f"{title} - Page {page_index + 1}",
             description=f"Results matching `{search_input}`:" if data_type != "albums" else "Here are the albums matching your search.",
             color=color,
         )
@@ -565,6 +656,6 @@ def format_search_data(author, search_input, data, data_type):
             embed.add_field(name=field["name"], value=field["value"], inline=False)
 
         embed.set_footer(text=f"Requested by {author.display_name}", icon_url=avatar_url)
-        embeds.append(embed)
+        return embed
 
-    return embeds
+    return ChunkedPages(items, render_page, chunk_size)
@@ -0,0 +1,364 @@
+#Stores for Saved Artists, Tracks, Playlists and Albums (SQLite or JSON files)
+import asyncio, json, os, sqlite3, time
+from concurrent.futures import ThreadPoolExecutor
+from wrapper.filestore import write_json_atomic
+
+#Saved data types and the key prefix their items use (e.g. {"artist": name, "artist_url": id})
+SAVED_TYPES = ("artists", "tracks", "playlists", "albums")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS saved (
+    user_id    TEXT NOT NULL,
+    type       TEXT NOT NULL,
+    spotify_id TEXT NOT NULL,
+    name       TEXT NOT NULL,
+    saved_at   REAL NOT NULL,
+    PRIMARY KEY (user_id, type, spotify_id)
+);
+CREATE INDEX IF NOT EXISTS saved_by_user ON saved (user_id, type, saved_at, spotify_id);
+CREATE INDEX IF NOT EXISTS saved_by_type ON saved (type, saved_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+def to_item(data_type, spotify_id, name):
+    """
+    Builds a saved item in the format the list and dropdown embeds use.
+    """
+    prefix = data_type.rstrip("s")
+    return {prefix: name, f"{prefix}_url": spotify_id}
+
+class SQLiteSavedStore:
+    """
+    Saved data kept in one SQLite database (WAL mode) instead of a JSON file per type.
+
+    Every query runs on a single dedicated thread, so the event loop never waits on disk
+    and writes are serialised without locking. Saving an item is one indexed insert, so
+    concurrent saves can no longer overwrite each other. On first open, the existing
+    saved<type>.json files are imported once (the files are left in place). Files that
+    could not be read are logged and tried again on the next open.
+
+    Args:
+        path (str): SQLite database file.
+        json_dir (str, optional): Folder holding the saved<type>.json files to migrate.
+    """
+    def __init__(self, path, json_dir=None):
+        self.path = path
+        self.json_dir = json_dir
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="savedstore")
+        self._conn = None
+
+    #================Connection================
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            self._migrate_json()
+        return self._conn
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(self._connect(), *args))
+
+    def _migrate_json(self):
+        conn = self._conn
+        if self.json_dir is None or conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+
+        rows = []
+        skipped = []
+        order = time.time()
+        for data_type in SAVED_TYPES:
+            file_path = os.path.join(self.json_dir, f"saved{data_type}.json")
+            prefix = data_type.rstrip("s")
+            file_rows = []
+            try:
+                with open(file_path, "r") as file:
+                    presaved_data = json.load(file)
+                for user_id, items in presaved_data.items():
+                    for item in items:
+                        # Keep the original order of each list
+                        order += 1e-6
+                        file_rows.append((str(user_id), data_type, item[f"{prefix}_url"], item[prefix], order))
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as err:
+                print(f"Error reading saved{data_type}.json ({err}), it was not migrated.")
+                skipped.append(data_type)
+                continue
+            except (AttributeError, KeyError, TypeError) as err:
+                print(f"Unexpected item format in saved{data_type}.json ({err!r}), it was not migrated.")
+                skipped.append(data_type)
+                continue
+            rows.extend(file_rows)
+
+        with conn:
+            imported = conn.executemany("INSERT OR IGNORE INTO saved VALUES (?, ?, ?, ?, ?)", rows).rowcount
+            # Only a clean import is final: skipped files are tried again on the next start
+            # (items that were already imported are ignored then)
+            if not skipped:
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('json_migrated', ?)", (str(time.time()),))
+        if imported > 0:
+            print(f"Migrated {imported} saved items from JSON into {self.path}")
+        if skipped:
+            print(f"JSON migration incomplete, skipped: {', '.join(f'saved{data_type}.json' for data_type in skipped)}. It is retried on the next start.")
+
+    #================Queries================
+    async def add(self, user_id, data_type, spotify_id, name):
+        """
+        Saves an item for a user.
+
+        Returns:
+            bool: False if the user had already saved it.
+        """
+        def insert(conn):
+            with conn:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO saved VALUES (?, ?, ?, ?, ?)",
+                    (str(user_id), data_type, spotify_id, name, time.time())
+                )
+            return cursor.rowcount == 1
+        return await self._run(insert)
+
+    async def page_user(self, user_id, data_type, cursor=None, limit=25):
+        """
+        Returns one page of a user's saved items of one type, oldest first.
+
+        Pages are read with a (saved_at, spotify_id) cursor on the per-user index, so the
+        cost of a page does not depend on how many items the user or the bot has.
+
+        Args:
+            cursor (tuple, optional): Cursor returned with the previous page, None for the first page.
+            limit (int): Items per page.
+
+        Returns:
+            tuple: (list of items, cursor of the next page or None if this was the last one)
+        """
+        def select(conn):
+            if cursor is None:
+                rows = conn.execute(
+                    "SELECT spotify_id, name, saved_at FROM saved WHERE user_id = ? AND type = ? "
+                    "ORDER BY saved_at, spotify_id LIMIT ?",
+                    (str(user_id), data_type, limit + 1)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT spotify_id, name, saved_at FROM saved WHERE user_id = ? AND type = ? "
+                    "AND (saved_at, spotify_id) > (?, ?) ORDER BY saved_at, spotify_id LIMIT ?",
+                    (str(user_id), data_type, cursor[0], cursor[1], limit + 1)
+                ).fetchall()
+            page = rows[:limit]
+            next_cursor = (page[-1][2], page[-1][0]) if len(rows) > limit else None
+            return [to_item(data_type, spotify_id, name) for spotify_id, name, _ in page], next_cursor
+        return await self._run(select)
+
+    async def item_at(self, user_id, data_type, position):
+        """
+        Returns the user's saved item at a 0-based position of their list, or None.
+        """
+        def select(conn):
+            row = conn.execute(
+                "SELECT spotify_id, name FROM saved WHERE user_id = ? AND type = ? "
+                "ORDER BY saved_at, spotify_id LIMIT 1 OFFSET ?",
+                (str(user_id), data_type, position)
+            ).fetchone()
+            return to_item(data_type, *row) if row else None
+        return await self._run(select)
+
+    async def list_for_users(self, user_ids, data_type):
+        """
+        Returns the distinct items of one type saved by any of the given users.
+
+        Returns:
+            dict: Spotify ID mapped to its saved name.
+        """
+        user_ids = [str(user_id) for user_id in user_ids]
+        def select(conn):
+            items = {}
+            # Look the users up on the per-user index, a few hundred at a time
+            for start in range(0, len(user_ids), 500):
+                chunk = user_ids[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT spotify_id, name FROM saved WHERE type = ? AND user_id IN ({', '.join('?' * len(chunk))}) "
+                    "ORDER BY saved_at",
+                    (data_type, *chunk)
+                ).fetchall()
+                for spotify_id, name in rows:
+                    items.setdefault(spotify_id, name)
+            return items
+        return await self._run(select)
+
+    async def close(self):
+        def close_conn():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        await asyncio.get_running_loop().run_in_executor(self._executor, close_conn)
+        self._executor.shutdown(wait=False)
+
+class JSONSavedStore:
+    """
+    Saved data kept in the saved_data/saved<type>.json files, with the files only read once.
+
+    Each file is loaded into memory on first use, alongside a set of saved IDs per user so
+    duplicate checks do not scan the user's list. Changes are written behind: a burst of
+    saves marks the type dirty and results in one write `write_delay` seconds later. Every
+    write goes to a temp file that is fsynced and then renamed over the original, so a crash
+    leaves either the old or the new file, never a partial one.
+
+    Args:
+        json_dir (str): Folder holding the saved<type>.json files.
+        write_delay (float): Seconds to collect changes before writing a file.
+    """
+    def __init__(self, json_dir, write_delay=2.0):
+        self.json_dir = json_dir
+        self.write_delay = write_delay
+        self._data = {}
+        self._ids = {}
+        self._load_lock = asyncio.Lock()
+        self._dirty = set()
+        self._flush_handle = None
+        self._flush_task = None
+        self.writes = 0
+
+    def _file_path(self, data_type):
+        return os.path.join(self.json_dir, f"saved{data_type}.json")
+
+    #================Loading================
+    def _read_file(self, data_type):
+        try:
+            with open(self._file_path(data_type), "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            print(f"saved{data_type}.json not found, starting with an empty list.")
+            return {}
+        except json.JSONDecodeError:
+            print(f"Error decoding saved{data_type}.json. Check if the file is correctly formatted.")
+            return {}
+
+    async def _load(self, data_type):
+        if data_type in self._data:
+            return self._data[data_type]
+        async with self._load_lock:
+            if data_type not in self._data:
+                presaved_data = await asyncio.to_thread(self._read_file, data_type)
+                url_key = f"{data_type.rstrip('s')}_url"
+                self._ids[data_type] = {
+                    user_id: {item[url_key] for item in items} for user_id, items in presaved_data.items()
+                }
+                self._data[data_type] = presaved_data
+        return self._data[data_type]
+
+    #================Write-behind================
+    def _write_file(self, data_type, presaved_data):
+        write_json_atomic(self._file_path(data_type), presaved_data, indent=4)
+
+    def _mark_dirty(self, data_type):
+        self._dirty.add(data_type)
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.write_delay, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self.flush())
+        else:
+            # A write is still running, pick the new changes up after it
+            self._flush_handle = asyncio.get_running_loop().call_later(self.write_delay, self._start_flush)
+
+    async def flush(self):
+        """
+        Writes every changed file now.
+        """
+        dirty, self._dirty = self._dirty, set()
+        for data_type in dirty:
+            # Snapshot on the loop so the writer thread never sees a list being changed
+            snapshot = {user_id: list(items) for user_id, items in self._data[data_type].items()}
+            try:
+                await asyncio.to_thread(self._write_file, data_type, snapshot)
+                self.writes += 1
+            except OSError as err:
+                # Keep the type dirty and schedule another attempt, or it would wait for an unrelated save
+                print(f"Error saving {data_type}: {err}, retrying in {self.write_delay}s")
+                self._mark_dirty(data_type)
+
+    #================Queries================
+    async def add(self, user_id, data_type, spotify_id, name):
+        presaved_data = await self._load(data_type)
+        user_id = str(user_id)
+        user_ids = self._ids[data_type].setdefault(user_id, set())
+        if spotify_id in user_ids:
+            return False
+
+        user_ids.add(spotify_id)
+        presaved_data.setdefault(user_id, []).append(to_item(data_type, spotify_id, name))
+        self._mark_dirty(data_type)
+        return True
+
+    async def page_user(self, user_id, data_type, cursor=None, limit=25):
+        # Lists are append-only, so the cursor is simply the position of the next item
+        items = (await self._load(data_type)).get(str(user_id), [])
+        start = cursor or 0
+        next_cursor = start + limit if start + limit < len(items) else None
+        return items[start:start + limit], next_cursor
+
+    async def item_at(self, user_id, data_type, position):
+        items = (await self._load(data_type)).get(str(user_id), [])
+        return items[position] if 0 <= position < len(items) else None
+
+    async def list_for_users(self, user_ids, data_type):
+        presaved_data = await self._load(data_type)
+        prefix = data_type.rstrip("s")
+        items = {}
+        for user_id in user_ids:
+            for item in presaved_data.get(str(user_id), []):
+                items.setdefault(item[f"{prefix}_url"], item[prefix])
+        return items
+
+    async def close(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        await self.flush()
+        # The loop is shutting down, a retry scheduled by a failed final write would never run
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+async def iter_saved_pages(user_id, data_type, page_size=25):
+    """
+    Yields a user's saved items of one type page by page from the shared store.
+    """
+    cursor = None
+    while True:
+        items, cursor = await get_saved_store().page_user(user_id, data_type, cursor, page_size)
+        if items:
+            yield items
+        if cursor is None:
+            return
+
+#Shared store used by the command handlers
+SAVED_STORE = None
+
+def set_saved_store(store):
+    global SAVED_STORE
+    SAVED_STORE = store
+    return SAVED_STORE
+
+def get_saved_store():
+    global SAVED_STORE
+    if SAVED_STORE is None:
+        root_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        saved_folder = os.path.join(root_folder, "saved_data")
+        SAVED_STORE = SQLiteSavedStore(os.path.join(saved_folder, "saved.db"), json_dir=saved_folder)
+    return SAVED_STORE
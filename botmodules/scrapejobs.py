@@ -0,0 +1,186 @@
+#Background Queue for Web Scrapes
+import asyncio, contextvars
+
+class ScrapeJob:
+    """
+    A queued scrape. Its result is a (value, msg) tuple like the scrape functions return.
+
+    Callbacks registered with then() run once the scrape finishes, fails or times out,
+    which is how commands patch an already sent embed with the scraped figure. A job whose
+    reply was abandoned can be cancelled, which skips it if still queued or stops the
+    running scrape.
+    """
+    def __init__(self, name, scrape, args, timeout, default):
+        self.name = name
+        self.scrape = scrape
+        self.args = args
+        self.timeout = timeout
+        self.default = default
+        self.future = asyncio.get_running_loop().create_future()
+        # The scrape runs in the submitter's context, so it shows up in that command's trace
+        self.context = contextvars.copy_context()
+        self.cancelled = False
+        self._callbacks = []
+        self._task = None
+
+    def done(self):
+        return self.future.done()
+
+    def result(self):
+        return self.future.result()
+
+    async def wait(self):
+        return await asyncio.shield(self.future)
+
+    def then(self, callback):
+        """
+        Runs `callback(result)` (a coroutine function) when the job completes.
+        If it already completed, the callback is scheduled right away.
+        """
+        if self.done():
+            _start_callback(self, callback)
+        else:
+            self._callbacks.append(callback)
+
+    def cancel(self):
+        """
+        Abandons the job. Its callbacks are not run.
+        """
+        if self.done():
+            return
+        self.cancelled = True
+        self._callbacks.clear()
+        if self._task is not None:
+            self._task.cancel()
+
+    def _finish(self, result):
+        if not self.future.done():
+            self.future.set_result(result)
+        callbacks, self._callbacks = self._callbacks, []
+        return callbacks
+
+async def _run_callback(job, callback):
+    try:
+        await callback(job.result())
+    except Exception as err:
+        print(f"Scrape job '{job.name}' callback failed: {err}")
+
+#Running callback tasks, referenced until done so they are not garbage collected mid-flight
+CALLBACK_TASKS = set()
+
+def _start_callback(job, callback):
+    task = asyncio.create_task(_run_callback(job, callback))
+    CALLBACK_TASKS.add(task)
+    task.add_done_callback(CALLBACK_TASKS.discard)
+
+class ScrapeJobQueue:
+    """
+    Runs web scrapes on a fixed number of background workers so commands can reply with the
+    API data first and fill in scraped fields once they arrive.
+
+    Args:
+        workers (int): Scrapes run at once, usually the size of the browser page pool.
+        max_pending (int): Jobs allowed to wait in the queue before new ones are refused.
+        timeout (float): Seconds a single scrape may take.
+    """
+    def __init__(self, workers=2, max_pending=100, timeout=30):
+        self.workers = workers
+        self.timeout = timeout
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self._workers = []
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+    def _ensure_workers(self):
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.workers:
+            # Workers outlive the command that started them, give them a context of their own
+            self._workers.append(asyncio.create_task(self._worker(), context=contextvars.Context()))
+
+    def submit(self, scrape, *args, name="scrape", default=("N/A", None)):
+        """
+        Queues a scrape.
+
+        Args:
+            scrape (callable): Coroutine function returning (value, msg).
+            *args: Arguments passed to scrape.
+            name (str): Label used in logs.
+            default (tuple): Value used if the scrape fails or times out.
+
+        Returns:
+            ScrapeJob: The queued job. If the queue is full, the job is already completed with an error message.
+        """
+        job = ScrapeJob(name, scrape, args, self.timeout, default)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            job._finish((default[0], "Scraper is busy, please try again later"))
+            return job
+
+        self._ensure_workers()
+        return job
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            if job.cancelled:
+                self.cancelled += 1
+                job._finish((job.default[0], "Request was cancelled"))
+                self._queue.task_done()
+                continue
+
+            job._task = asyncio.create_task(job.scrape(*job.args), context=job.context)
+            try:
+                result = await asyncio.wait_for(job._task, job.timeout)
+                self.completed += 1
+            except asyncio.CancelledError:
+                if not job.cancelled:
+                    raise
+                result = (job.default[0], "Request was cancelled")
+                self.cancelled += 1
+            except asyncio.TimeoutError:
+                result = (job.default[0], "Request timed out")
+                self.failed += 1
+            except Exception as err:
+                result = (job.default[0], f"Unexpected Error Occurred: {err}")
+                self.failed += 1
+                print(f"Scrape job '{job.name}' failed: {err}")
+            finally:
+                self._queue.task_done()
+
+            # Callbacks edit Discord messages, run them aside so the worker moves on to the next scrape
+            for callback in job._finish(result):
+                _start_callback(job, callback)
+
+    def stats(self):
+        return {
+            "pending": self._queue.qsize(),
+            "workers": len(self._workers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled
+        }
+
+    async def close(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+#Shared queue used by the command handlers
+SCRAPE_JOBS = None
+
+def set_scrape_jobs(queue):
+    global SCRAPE_JOBS
+    SCRAPE_JOBS = queue
+    return SCRAPE_JOBS
+
+def get_scrape_jobs():
+    global SCRAPE_JOBS
+    if SCRAPE_JOBS is None:
+        SCRAPE_JOBS = ScrapeJobQueue()
+    return SCRAPE_JOBS
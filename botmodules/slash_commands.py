@@ -1,12 +1,14 @@
 import discord
 from botmodules import commands as b_commands  
+from wrapper.authorizer import get_token_manager
 from discord.ui import Select, View
 
-ACCESS_TOKEN = ""
+#Slash commands ask the token manager on every call, so a refreshed token is picked up right away
+async def current_token():
+    return await get_token_manager().get_token()
 
-async def setup_slash_commands(token, bot):
+async def setup_slash_commands(bot):
     tree = discord.app_commands.CommandTree(bot)
-    ACCESS_TOKEN = token
 
     # Use unique function names for each command
     @tree.command(name="ping", description="Pings Statisfy")
@@ -38,76 +40,86 @@ async def setup_slash_commands(token, bot):
     @discord.app_commands.describe(id="Enter the Artist URI, URL, or Artist ID:")
     async def get_artist_byid_command(interaction: discord.Interaction, id: str):    
         author = interaction.user
-        await b_commands.get(interaction, author, bot, "artists", id, ACCESS_TOKEN)
+        await b_commands.get(interaction, author, bot, "artists", id, await current_token())
         
     @tree.command(name="get_artist_saved", description="Retrieve info of Saved Artists")
     async def get_artist_saved_command(interaction: discord.Interaction):
         author = interaction.user
-        await b_commands.get(interaction, author, bot, "artists", "saved", ACCESS_TOKEN)
+        await b_commands.get(interaction, author, bot, "artists", "saved", await current_token())
         
     @tree.command(name="get_track_saved", description="Retrieve info of Saved Tracks")
     async def get_track_saved_command(interaction: discord.Interaction):
         author = interaction.user
-        await b_commands.get(interaction, author, bot, "tracks", "saved", ACCESS_TOKEN)
+        await b_commands.get(interaction, author, bot, "tracks", "saved", await current_token())
         
     @tree.command(name="get_playlist_saved", description="Retrieve info of Saved Playlists")
     async def get_playlist_saved_command(interaction: discord.Interaction):
         author = interaction.user
-        await b_commands.get(interaction, author, bot, "playlists", "saved", ACCESS_TOKEN)
+        await b_commands.get(interaction, author, bot, "playlists", "saved", await current_token())
         
     @tree.command(name="get_album_saved", description="Retrieve info of Saved Albums")
     async def get_playlist_saved_command(interaction: discord.Interaction):
         author = interaction.user
-        await b_commands.get(interaction, author, bot, "albums", "saved", ACCESS_TOKEN)
+        await b_commands.get(interaction, author, bot, "albums", "saved", await current_token())
     
     @tree.command(name="get_track_byid", description="Search and Retrieve Track by URI code")
     @discord.app_commands.describe(id="Enter the Track URI, URL, or ID:")
     async def get_track_byid_command(interaction: discord.Interaction, id: str):    
         author = interaction.user
-        await b_commands.get(interaction, author, bot, "tracks", id, ACCESS_TOKEN)
+        await b_commands.get(interaction, author, bot, "tracks", id, await current_token())
         
     @tree.command(name="get_playlist_byid", description="Search and Retrieve Public Playlist by URI code")
     @discord.app_commands.describe(id="Enter the Playlist URI, URL, or ID:")
     async def get_playlist_byid_command(interaction: discord.Interaction, id: str):    
         author = interaction.user
-        await b_commands.get(interaction, author, bot, "playlists", id, ACCESS_TOKEN)
+        await b_commands.get(interaction, author, bot, "playlists", id, await current_token())
         
     @tree.command(name="get_album_byid", description="Search and Retrieve Track by URI code")
     @discord.app_commands.describe(id="Enter the Track URI, URL, or ID:")
     async def get_album_byid_command(interaction: discord.Interaction, id: str):    
         author = interaction.user
-        await b_commands.get(interaction, author, bot, "albums", id, ACCESS_TOKEN)
+        await b_commands.get(interaction, author, bot, "albums", id, await current_token())
 
     @tree.command(name="get_user_byid", description="Search and Retrieve Track by URI code")
     @discord.app_commands.describe(id="Enter the Track URI, URL, or ID:")
     async def get_album_byid_command(interaction: discord.Interaction, id: str):    
         author = interaction.user
-        await b_commands.get(interaction, author, bot, "users", id, ACCESS_TOKEN)
+        await b_commands.get(interaction, author, bot, "users", id, await current_token())
         
     @tree.command(name="save_artist_byid", description="Save Artist by URI code")
     @discord.app_commands.describe(id="Enter the Artist URI, URL, or ID:")
     async def save_artist_byid_command(interaction: discord.Interaction, id: str):    
         author = interaction.user
-        await b_commands.save(interaction, author, "artists", id, ACCESS_TOKEN)
+        await b_commands.save(interaction, author, "artists", id, await current_token())
         
     @tree.command(name="save_album_byid", description="Save Album by URI code")
     @discord.app_commands.describe(id="Enter the Artist URI, URL, or ID:")
     async def save_album_byid_command(interaction: discord.Interaction, id: str):    
         author = interaction.user
-        await b_commands.save(interaction, author, "albums", id, ACCESS_TOKEN)
+        await b_commands.save(interaction, author, "albums", id, await current_token())
         
     @tree.command(name="save_track_byid", description="Save Track by URI code")
     @discord.app_commands.describe(id="Enter the Artist URI, URL, or ID:")
     async def save_track_byid_command(interaction: discord.Interaction, id: str):    
         author = interaction.user
-        await b_commands.save(interaction, author, "tracks", id, ACCESS_TOKEN)
+        await b_commands.save(interaction, author, "tracks", id, await current_token())
         
     @tree.command(name="save_playlist_byid", description="Save Playlist by URI code")
     @discord.app_commands.describe(id="Enter the Artist URI, URL, or ID:")
     async def save_playlist_byid_command(interaction: discord.Interaction, id: str):    
         author = interaction.user
-        await b_commands.save(interaction, author, "playlists", id, ACCESS_TOKEN)
+        await b_commands.save(interaction, author, "playlists", id, await current_token())
         
+    @tree.command(name="bulk_scrape", description="Rank the Monthly Listeners of Saved Artists")
+    @discord.app_commands.describe(scope="Whose saved artists to scrape")
+    @discord.app_commands.choices(scope=[
+        discord.app_commands.Choice(name="Mine", value="me"),
+        discord.app_commands.Choice(name="This Server", value="server")
+    ])
+    async def bulk_scrape_command(interaction: discord.Interaction, scope: str = "me"):
+        author = interaction.user
+        await b_commands.bulkscrape(interaction, author, scope)
+
     @tree.command(name='sync_slashcommands', description='Owner only')
     async def sync(interaction: discord.Interaction):
         if interaction.user.guild_permissions.administrator:
@@ -1,172 +1,400 @@
-import aiohttp, time
+import aiohttp, asyncio, re, time
+from wrapper import ratelimiter, metrics, tracing
+from wrapper.cache import EntityCache
+from wrapper.batcher import BatchLoader
+from urllib.parse import urlsplit, parse_qsl
+from wrapper.ratelimiter import PRIORITY_BACKGROUND, request_priority
 
 web_endpoint = "https://api.spotify.com"
 auth_endpoint = "https://accounts.spotify.com/api/token"
 
+#Multi-ID endpoints: entity type -> (path, response key, max IDs per request)
+BATCH_ENDPOINTS = {
+    "artist": ("/v1/artists", "artists", 50),
+    "track": ("/v1/tracks", "tracks", 50),
+    "album": ("/v1/albums", "albums", 20)
+}
+
+#Only well-formed IDs are joined into an ids= list, anything else could add or split entries of the batch
+SPOTIFY_ID = re.compile(r"[0-9A-Za-z]{22}")
+
+def is_spotify_id(value):
+    return isinstance(value, str) and SPOTIFY_ID.fullmatch(value) is not None
+
+#================Pooled HTTP Client================
+class SpotifyClient:
+    """
+    Long-lived HTTP client for the Spotify Web API.
+
+    Owns a single aiohttp session so every request reuses pooled keep-alive
+    connections and cached DNS lookups instead of paying for a new TCP/TLS
+    handshake per call. The session is created lazily on first use so the
+    client can be constructed before the event loop is running.
+
+    Args:
+        base_url (str): Root of the Web API. Point this at a local mock server for testing.
+        auth_url (str): Token endpoint used by generate_token.
+        limit (int): Maximum number of open connections across all hosts.
+        limit_per_host (int): Maximum number of open connections per host.
+        dns_ttl (int): Seconds to cache DNS lookups for.
+        keepalive_timeout (float): Seconds an idle connection is kept open.
+        total_timeout (float): Overall timeout for a single request in seconds.
+        connect_timeout (float): Timeout for acquiring and opening a connection in seconds.
+        scheduler (ratelimiter.RequestScheduler, optional): Rate limiter every API call goes through.
+        max_retries (int): How many times a request answered with 429 is retried after Retry-After.
+        max_retry_wait (float): Longest Retry-After in seconds the client will wait out before giving up.
+        cache (EntityCache, optional): Cache for entity lookups made through get_entity.
+        batch_window (float): Seconds concurrent artist, track and album lookups are collected for
+                              before being sent as one multi-ID request. 0 disables batching.
+        token_provider (authorizer.TokenManager, optional): Asked for a new token when a request is
+                                                            answered with 401, the request is then retried once.
+    """
+    def __init__(self, base_url=web_endpoint, auth_url=auth_endpoint, limit=100, limit_per_host=20,
+                 dns_ttl=300, keepalive_timeout=30, total_timeout=15, connect_timeout=5,
+                 scheduler=None, max_retries=2, max_retry_wait=30, cache=None, batch_window=0.01,
+                 token_provider=None):
+        self.base_url = base_url.rstrip("/")
+        self.auth_url = auth_url
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+        self.scheduler = scheduler or ratelimiter.RequestScheduler()
+        self.max_retries = max_retries
+        self.max_retry_wait = max_retry_wait
+        self.cache = cache if cache is not None else EntityCache()
+        self.token_provider = token_provider
+        self.loaders = {}
+        if batch_window > 0:
+            for entity_type, (path, key, max_ids) in BATCH_ENDPOINTS.items():
+                fetch_many = lambda ids, token, priority, path=path, key=key: self.get_many(path, key, ids, token, priority)
+                self.loaders[entity_type] = BatchLoader(fetch_many, max_ids, batch_window)
+        self._session = None
+
+    @property
+    def closed(self):
+        return self._session is None or self._session.closed
+
+    def _get_session(self):
+        if self.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def close(self):
+        """
+        Closes the underlying session and releases all pooled connections.
+        """
+        if not self.closed:
+            await self._session.close()
+        self._session = None
+
+    async def get(self, path, token, params=None, priority=None):
+        """
+        Sends an authorized GET request to the Web API through the rate limiter.
+
+        A 429 response pauses the scheduler for the Retry-After period and the request is
+        retried up to max_retries times. A 401 response (token expired or revoked) makes the
+        token provider refresh the token, and the request is retried once with the new one.
+
+        Args:
+            path (str): Endpoint path relative to base_url (e.g., "/v1/artists/<id>").
+            token (str): Spotify API access token.
+            params (dict, optional): Query string parameters.
+            priority (int, optional): Scheduler lane, defaults to the request_priority context variable.
+
+        Returns:
+            tuple: (response json or None, status code)
+        """
+        with tracing.span("spotify_get", endpoint=metrics.endpoint_label(path)) as request_span:
+            data, status = await self._send_get(path, token, params, priority)
+            if status == 401 and self.token_provider is not None:
+                new_token = await self.token_provider.refresh(stale_token=token)
+                if new_token and new_token != token:
+                    data, status = await self._send_get(path, new_token, params, priority)
+            if request_span is not None:
+                request_span.set(status=status)
+        return data, status
+
+    async def _send_get(self, path, token, params, priority):
+        headers = {
+            "Authorization": f"Bearer {token}"
+        }
+        session = self._get_session()
+        endpoint = metrics.endpoint_label(path)
+
+        for attempt in range(self.max_retries + 1):
+            with tracing.span("rate_limiter"):
+                await self.scheduler.acquire(priority)
+            start = time.perf_counter()
+            async with session.get(f"{self.base_url}{path}", headers=headers, params=params) as response:
+                body = await response.read()
+                metrics.observe_spotify_request(endpoint, response.status, len(body), time.perf_counter() - start)
+                if response.status == 200:
+                    data = await response.json()
+                    return data, response.status
+                if response.status != 429:
+                    return None, response.status
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+            self.scheduler.block_for(retry_after)
+            print(f"Spotify rate limit reached, pausing API requests for {retry_after}s")
+            if retry_after > self.max_retry_wait:
+                break
+
+        return None, 429
+
+    async def get_entity(self, entity_type, entity_id, path, token):
+        """
+        Same as get, but successful responses are served from and stored in the entity cache.
+        Artist, track and album lookups with a well-formed ID are coalesced onto their multi-ID
+        endpoint, any other ID is sent as a single request.
+
+        Args:
+            entity_type (str): Cache namespace, decides the TTL (e.g., "artist", "album").
+            entity_id (str): Spotify ID of the entity.
+            path (str): Endpoint path relative to base_url.
+            token (str): Spotify API access token.
+
+        Returns:
+            tuple: (response json or None, status code)
+        """
+        with tracing.span("spotify_entity", entity=entity_type) as entity_span:
+            data = self.cache.get(entity_type, entity_id)
+            if entity_span is not None:
+                entity_span.set(cached=data is not None)
+            if data is not None:
+                return data, 200
+
+            loader = self.loaders.get(entity_type)
+            if loader is not None and is_spotify_id(entity_id):
+                data, status = await loader.load(entity_id, token)
+            else:
+                data, status = await self.get(path, token)
+            if data is not None and status == 200:
+                self.cache.set(entity_type, entity_id, data)
+            return data, status
+
+    async def get_many(self, path, key, ids, token, priority=None):
+        """
+        Fetches several entities with one request to a multi-ID endpoint (e.g., /v1/artists?ids=).
+
+        Results are matched to the requested IDs by their "id", never by position, so an item
+        missing from or added to the response cannot be handed to the wrong caller.
+        Spotify rejects the whole batch with 400 if any ID is malformed, in which case the IDs
+        are looked up one by one so every caller still gets its own status code.
+
+        Args:
+            path (str): Multi-ID endpoint path.
+            key (str): Key of the result list in the response.
+            ids (list[str]): Spotify IDs, no more than the endpoint's limit.
+            token (str): Spotify API access token.
+            priority (int, optional): Scheduler lane.
+
+        Returns:
+            dict: Spotify ID -> (response json or None, status code). Unknown IDs get status 404.
+        """
+        data, status = await self.get(path, token, params={"ids": ",".join(ids)}, priority=priority)
+        if data is not None and status == 200:
+            found = {item.get("id"): item for item in data.get(key) or [] if item}
+            return {
+                entity_id: (found[entity_id], 200) if entity_id in found else (None, 404)
+                for entity_id in ids
+            }
+
+        if status == 400 and len(ids) > 1:
+            results = await asyncio.gather(*(self.get(f"{path}/{entity_id}", token, priority=priority) for entity_id in ids))
+            return dict(zip(ids, results))
+
+        return {entity_id: (None, status) for entity_id in ids}
+
+    async def post_form(self, url, data):
+        """
+        Sends a form-encoded POST request, used for the token endpoint.
+
+        Returns:
+            tuple: (response json or error text, status code)
+        """
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+        session = self._get_session()
+        start = time.perf_counter()
+        async with session.post(url, headers=headers, data=data) as response:
+            body = await response.read()
+            metrics.observe_spotify_request(urlsplit(url).path, response.status, len(body), time.perf_counter() - start)
+            if response.status == 200:
+                return await response.json(), response.status
+            return await response.text(), response.status
+
+def parse_retry_after(value, default=1.0):
+    """
+    Converts a Retry-After header (delay in seconds) to a float, falling back to default.
+    """
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+#Shared client used by the module level request functions
+CLIENT = None
+
+def set_client(client):
+    global CLIENT
+    CLIENT = client
+    return CLIENT
+
+def get_client():
+    global CLIENT
+    if CLIENT is None:
+        CLIENT = SpotifyClient()
+    return CLIENT
+
+def scheduler_stats():
+    return get_client().scheduler.stats()
+
+def cache_stats():
+    return get_client().cache.stats()
+
+#================Pooled HTTP Client================
+
+#================Pagination================
+async def iter_pages(path, token, first_page, page_size, concurrency=4):
+    """
+    Streams every page of a Spotify paging object, starting with one already fetched.
+
+    When the paging object reports its total, the remaining offsets are computed and up to
+    `concurrency` pages are fetched at once, still yielded in order. The page the consumer
+    waits for is requested in the caller's scheduler lane, pages read ahead of it in the
+    background lane, so read-ahead never holds up interactive requests. Otherwise the `next`
+    links are followed one by one. Only a handful of pages are held in memory at a time.
+
+    Args:
+        path (str): Endpoint path of the paged collection (e.g., "/v1/playlists/<id>/tracks").
+        token (str): Spotify API access token.
+        first_page (dict): Paging object returned inside the parent entity.
+        page_size (int): Items requested per page (maximum allowed by the endpoint).
+        concurrency (int): Pages fetched in parallel when offsets can be computed.
+
+    Yields:
+        list: The items of each page.
+    """
+    client = get_client()
+    yield first_page.get("items", [])
+
+    total = first_page.get("total")
+    offset = first_page.get("offset", 0) + len(first_page.get("items", []))
+    next_url = first_page.get("next")
+
+    if total is not None:
+        offsets = iter(range(offset, total, page_size))
+        window = []
+
+        def schedule(priority=PRIORITY_BACKGROUND):
+            for next_offset in offsets:
+                params = {"offset": next_offset, "limit": page_size}
+                window.append(asyncio.create_task(client.get(path, token, params=params, priority=priority)))
+                return
+
+        try:
+            schedule(request_priority.get())
+            for _ in range(concurrency - 1):
+                schedule()
+            while window:
+                data, status = await window.pop(0)
+                if data is None:
+                    print(f"Stopped paging {path}, request failed with status code {status}")
+                    return
+                schedule()
+                yield data.get("items", [])
+        finally:
+            for task in window:
+                task.cancel()
+        return
+
+    while next_url:
+        url = urlsplit(next_url)
+        data, status = await client.get(url.path, token, params=dict(parse_qsl(url.query)))
+        if data is None:
+            print(f"Stopped paging {path}, request failed with status code {status}")
+            return
+        next_url = data.get("next")
+        yield data.get("items", [])
+
+def iter_playlist_tracks(playlist_id, token, first_page):
+    return iter_pages(f"/v1/playlists/{playlist_id}/tracks", token, first_page, page_size=100)
+
+def iter_album_tracks(album_id, token, first_page):
+    return iter_pages(f"/v1/albums/{album_id}/tracks", token, first_page, page_size=50)
+
+#================Pagination================
+
 #API Req #1: Generate Token
 async def generate_token(c_id, c_secret):
-    global auth_endpoint
+    client = get_client()
     #Set Parameters
-    headers = {
-        'Content-Type': 'application/x-www-form-urlencoded'
-    }
     data = {
         'grant_type': 'client_credentials',
         'client_id': c_id,
         'client_secret': c_secret
     }
     #Send token geneeration request
-    try: 
-        print(f"Requesting token from {auth_endpoint}...")
-        async with aiohttp.ClientSession() as session:
-            async with session.post(auth_endpoint, headers = headers, data = data) as response:
-                if response.status == 200:
-                    r = await response.json()
-                    token = r['access_token']
-                    expiry = int(time.time()) + r['expires_in']
-                    return token, expiry, response.status, None
-
-                error = await response.text()
-                print(f"API Request Failed. See Spotify API reference page for details.")
-                return None, None, response.status, error
+    try:
+        print(f"Requesting token from {client.auth_url}...")
+        r, status = await client.post_form(client.auth_url, data)
+        if status == 200:
+            token = r['access_token']
+            expiry = int(time.time()) + r['expires_in']
+            return token, expiry, status, None
+
+        print(f"API Request Failed. See Spotify API reference page for details.")
+        return None, None, status, r
     except aiohttp.ClientError as clienterror:
         print(f"Encountered Client Side Error: {clienterror}")
         return None, None, 500, str(clienterror)
-    
+
     except Exception as e:
         print(f"Encountered Unexpected Error: {e}")
-        return None, None, response.status, str(e)
+        return None, None, 500, str(e)
 
 #API Req #2: Get Artist
 async def request_artist_info(artisturi, token):
-    global web_endpoint
-    url = f"{web_endpoint}/v1/artists/{artisturi}"
-    headers = {
-        "Authorization": f"Bearer {token}"
-    }
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                return data, response.status
-            return None, response.status
+    return await get_client().get_entity("artist", artisturi, f"/v1/artists/{artisturi}", token)
 
 #API Req #3: Get Artist Top Track
 async def request_artist_toptracks(artisturi, token):
-    global web_endpoint
-    url = f"{web_endpoint}/v1/artists/{artisturi}/top-tracks"
-    headers = {
-        "Authorization": f"Bearer {token}"
-    }
-    
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers = headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                return data, response.status
-            return None, response.status
-        
+    return await get_client().get_entity("artist_toptracks", artisturi, f"/v1/artists/{artisturi}/top-tracks", token)
+
 #API Req #4: Get List of Tracks inside an Album
 async def request_album_tracklist(albumid, token):
-    global web_endpoint
-    url = f"{web_endpoint}/v1/albums/{albumid}/tracks"
-    headers = {
-        "Authorization": f"Bearer {token}"
-    }
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers = headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                return data, response.status
-            return None, response.status
+    return await get_client().get_entity("album_tracks", albumid, f"/v1/albums/{albumid}/tracks", token)
 
 #API Req #5: Get Track Info
 async def request_track_info(trackid, token):
-    global web_endpoint
-    url = f"{web_endpoint}/v1/tracks/{trackid}"
-    headers = {
-        "Authorization": f"Bearer {token}"
-    }            
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers = headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                return data, response.status
-            return None, response.status
+    return await get_client().get_entity("track", trackid, f"/v1/tracks/{trackid}", token)
 
 #API Req #6: Get Track Audio Features Info
 async def request_track_audiofeatures(trackid, token):
-    global web_endpoint
-    url = f"{web_endpoint}/v1/audio-features/{trackid}"
-    headers = {
-        "Authorization": f"Bearer {token}"
-    }            
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers = headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                return data, response.status
-            return None, response.status
-    
+    return await get_client().get(f"/v1/audio-features/{trackid}", token)
+
 #API Req #7: Get Playlist Info
 async def request_playlist_info(playlist_id, token):
-    global web_endpoint
-    url = f"{web_endpoint}/v1/playlists/{playlist_id}"
-    headers = {
-        "Authorization": f"Bearer {token}"
-    }            
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers = headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                return data, response.status
-            return None, response.status
-        
+    return await get_client().get_entity("playlist", playlist_id, f"/v1/playlists/{playlist_id}", token)
+
 #API Req #8: Get User Info
 async def request_user_info(user_id, token):
-    global web_endpoint
-    url = f"{web_endpoint}/v1/users/{user_id}"
-    headers = {
-        "Authorization": f"Bearer {token}"
-    }            
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers = headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                return data, response.status
-            return None, response.status
-        
-#API Req #9: Get User Info
+    return await get_client().get_entity("user", user_id, f"/v1/users/{user_id}", token)
+
+#API Req #9: Get Album Info
 async def request_album_info(album_id, token):
-    global web_endpoint
-    url = f"{web_endpoint}/v1/albums/{album_id}"
-    headers = {
-        "Authorization": f"Bearer {token}"
-    }            
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers = headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                return data, response.status
-            return None, response.status
-        
+    return await get_client().get_entity("album", album_id, f"/v1/albums/{album_id}", token)
+
 #API Req #10: Search Data
 async def search_info(search_input, data_type, token):
-    global web_endpoint
-    url = f"{web_endpoint}/v1/search?q={search_input}&type={data_type}"
-    headers = {
-        "Authorization": f"Bearer {token}"
-    }            
-    
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers = headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                return data, response.status
-            return None, response.status
-        
+    return await get_client().get("/v1/search", token, params={"q": search_input, "type": data_type})
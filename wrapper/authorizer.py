@@ -1,31 +1,23 @@
-import os, json, time
+import os, json, time, asyncio
 from wrapper import apiwrapper as spotifyapi
+from wrapper.filestore import get_filestore
 from datetime import datetime
 
 #TERMINAL COLOR CODE
 RED, GREEN, LIGHT_BLUE, RESET = "\033[91m", "\033[92m", "\033[94m", "\033[0m" 
 
-def load_token():
+async def load_token_data():
     """
-    Loads the Spotify API access token from a file and checks its validity.
+    Loads the stored Spotify API access token without checking its validity (see TokenManager.start).
 
     Returns:
-        tuple: (access_token, expiry_time) if the token is valid, otherwise (None, None).
+        tuple: (access_token, expires_at timestamp), or (None, None) if no token is stored.
     """
     file_path = os.path.join(os.path.dirname(__file__), 'accesstoken.json')
     
     try:
-        with open(file_path, 'r') as file:
-            saved_token = json.load(file)
-            access_token = saved_token.get("access_token")
-            expires_at = saved_token.get("expires_at")
-            
-            if access_token and expires_at:
-                current_time = int(time.time())
-                # Return token if it hasn't expired (30-second buffer)
-                if current_time < (expires_at - 30):
-                    expiry_time = datetime.fromtimestamp(expires_at).strftime("%d-%m-%y %H:%M:%S")
-                    return access_token, expiry_time
+        saved_token = await get_filestore().load(file_path)
+        return saved_token.get("access_token"), saved_token.get("expires_at")
     except FileNotFoundError:
         print(f"{RED}Token file not found. Generating a new token...{RESET}")
     except json.JSONDecodeError:
@@ -35,7 +27,7 @@ def load_token():
     
     return None, None
 
-def store_token(token, expires_at):
+async def store_token(token, expires_at):
     """
     Stores the Spotify API access token in a file.
 
@@ -49,36 +41,152 @@ def store_token(token, expires_at):
         'expires_at': expires_at
     }
     try:
-        with open(file_path, 'w') as file:
-            json.dump(token_data, file)
+        await get_filestore().save(file_path, token_data)
         print(f"{GREEN}Token successfully stored. Expires at {datetime.fromtimestamp(expires_at).strftime('%d-%m-%y %H:%M:%S')}{RESET}")
     except Exception as exc:
         print(f"{RED}Error storing token: {exc}{RESET}")
 
-async def request_token(c_id, c_secret):
+#================Token Manager================
+class TokenManager:
     """
-    Requests a new Spotify API token if no valid token exists.
+    Holds the Spotify API access token in memory and renews it before it expires.
+
+    A background task refreshes the token `refresh_margin` seconds ahead of its expiry, so
+    requests never go out with a token that is about to lapse. Concurrent refreshes (the
+    background task, a caller finding the token expired, several requests answered with
+    401 at once) share one token request.
 
     Args:
         c_id (str): The client ID for Spotify API.
         c_secret (str): The client secret for Spotify API.
-
-    Returns:
-        tuple: (access_token, response_code, response_message).
+        refresh_margin (int): Seconds before expiry the token is renewed.
+        retry_delay (float): Seconds to wait before retrying a failed refresh.
     """
-    # Check for a previously stored token
-    token, expiry = load_token()
-    if token and expiry:
-        print(f"{LIGHT_BLUE}Using previously generated token. Expires at: {expiry}{RESET}")
-        return token, 200, None
-
-    # Generate a new token
-    print(f"{LIGHT_BLUE}No valid token found. Generating a new token...{RESET}")
-    try:
-        token, expiry, response_code, response_msg = await spotifyapi.generate_token(c_id, c_secret)
+    def __init__(self, c_id, c_secret, refresh_margin=300, retry_delay=30):
+        self.c_id = c_id
+        self.c_secret = c_secret
+        self.refresh_margin = refresh_margin
+        self.retry_delay = retry_delay
+        self.token = None
+        self.expires_at = 0
+        self.refreshes = 0
+        self.failures = 0
+        self._refresh_task = None
+        self._renew_task = None
+
+    def valid(self, margin=30):
+        return self.token is not None and time.time() < self.expires_at - margin
+
+    def expiry_time(self):
+        return datetime.fromtimestamp(self.expires_at).strftime("%d-%m-%y %H:%M:%S")
+
+    async def start(self):
+        """
+        Loads the stored token (or requests a new one) and starts renewing it in the background.
+
+        Returns:
+            tuple: (access_token, response_code, response_message).
+        """
+        response_code, response_msg = 200, None
+        if not self.valid(self.refresh_margin):
+            token, expires_at = await load_token_data()
+            if token and expires_at and time.time() < expires_at - self.refresh_margin:
+                self.token, self.expires_at = token, expires_at
+                print(f"{LIGHT_BLUE}Using previously generated token. Expires at: {self.expiry_time()}{RESET}")
+            else:
+                print(f"{LIGHT_BLUE}No valid token found. Generating a new token...{RESET}")
+                response_code, response_msg = await self._refresh_shared()
+
+        if self._renew_task is None or self._renew_task.done():
+            self._renew_task = asyncio.create_task(self._renew())
+        return self.token, response_code, response_msg
+
+    async def get_token(self):
+        """
+        Returns the current access token, refreshing it first if it has expired.
+        """
+        if self.valid():
+            if not self.valid(self.refresh_margin):
+                # Close to expiry but still usable: renew in the background and carry on
+                self._start_refresh()
+            return self.token
+        await self._refresh_shared()
+        return self.token
+
+    async def refresh(self, stale_token=None):
+        """
+        Requests a new token, e.g. after the API answered with 401.
+
+        Args:
+            stale_token (str, optional): The token that was rejected. If the manager already
+                                         holds a different valid token, it is returned without
+                                         a new request.
+
+        Returns:
+            str: The new access token, or None if the refresh failed.
+        """
+        if stale_token is not None and stale_token != self.token and self.valid():
+            return self.token
+        response_code, _ = await self._refresh_shared()
+        return self.token if response_code == 200 else None
+
+    def _start_refresh(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._request_token())
+        return self._refresh_task
+
+    async def _refresh_shared(self):
+        # Shield so a cancelled caller does not abort the refresh other callers wait on
+        return await asyncio.shield(self._start_refresh())
+
+    async def _request_token(self):
+        try:
+            token, expiry, response_code, response_msg = await spotifyapi.generate_token(self.c_id, self.c_secret)
+        except Exception as exc:
+            token, expiry, response_code, response_msg = None, None, 500, f"Error during token request: {exc}"
+
         if token and response_code == 200:
-            store_token(token, expiry)
-        return token, response_code, response_msg
-    except Exception as exc:
-        print(f"{RED}Unexpected error during token request: {exc}{RESET}")
-        return None, 500, f"Error during token request: {exc}"
+            self.token, self.expires_at = token, expiry
+            self.refreshes += 1
+            print(f"{GREEN}Spotify API token refreshed. Expires at: {self.expiry_time()}{RESET}")
+            await store_token(token, expiry)
+        else:
+            self.failures += 1
+            print(f"{RED}Failed to refresh Spotify API token. Code: {response_code}, Message: {response_msg}{RESET}")
+        return response_code, response_msg
+
+    async def _renew(self):
+        while True:
+            if self.valid(self.refresh_margin):
+                await asyncio.sleep(self.expires_at - self.refresh_margin - time.time())
+            else:
+                # Last refresh failed (or the token lives shorter than the margin), retry after a pause
+                await asyncio.sleep(self.retry_delay)
+            if not self.valid(self.refresh_margin):
+                try:
+                    await self._refresh_shared()
+                except Exception as exc:
+                    print(f"{RED}Unexpected error during token refresh: {exc}{RESET}")
+
+    def stats(self):
+        return {
+            "expires_in": max(int(self.expires_at - time.time()), 0) if self.token else 0,
+            "refreshes": self.refreshes,
+            "failures": self.failures
+        }
+
+    async def close(self):
+        for task in (self._renew_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+
+#Shared token manager used by the prefix and slash commands
+TOKEN_MANAGER = None
+
+def set_token_manager(manager):
+    global TOKEN_MANAGER
+    TOKEN_MANAGER = manager
+    return TOKEN_MANAGER
+
+def get_token_manager():
+    return TOKEN_MANAGER
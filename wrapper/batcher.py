@@ -0,0 +1,87 @@
+#Request Coalescing for Spotify Multi-ID Endpoints
+import asyncio
+from wrapper.ratelimiter import request_priority
+
+class BatchLoader:
+    """
+    Merges concurrent single-ID lookups into one request to a multi-ID endpoint.
+
+    Every load() made within `window` seconds of the first pending one is collected
+    into a batch, which is sent as soon as the window closes or the batch reaches
+    max_batch_size. Duplicate IDs in the same batch share one result. Batches are kept
+    separate per access token.
+
+    Args:
+        fetch_many (callable): Coroutine function (ids, token, priority) returning a dict of id -> (data, status).
+        max_batch_size (int): Maximum IDs the endpoint accepts per request.
+        window (float): Seconds to wait for more callers before sending a batch.
+    """
+    def __init__(self, fetch_many, max_batch_size, window=0.01):
+        self.fetch_many = fetch_many
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self._pending = {}
+        self._timers = {}
+        self._priorities = {}
+        self._tasks = set()
+        self.loads = 0
+        self.batches = 0
+
+    async def load(self, entity_id, token):
+        """
+        Queues an ID for the next batch and waits for its own result.
+
+        Returns:
+            tuple: (response json or None, status code)
+        """
+        self.loads += 1
+        batch = self._pending.setdefault(token, {})
+        priority = request_priority.get()
+        self._priorities[token] = min(priority, self._priorities.get(token, priority))
+
+        future = batch.get(entity_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            batch[entity_id] = future
+
+            if len(batch) >= self.max_batch_size:
+                self._dispatch(token)
+            elif token not in self._timers:
+                self._timers[token] = asyncio.get_running_loop().call_later(self.window, self._dispatch, token)
+
+        # Shield so one cancelled caller does not cancel the result shared with others
+        return await asyncio.shield(future)
+
+    def _dispatch(self, token):
+        timer = self._timers.pop(token, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(token, None)
+        priority = self._priorities.pop(token, None)
+        if not batch:
+            return
+
+        self.batches += 1
+        task = asyncio.create_task(self._run(batch, token, priority))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch, token, priority):
+        ids = list(batch)
+        try:
+            results = await self.fetch_many(ids, token, priority)
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        except BaseException:
+            # Cancelled (e.g. on shutdown): the callers must not wait for results that never come
+            for future in batch.values():
+                if not future.done():
+                    future.cancel()
+            raise
+
+        for entity_id, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(entity_id, (None, 404)))
@@ -0,0 +1,85 @@
+#In-process Spotify Entity Cache
+import time
+from collections import OrderedDict
+
+#Default lifetime in seconds for each entity type
+DEFAULT_TTLS = {
+    "artist": 600,             # Follower counts and popularity move quickly
+    "artist_toptracks": 3600,
+    "track": 86400,            # Tracks and albums rarely change once released
+    "album": 86400,
+    "album_tracks": 86400,
+    "playlist": 300,           # Playlists can be edited by their owners at any time
+    "user": 3600
+}
+
+class EntityCache:
+    """
+    LRU cache of API responses keyed by (entity type, Spotify ID), with a per-type TTL.
+
+    Args:
+        max_size (int): Maximum number of entries kept across all types. The least recently used entry is evicted first.
+        ttls (dict, optional): Overrides of DEFAULT_TTLS in seconds.
+        default_ttl (int): Lifetime for types missing from the TTL table.
+    """
+    def __init__(self, max_size=2048, ttls=None, default_ttl=300):
+        self.max_size = max_size
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, entity_type, entity_id):
+        """
+        Returns the cached value, or None if missing or expired.
+        """
+        key = (entity_type, entity_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, entity_type, entity_id, value):
+        key = (entity_type, entity_id)
+        ttl = self.ttls.get(entity_type, self.default_ttl)
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, entity_type, entity_id):
+        self._entries.pop((entity_type, entity_id), None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
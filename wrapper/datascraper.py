@@ -1,103 +1,571 @@
 #Monthly Listener Scraper
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
-import requests
+from contextlib import asynccontextmanager
+import aiohttp, asyncio, base64, binascii, html, json, re, time
+from urllib.parse import urlsplit
+from wrapper import metrics, tracing
 SPOTIFY_WEB_ENDPOINT = "https://open.spotify.com"
 
-#Scrape #1: Monthly Listener
-async def scrape_monthly_listeners(artist_id):
-    artist_url = f"{SPOTIFY_WEB_ENDPOINT}/artist/{artist_id}"
-    monthly_listeners = "N/A"  # Default
-    
-    try:
-        response = requests.get(artist_url)
-        response.raise_for_status()
+#Browser requests outside these resource types and hosts are blocked
+ALLOWED_RESOURCE_TYPES = {"document", "script", "xhr", "fetch"}
+ALLOWED_HOST_SUFFIXES = ("spotify.com", "spotifycdn.com", "scdn.co")
+
+#Plain HTTP requests for the fast path look like a regular desktop browser
+FAST_PATH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en-US,en;q=0.9"
+}
+
+#================Browser Pool================
+class _PooledPage:
+    def __init__(self, context, page, generation):
+        self.context = context
+        self.page = page
+        self.generation = generation
+        self.uses = 0
+
+class ScraperService:
+    """
+    Keeps one headless Chromium alive and lends out isolated pages from a bounded pool.
+
+    The browser is launched on the first scrape, so it costs nothing while scraping is off.
+    Every pool slot gets its own incognito context (no shared profile on disk), so concurrent
+    scrapes never share cookies, cache or a profile lock. Contexts are reused across scrapes
+    (with resource blocking set up once) and recycled after max_page_uses navigations, or
+    right away if a scrape fails or is cancelled. If the browser crashes or disconnects, it
+    is relaunched on the next lease.
+
+    Args:
+        pool_size (int): Maximum number of scrapes running in the browser at once.
+        max_page_uses (int): Navigations after which a context is closed and replaced.
+        headless (bool): Whether to run the browser without a window.
+        fast_path (bool): Try reading figures from the plain page HTML before rendering it in the browser.
+    """
+    def __init__(self, pool_size=2, max_page_uses=50, headless=True, fast_path=True):
+        self.pool_size = pool_size
+        self.fast_path = fast_path
+        self._http = None
+        self.max_page_uses = max_page_uses
+        self.headless = headless
+        self._playwright = None
+        self._browser = None
+        self._generation = 0
+        self._idle = []
+        self._slots = asyncio.Semaphore(pool_size)
+        self._launch_lock = asyncio.Lock()
+
+        #Metrics
+        self.active = 0
+        self.waiting = 0
+        self.leases = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.navigations = 0
+        self.total_navigation = 0.0
+        self.max_navigation = 0.0
+        self.fast_path_hits = 0
+        self.failures = {}
+
+    @property
+    def running(self):
+        return self._browser is not None
 
-        async with async_playwright() as session:
-            browser = await session.chromium.launch_persistent_context(
-                user_data_dir="/tmp/playwright",  # Use persistent context to avoid repeated loading
-                headless=True,
+    async def _ensure_browser(self):
+        async with self._launch_lock:
+            if self._browser is not None:
+                return self._browser
+
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.headless,
                 args=["--no-sandbox", "--disable-setuid-sandbox"]
             )
-            page = await browser.new_page()
-        
-            async def block_unnecessary(route):
-                if route.request.resource_type in ["image", "font", "media"]:
-                    await route.abort()
-                else:
-                    await route.continue_()
+            self._generation += 1
+            self._browser.on("disconnected", lambda _, generation=self._generation: self._on_browser_closed(generation))
+            print(f"Scraper browser launched (pool size {self.pool_size})")
+            return self._browser
+
+    def _on_browser_closed(self, generation):
+        # Browser crashed or was closed, the next lease launches a new one
+        if generation == self._generation:
+            self._browser = None
+            self._idle.clear()
+
+    async def _new_page(self):
+        browser = await self._ensure_browser()
+        context = await browser.new_context()
+
+        async def block_unnecessary(route):
+            # Only the document, its scripts and the API calls they make are needed for the figures
+            request = route.request
+            if request.resource_type in ALLOWED_RESOURCE_TYPES and is_spotify_host(request.url):
+                await route.continue_()
+            else:
+                await route.abort()
+
+        await context.route("**/*", block_unnecessary)
+        page = await context.new_page()
+        return _PooledPage(context, page, self._generation)
 
-            await page.route("**/*", block_unnecessary)
+    async def _discard(self, pooled):
+        try:
+            await pooled.context.close()
+        except Exception:
+            pass
 
+    @asynccontextmanager
+    async def page(self):
+        """
+        Leases an isolated page from the pool for one scrape. Waits for a free slot if
+        pool_size scrapes are already running.
+
+        Example:
+            async with get_scraper().page() as page:
+                await page.goto(url)
+        """
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            self.record_wait(time.monotonic() - queued_at)
+
+            pooled = None
+            while self._idle and pooled is None:
+                candidate = self._idle.pop()
+                if candidate.generation == self._generation and not candidate.page.is_closed():
+                    pooled = candidate
+            if pooled is None:
+                try:
+                    pooled = await self._new_page()
+                except Exception as err:
+                    # Browser is likely gone, relaunch it once before giving up
+                    print(f"Scraper browser unavailable ({err}), restarting it...")
+                    await self.restart()
+                    pooled = await self._new_page()
+
+            healthy = False
             try:
-                await page.goto(artist_url, timeout=10000)  
-                await page.wait_for_selector("span:has-text('monthly listeners')", timeout=10000) 
-                monthly_listeners_txt = await page.inner_text("span:has-text('monthly listeners')")
-
-                monthly_listeners = ''.join(filter(str.isdigit, monthly_listeners_txt)) 
-                if not monthly_listeners:
-                    monthly_listeners = "N/A"
-                
-            except TimeoutError:
-                msg = "Error: Monthly listener request timed out"
-                return monthly_listeners, msg
-            except Exception as err:
-                msg = f"Unexpected Error Occurred: {err}"
-                return monthly_listeners, msg
+                yield pooled.page
+                healthy = True
             finally:
-                await browser.close()
+                pooled.uses += 1
+                if (healthy and pooled.uses < self.max_page_uses and pooled.generation == self._generation
+                        and not pooled.page.is_closed()):
+                    self._idle.append(pooled)
+                else:
+                    # Failed or cancelled scrapes may leave the page mid-navigation, start the next one clean
+                    await self._discard(pooled)
+        finally:
+            self.active -= 1
+            self._slots.release()
 
-        return monthly_listeners, None
+    #================Scraper Metrics================
+    def record_wait(self, seconds):
+        metrics.SCRAPER_DURATION.observe(seconds, stage="page_wait")
+        self.leases += 1
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
+
+    def record_navigation(self, seconds):
+        metrics.SCRAPER_DURATION.observe(seconds, stage="navigation")
+        self.navigations += 1
+        self.total_navigation += seconds
+        self.max_navigation = max(self.max_navigation, seconds)
+
+    def record_failure(self, reason):
+        self.failures[reason] = self.failures.get(reason, 0) + 1
+
+    def stats(self):
+        """
+        Returns:
+            dict: Pool usage, average/max wait for a free slot, average/max time from navigation
+                  to the figure being read (seconds) and failure counts by reason.
+        """
+        return {
+            "running": self.running,
+            "active": self.active,
+            "waiting": self.waiting,
+            "leases": self.leases,
+            "avg_wait": self.total_wait / self.leases if self.leases else 0.0,
+            "max_wait": self.max_wait,
+            "navigations": self.navigations,
+            "avg_navigation": self.total_navigation / self.navigations if self.navigations else 0.0,
+            "max_navigation": self.max_navigation,
+            "fast_path_hits": self.fast_path_hits,
+            "failures": dict(self.failures)
+        }
+    #================Scraper Metrics================
+
+    async def restart(self):
+        """
+        Closes the browser so the next lease starts a fresh one.
+        """
+        async with self._launch_lock:
+            browser, self._browser = self._browser, None
+            self._idle.clear()
+            if browser is not None:
+                try:
+                    await browser.close()
+                except Exception as err:
+                    print(f"Error closing scraper browser: {err}")
+
+    async def fetch_html(self, url, timeout=10):
+        """
+        Fetches a page's server-rendered HTML without the browser.
+
+        Returns:
+            tuple: (html text or None, status code)
+        """
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(headers=FAST_PATH_HEADERS, timeout=aiohttp.ClientTimeout(total=timeout))
+        async with self._http.get(url) as response:
+            if response.status != 200:
+                return None, response.status
+            return await response.text(), response.status
+
+    async def close(self):
+        await self.restart()
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+#Shared scraper used by the scrape functions
+SCRAPER = None
+
+def set_scraper(scraper):
+    global SCRAPER
+    SCRAPER = scraper
+    return SCRAPER
+
+def get_scraper():
+    global SCRAPER
+    if SCRAPER is None:
+        SCRAPER = ScraperService()
+    return SCRAPER
+
+#Optional persistent cache of scrape results (see wrapper/scrapecache.py)
+SCRAPE_CACHE = None
+
+def set_scrape_cache(cache):
+    global SCRAPE_CACHE
+    SCRAPE_CACHE = cache
+    return SCRAPE_CACHE
+
+def get_scrape_cache():
+    return SCRAPE_CACHE
+
+#================Browser Pool================
+
+@tracing.traced()
+async def cached_scrape(kind, entity_id, scrape):
+    """
+    Serves a scrape through the scrape cache when one is configured.
+
+    Returns:
+        tuple: (value, msg) of the cached or fresh scrape.
+    """
+    if SCRAPE_CACHE is None:
+        return await scrape(entity_id)
+    return await SCRAPE_CACHE.get_or_scrape(kind, entity_id, lambda: scrape(entity_id))
+
+async def scrape_monthly_listeners(artist_id):
+    return await cached_scrape("monthly_listeners", artist_id, fetch_monthly_listeners)
+
+async def scrape_track_playcount(track_id):
+    return await cached_scrape("playcount", track_id, fetch_track_playcount)
+
+def check_navigation(response, url):
+    """
+    Checks the navigation response of a scrape, so a missing page is caught without a
+    separate preflight request.
+
+    Returns:
+        bool: True if the page loaded with a successful status code.
+    """
+    if response is not None and not response.ok:
+        print(f"URL Error: Unable to access the URL: {url} returned {response.status}. Web Address may have changed or Spotify is down.")
+        return False
+    return True
+
+#================Fast Path================
+#Spotify ships the page data as JSON (sometimes base64 encoded) in script tags
+SCRIPT_PATTERN = re.compile(r"<script[^>]*>(.*?)</script>", re.DOTALL)
+OG_DESCRIPTION_PATTERN = re.compile(r'<meta[^>]+property="og:description"[^>]+content="([^"]*)"')
+META_LISTENERS_PATTERN = re.compile(r"([\d.,]+\s*[KMB]?)\s+monthly listeners", re.IGNORECASE)
+
+def embedded_state(page_html):
+    """
+    Yields the decoded contents of the page's JSON state scripts.
+    """
+    for match in SCRIPT_PATTERN.finditer(page_html):
+        body = match.group(1).strip()
+        if not body:
+            continue
+        if body.startswith("{"):
+            yield body
+            continue
+        try:
+            yield base64.b64decode(body, validate=True).decode("utf-8")
+        except (binascii.Error, ValueError):
+            # Regular JavaScript, not page state
+            continue
 
-    except requests.exceptions.RequestException as e:
-        print(f"URL Error: Unable to access the URL: {e}. Web Address may have changed or Spotify is down.")
-        monthly_listeners = "N/A"
+def find_entity(data, uri):
+    """
+    Returns the node of entity `uri` in decoded page state or an API response: either the
+    value keyed by the URI (page state) or the object whose "uri" is it (API responses).
+    """
+    pending = [data]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, dict):
+            if isinstance(node.get(uri), dict):
+                return node[uri]
+            if node.get("uri") == uri:
+                return node
+            pending.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            pending.extend(reversed(node))
+    return None
+
+def is_other_entity(name, child, uri):
+    # Nested entities are keyed by their own URI (page state) or carry it (API responses)
+    return name.startswith("spotify:") or (isinstance(child, dict) and child.get("uri", uri) != uri)
+
+def entity_figure(state, uri, key):
+    """
+    Reads the figure `key` of entity `uri` from page state or an API response (JSON text).
+
+    Only the requested entity's node is searched, skipping other entities nested in it (e.g.
+    the popular tracks on a track page), so their figures are never taken for the requested one.
+
+    Returns:
+        str or None: Digits of the figure, or None if the entity or its figure is not there.
+    """
+    if uri not in state:
+        return None
+    try:
+        node = find_entity(json.loads(state), uri)
+    except ValueError:
+        return None
+
+    pending = [node]
+    while pending:
+        current = pending.pop(0)
+        if isinstance(current, dict):
+            figure = str(current.get(key, ""))
+            if figure.isdigit():
+                return figure
+            children = current.items()
+        elif isinstance(current, list):
+            children = (("", child) for child in current)
+        else:
+            continue
+        pending.extend(child for name, child in children if not is_other_entity(name, child, uri))
+    return None
+
+def extract_monthly_listeners(page_html, artist_id):
+    """
+    Reads an artist's monthly listeners from the HTML of their open.spotify.com page.
+
+    The exact figure comes from the artist's node in the embedded page state. If only the
+    page metadata is available, its rounded figure (e.g. "12.3M") is returned instead.
+
+    Returns:
+        str or None: Digits of the monthly listeners, the rounded figure, or None if not found.
+    """
+    uri = f"spotify:artist:{artist_id}"
+    for state in embedded_state(page_html):
+        figure = entity_figure(state, uri, "monthlyListeners")
+        if figure:
+            return figure
+
+    meta = OG_DESCRIPTION_PATTERN.search(page_html)
+    if meta:
+        match = META_LISTENERS_PATTERN.search(html.unescape(meta.group(1)))
+        if match:
+            figure = match.group(1).replace(" ", "")
+            return figure.replace(",", "") if figure.replace(",", "").isdigit() else figure
+    return None
+
+def extract_playcount(page_html, track_id):
+    """
+    Reads a track's playcount from the track's node in the page state of its open.spotify.com page.
+
+    Returns:
+        str or None: The playcount with thousands separators, or None if not found.
+    """
+    uri = f"spotify:track:{track_id}"
+    for state in embedded_state(page_html):
+        figure = entity_figure(state, uri, "playcount")
+        if figure:
+            return f"{int(figure):,}"
+    return None
+
+@tracing.traced()
+async def fast_path_scrape(url, extract, entity_id):
+    """
+    Tries to read the figure of entity `entity_id` from the plain page HTML.
+
+    Returns:
+        tuple: (value or None, status code). A None value means the browser should be used instead.
+    """
+    scraper = get_scraper()
+    if not scraper.fast_path:
+        return None, None
+    try:
+        page_html, status = await scraper.fetch_html(url)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+        print(f"Fast path request to {url} failed ({err}), falling back to the browser.")
+        scraper.record_failure("fast_path_error")
+        return None, None
+    if page_html is None:
+        scraper.record_failure("not_found" if status == 404 else f"fast_path_http_{status}")
+        return None, status
+
+    value = extract(page_html, entity_id)
+    if value:
+        scraper.fast_path_hits += 1
+    return value, status
+
+#================Fast Path================
+
+#================Network Interception================
+def is_spotify_host(url):
+    host = urlsplit(url).hostname or ""
+    return any(host == suffix or host.endswith(f".{suffix}") for suffix in ALLOWED_HOST_SUFFIXES)
+
+def is_state_response(response):
+    # The web player loads artist and track data from its GraphQL ("pathfinder") API
+    return "pathfinder" in response.url and response.request.resource_type in ("xhr", "fetch")
+
+@tracing.traced()
+async def browser_scrape(url, uri, key, selector):
+    """
+    Loads a page in the browser and reads a figure from the page's own API responses,
+    falling back to the rendered element if no response carried it.
+
+    Only the requested entity's figure is taken: the page also loads related entities
+    (e.g. the artist's popular tracks on a track page), each with a figure of its own.
+    Page loading is stopped as soon as the figure is found.
+
+    Args:
+        url (str): open.spotify.com page to load.
+        uri (str): Spotify URI of the page's entity (e.g. spotify:track:<id>).
+        key (str): Key of the figure in the entity's node of an API response.
+        selector (str): Element holding the figure once the page has rendered.
+
+    Returns:
+        tuple: (raw figure text or None, True if it came from an API response)
+
+    Raises:
+        PlaywrightTimeoutError: If neither source produced the figure in time.
+    """
+    scraper = get_scraper()
+    async with scraper.page() as page:
+        captured = asyncio.get_running_loop().create_future()
+
+        async def on_response(response):
+            if captured.done() or not is_state_response(response):
+                return
+            try:
+                body = await response.text()
+            except Exception:
+                return
+            figure = entity_figure(body, uri, key)
+            if figure and not captured.done():
+                captured.set_result(figure)
+
+        page.on("response", on_response)
+        rendered = None
+        try:
+            started = time.monotonic()
+            response = await page.goto(url, wait_until="commit", timeout=10000)
+            if not check_navigation(response, url):
+                scraper.record_failure("not_found" if response.status == 404 else f"http_{response.status}")
+                return None, False
+
+            rendered = asyncio.create_task(page.wait_for_selector(selector, timeout=10000))
+            await asyncio.wait({captured, rendered}, timeout=10, return_when=asyncio.FIRST_COMPLETED)
+
+            scraper.record_navigation(time.monotonic() - started)
+
+            if captured.done():
+                return captured.result(), True
+            if rendered.done():
+                element = rendered.result()
+                return (await element.inner_text() if element else None), False
+            raise PlaywrightTimeoutError(f"Timed out waiting for {url}")
+        finally:
+            page.remove_listener("response", on_response)
+            if rendered is not None and not rendered.done():
+                rendered.cancel()
+            try:
+                await page.evaluate("window.stop()")
+            except Exception:
+                pass
+
+#================Network Interception================
+
+#Scrape #1: Monthly Listener
+async def fetch_monthly_listeners(artist_id):
+    artist_url = f"{SPOTIFY_WEB_ENDPOINT}/artist/{artist_id}"
+    monthly_listeners = "N/A"  # Default
+
+    value, status = await fast_path_scrape(artist_url, extract_monthly_listeners, artist_id)
+    if value:
+        return value, None
+    if status == 404:
         return monthly_listeners, None
 
+    try:
+        monthly_listeners_txt, _ = await browser_scrape(artist_url, f"spotify:artist:{artist_id}", "monthlyListeners", "span:has-text('monthly listeners')")
+        monthly_listeners = ''.join(filter(str.isdigit, monthly_listeners_txt or "")) or "N/A"
+
+    except PlaywrightTimeoutError:
+        get_scraper().record_failure("timeout")
+        msg = "Error: Monthly listener request timed out"
+        return monthly_listeners, msg
+    except Exception as err:
+        get_scraper().record_failure("error")
+        msg = f"Unexpected Error Occurred: {err}"
+        return monthly_listeners, msg
+
+    return monthly_listeners, None
+
 #Scrape #2: Track Playcount
-async def scrape_track_playcount(track_id):
+async def fetch_track_playcount(track_id):
     track_url = f"{SPOTIFY_WEB_ENDPOINT}/track/{track_id}"
     play_count = "N/A"  # Default
 
+    value, status = await fast_path_scrape(track_url, extract_playcount, track_id)
+    if value:
+        return value, None
+    if status == 404:
+        return play_count, None
+
     try:
-        # Check if the URL is valid and accessible
-        response = requests.get(track_url)
-        response.raise_for_status()
-
-        async with async_playwright() as session:
-            browser = await session.chromium.launch_persistent_context(
-                user_data_dir="/tmp/playwright", 
-                headless=True,
-                args=["--no-sandbox", "--disable-setuid-sandbox"]
-            )
-            page = await browser.new_page()
+        play_count_txt, from_api = await browser_scrape(track_url, f"spotify:track:{track_id}", "playcount", "span[data-testid='playcount']")
+        if play_count_txt:
+            # API responses carry the bare number, the rendered element is already formatted
+            play_count = f"{int(play_count_txt):,}" if from_api else play_count_txt
 
-            try:
-                # Navigate to the track page
-                await page.goto(track_url, timeout=10000) 
-                
-                async def block_unnecessary(route):
-                    if route.request.resource_type in ["image", "font", "media"]:
-                        await route.abort()
-                    else:
-                        await route.continue_()
-                await page.route("**/*", block_unnecessary)
-                await page.wait_for_selector("span[data-testid='playcount']", timeout=10000)
-                
-                play_count_element = await page.query_selector("span[data-testid='playcount']")
-                play_count = await play_count_element.inner_text() if play_count_element else "N/A"
-
-                return play_count, None
-
-            except TimeoutError:
-                msg = "Error: Playcount request timed out"
-                return play_count, msg
-            except Exception as err:
-                msg = f"Unexpected Error Occurred: {err}"
-                return play_count, msg
-            finally:
-                await browser.close()
+        return play_count, None
 
-    except requests.exceptions.RequestException as e:
-        print(f"URL Error: Unable to access the URL: {e}. Web Address may have changed or Spotify is down.")
-        play_count = "N/A"
-        return play_count, None
\ No newline at end of file
+    except PlaywrightTimeoutError:
+        get_scraper().record_failure("timeout")
+        msg = "Error: Playcount request timed out"
+        return play_count, msg
+    except Exception as err:
+        get_scraper().record_failure("error")
+        msg = f"Unexpected Error Occurred: {err}"
+        return play_count, msg
@@ -0,0 +1,124 @@
+#Async JSON File Access (settings, access token)
+import asyncio, copy, json, os
+
+def write_json_atomic(path, data, indent=None):
+    """
+    Writes JSON to a temp file, fsyncs it and renames it over `path`, so readers and crashes
+    only ever see the old or the new file.
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as file:
+        json.dump(data, file, indent=indent)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+def read_json(path):
+    with open(path, "r") as file:
+        return json.load(file)
+
+class JSONFileStore:
+    """
+    Reads and writes small JSON files in a worker thread, so a slow disk never blocks the
+    event loop (and with it the gateway heartbeat or other users' commands).
+
+    Parsed contents are cached after the first read and kept up to date by save(), so
+    repeated loads do not touch the disk. Writes to the same file are serialised, and a
+    save that queues up behind another is merged into the next write (the newest data
+    wins), so a burst of toggles costs at most two writes. Every save that went into a
+    write gets that write's outcome.
+
+    Callers get their own copy of the cached data and may modify it freely.
+    """
+    def __init__(self):
+        self._cache = {}
+        self._pending = {}
+        self._locks = {}
+        self.reads = 0
+        self.writes = 0
+
+    async def load(self, path):
+        """
+        Returns the parsed contents of a JSON file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            json.JSONDecodeError: If the file is not valid JSON.
+        """
+        if path not in self._cache:
+            data = await asyncio.to_thread(read_json, path)
+            self.reads += 1
+            self._cache.setdefault(path, data)
+        return copy.deepcopy(self._cache[path])
+
+    async def save(self, path, data, indent=None):
+        """
+        Replaces a JSON file's contents. The cache is updated right away, the write happens
+        in a worker thread.
+
+        Raises:
+            OSError: If the file could not be written, also when this save was merged into
+                the write of a save queued before it.
+        """
+        snapshot = copy.deepcopy(data)
+        self._cache[path] = snapshot
+        written = asyncio.get_running_loop().create_future()
+        _, _, waiting = self._pending.get(path, (None, None, []))
+        self._pending[path] = (snapshot, indent, waiting + [written])
+
+        lock = self._locks.setdefault(path, asyncio.Lock())
+        try:
+            async with lock:
+                pending = self._pending.pop(path, None)
+                if pending is not None:
+                    await self._write(path, pending)
+        except asyncio.CancelledError:
+            written.cancel()
+            raise
+        # Without pending data, a save queued before this one already wrote it (and set the outcome)
+        await written
+
+    async def _write(self, path, pending):
+        data, indent, waiting = pending
+        try:
+            await asyncio.to_thread(write_json_atomic, path, data, indent)
+        except asyncio.CancelledError:
+            # Hand the data (unless newer data is queued) and its waiters to the next save
+            newer_data, newer_indent, newer_waiting = self._pending.get(path, (data, indent, []))
+            self._pending[path] = (newer_data, newer_indent, waiting + newer_waiting)
+            raise
+        except Exception as err:
+            if self._cache.get(path) is data:
+                # The cache must not claim data the disk does not have
+                self._cache.pop(path)
+            for future in waiting:
+                if not future.done():
+                    future.set_exception(err)
+            return
+        self.writes += 1
+        for future in waiting:
+            if not future.done():
+                future.set_result(None)
+
+    def invalidate(self, path=None):
+        """
+        Drops the cached contents of one file (or every file) so the next load reads the disk.
+        """
+        if path is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(path, None)
+
+#Shared file store
+FILESTORE = None
+
+def set_filestore(store):
+    global FILESTORE
+    FILESTORE = store
+    return FILESTORE
+
+def get_filestore():
+    global FILESTORE
+    if FILESTORE is None:
+        FILESTORE = JSONFileStore()
+    return FILESTORE
@@ -0,0 +1,235 @@
+#Metrics: Counters, Latency Histograms and a Prometheus Text Endpoint
+import time
+from aiohttp import web
+from contextlib import contextmanager
+
+#Latency buckets in seconds, from a cached lookup up to a slow page scrape
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def _label_key(label_names, labels):
+    # Label values are kept as strings so series sort and render the same whatever type was passed
+    return tuple(str(labels.get(name, "")) for name in label_names)
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """
+    Monotonic counter, one value per combination of label values.
+
+    Args:
+        name (str): Metric name, e.g. "statistify_commands_total".
+        help (str): Description shown on the metrics page.
+        labels (tuple): Label names. inc() takes a value for each as keyword argument.
+    """
+    type = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labels, labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(self.labels, labels), 0)
+
+    def collect(self):
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+class Histogram:
+    """
+    Distribution of observed values (usually seconds) over fixed buckets.
+
+    Args:
+        name (str): Metric name, e.g. "statistify_command_duration_seconds".
+        help (str): Description shown on the metrics page.
+        labels (tuple): Label names.
+        buckets (tuple): Upper bounds of the buckets, ascending.
+    """
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labels, labels)
+        series = self._series.get(key)
+        if series is None:
+            # Per-bucket (non-cumulative) counts, then sum and count
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        counts = series[0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observes the time spent inside the with block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        series = self._series.get(_label_key(self.labels, labels))
+        return series[2] if series else 0
+
+    def collect(self):
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, ('le', _format_value(bound)))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {count}"
+
+class MetricsRegistry:
+    """
+    Holds the bot's metrics and renders them in the Prometheus text format.
+
+    Besides counters and histograms updated on the hot path, collectors can be registered:
+    functions called only when the page is rendered, which turn the existing stats() of
+    the caches, scheduler and scraper into samples at no cost per request.
+    """
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def counter(self, name, help, labels=()):
+        return self._metrics.setdefault(name, Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._metrics.setdefault(name, Histogram(name, help, labels, buckets))
+
+    def add_collector(self, collect):
+        """
+        Args:
+            collect (callable): Returns a list of (name, type, help, samples) where samples is a
+                                list of (labels dict, value). Exceptions skip that collector.
+        """
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            samples = list(metric.collect())
+            if samples:
+                lines += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.type}", *samples]
+
+        for collect in self._collectors:
+            try:
+                families = collect()
+            except Exception as err:
+                print(f"Metrics collector {getattr(collect, '__name__', collect)} failed: {err}")
+                continue
+            for name, metric_type, help, samples in families:
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {metric_type}"]
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+#Shared registry and the metrics every module records into
+REGISTRY = MetricsRegistry()
+
+COMMANDS_TOTAL = REGISTRY.counter(
+    "statistify_commands_total", "Commands run, by command, source (prefix or slash) and outcome.",
+    ("command", "source", "outcome"))
+COMMAND_DURATION = REGISTRY.histogram(
+    "statistify_command_duration_seconds", "Time from a command being dispatched to its handler returning.",
+    ("command", "source"))
+SPOTIFY_REQUESTS = REGISTRY.counter(
+    "statistify_spotify_requests_total", "Spotify API responses, by endpoint and status code.",
+    ("endpoint", "status"))
+SPOTIFY_RESPONSE_BYTES = REGISTRY.counter(
+    "statistify_spotify_response_bytes_total", "Bytes received from the Spotify API, by endpoint.",
+    ("endpoint",))
+SPOTIFY_DURATION = REGISTRY.histogram(
+    "statistify_spotify_request_duration_seconds", "Spotify API request latency, excluding rate limiter wait.",
+    ("endpoint",))
+SCRAPER_DURATION = REGISTRY.histogram(
+    "statistify_scraper_duration_seconds", "Scraper timings: page wait for a free slot, and navigation to the figure being read.",
+    ("stage",))
+DISCORD_DURATION = REGISTRY.histogram(
+    "statistify_discord_duration_seconds", "Discord message send and edit latency.",
+    ("operation",))
+
+#Path segments that are followed by a Spotify ID, replaced so every entity shares one endpoint label
+ID_RESOURCES = {"artists", "tracks", "albums", "playlists", "users", "shows", "episodes"}
+
+def endpoint_label(path):
+    """
+    Turns a request path into a low-cardinality label, e.g. /v1/artists/<id>/top-tracks -> /v1/artists/{id}/top-tracks.
+    """
+    parts = path.split("?", 1)[0].split("/")
+    for index in range(1, len(parts)):
+        if parts[index - 1] in ID_RESOURCES and parts[index]:
+            parts[index] = "{id}"
+    return "/".join(parts)
+
+def observe_spotify_request(endpoint, status, size, seconds):
+    SPOTIFY_REQUESTS.inc(endpoint=endpoint, status=status)
+    SPOTIFY_RESPONSE_BYTES.inc(size, endpoint=endpoint)
+    SPOTIFY_DURATION.observe(seconds, endpoint=endpoint)
+
+#================Metrics Endpoint================
+class MetricsServer:
+    """
+    Serves the registry on http://host:port/metrics for Prometheus to scrape.
+
+    Args:
+        registry (MetricsRegistry): Registry to render.
+        host (str): Interface to bind, local only by default.
+        port (int): Port to listen on.
+    """
+    def __init__(self, registry=REGISTRY, host="127.0.0.1", port=9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def _handle(self, request):
+        return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    async def start(self):
+        if self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"Metrics available at http://{self.host}:{self.port}/metrics")
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,149 @@
+#Spotify API Request Scheduler
+import asyncio, contextvars, heapq, itertools, time
+
+#Priority lanes, lower value is served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+LANE_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_NORMAL: "normal",
+    PRIORITY_BACKGROUND: "background"
+}
+
+#Lane used by requests that do not pass an explicit priority
+request_priority = contextvars.ContextVar("request_priority", default=PRIORITY_NORMAL)
+
+class RequestScheduler:
+    """
+    Token bucket rate limiter with priority lanes shared by every Spotify API call.
+
+    Requests acquire a token before being sent. When the bucket is empty, callers queue
+    up and are released in priority order (interactive before background work), first
+    come first served within a lane. A Retry-After from Spotify pauses every lane globally.
+
+    Args:
+        rate (float): Tokens added to the bucket per second.
+        burst (int): Bucket capacity, i.e. how many requests may be sent back to back.
+    """
+    def __init__(self, rate=10.0, burst=20):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiters = []
+        self._counter = itertools.count()
+        self._pump_task = None
+
+        # Statistics
+        self._granted = {lane: 0 for lane in LANE_NAMES}
+        self._total_wait = {lane: 0.0 for lane in LANE_NAMES}
+        self._max_wait = 0.0
+        self._throttled = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        if now > self._last_refill:
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+
+    def _record(self, priority, waited):
+        self._granted[priority] = self._granted.get(priority, 0) + 1
+        self._total_wait[priority] = self._total_wait.get(priority, 0.0) + waited
+        self._max_wait = max(self._max_wait, waited)
+
+    async def acquire(self, priority=None):
+        """
+        Waits until the request may be sent.
+
+        Args:
+            priority (int, optional): Lane to queue in. Defaults to the request_priority context variable.
+
+        Returns:
+            float: Seconds spent waiting for a token.
+        """
+        if priority is None:
+            priority = request_priority.get()
+
+        # Fast path: nobody is queued and a token is available
+        if not self._waiters and time.monotonic() >= self._blocked_until:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self._record(priority, 0.0)
+                return 0.0
+
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+
+        await future
+        waited = time.monotonic() - start
+        self._record(priority, waited)
+        return waited
+
+    async def _pump(self):
+        # Releases queued callers one token at a time, highest priority first
+        while self._waiters:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                await asyncio.sleep(self._blocked_until - now)
+                continue
+
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # Caller was cancelled while queued
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+
+    def block_for(self, seconds):
+        """
+        Pauses all lanes, used when Spotify answers with 429 and a Retry-After header.
+
+        Args:
+            seconds (float): How long to hold every request back.
+        """
+        self._throttled += 1
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+        self._last_refill = self._blocked_until
+
+    def queue_depth(self):
+        depth = {name: 0 for name in LANE_NAMES.values()}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                name = LANE_NAMES.get(priority, str(priority))
+                depth[name] = depth.get(name, 0) + 1
+        return depth
+
+    def stats(self):
+        """
+        Returns a snapshot of the scheduler state to check whether the bot is quota bound.
+
+        Returns:
+            dict: Queue depth per lane, requests granted, average and max wait in seconds,
+                  number of 429 pauses and seconds left on the current pause.
+        """
+        granted = sum(self._granted.values())
+        total_wait = sum(self._total_wait.values())
+        return {
+            "queue_depth": self.queue_depth(),
+            "granted": {LANE_NAMES.get(p, str(p)): n for p, n in self._granted.items()},
+            "avg_wait": {
+                LANE_NAMES.get(p, str(p)): (self._total_wait[p] / n if n else 0.0)
+                for p, n in self._granted.items()
+            },
+            "overall_avg_wait": total_wait / granted if granted else 0.0,
+            "max_wait": self._max_wait,
+            "throttled": self._throttled,
+            "blocked_for": max(0.0, self._blocked_until - time.monotonic())
+        }
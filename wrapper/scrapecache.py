@@ -0,0 +1,190 @@
+#Persistent Cache for Scraped Figures (Monthly Listeners, Playcounts)
+import asyncio, json, os, time
+from wrapper.filestore import write_json_atomic
+
+class ScrapeCache:
+    """
+    Disk-backed TTL cache of scrape results keyed by (kind, Spotify ID).
+
+    Scraped figures change at most daily, so a cached value is served directly while it is
+    fresh. Once it is older than `ttl` it is still served immediately, and a background
+    scrape refreshes it for the next caller (stale-while-revalidate). Entries older than
+    `max_stale` are treated as missing. The cache is loaded on first use and written back
+    to `path` a few seconds after it changes, with file I/O kept off the event loop.
+
+    Args:
+        path (str): JSON file the cache is persisted to.
+        ttl (int): Seconds a value is considered fresh.
+        max_stale (int): Seconds after which a stale value is no longer served.
+        max_size (int): Maximum number of entries, the oldest are dropped first.
+        save_delay (float): Seconds to wait after a change before writing the file.
+    """
+    def __init__(self, path, ttl=43200, max_stale=604800, max_size=10000, save_delay=5.0):
+        self.path = path
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_size = max_size
+        self.save_delay = save_delay
+        self._entries = None
+        self._load_lock = asyncio.Lock()
+        self._refreshing = {}
+        self._waiters = {}
+        self._save_handle = None
+        self._save_task = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    #================Persistence================
+    def _read_file(self):
+        try:
+            with open(self.path, "r") as file:
+                entries = json.load(file)
+            return entries if isinstance(entries, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, OSError) as err:
+            print(f"Scrape cache at {self.path} could not be read ({err}), starting empty.")
+            return {}
+
+    def _write_file(self, entries):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Written to a temp file and swapped in so a crash never leaves a half written cache
+        write_json_atomic(self.path, entries)
+
+    async def _ensure_loaded(self):
+        if self._entries is not None:
+            return
+        async with self._load_lock:
+            if self._entries is None:
+                self._entries = await asyncio.to_thread(self._read_file)
+
+    def _schedule_save(self):
+        if self._save_handle is None:
+            self._save_handle = asyncio.get_running_loop().call_later(self.save_delay, self._start_save)
+
+    def _start_save(self):
+        self._save_handle = None
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self.flush())
+        else:
+            self._schedule_save()
+
+    async def flush(self):
+        """
+        Writes the cache to disk now.
+        """
+        if self._entries is None:
+            return
+        try:
+            await asyncio.to_thread(self._write_file, dict(self._entries))
+        except OSError as err:
+            print(f"Error saving scrape cache to {self.path}: {err}")
+
+    #================Lookups================
+    @staticmethod
+    def _key(kind, entity_id):
+        return f"{kind}:{entity_id}"
+
+    def _store(self, key, value):
+        self._entries.pop(key, None)
+        self._entries[key] = {"value": value, "fetched_at": time.time()}
+        while len(self._entries) > self.max_size:
+            del self._entries[next(iter(self._entries))]
+        self._schedule_save()
+
+    async def _scrape_and_store(self, key, scrape):
+        value, msg = await scrape()
+        # Only successful scrapes are cached, failures are retried on the next request
+        if msg is None and value not in (None, "N/A"):
+            self._store(key, value)
+        return value, msg
+
+    def _refresh_in_background(self, key, scrape):
+        if key in self._refreshing:
+            return
+        task = asyncio.create_task(self._scrape_and_store(key, scrape))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda t: self._on_refreshed(key, t))
+
+    def _on_refreshed(self, key, task):
+        self._refreshing.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Background scrape refresh of {key} failed: {task.exception()}")
+
+    async def get_or_scrape(self, kind, entity_id, scrape):
+        """
+        Returns the cached figure of an entity, scraping it if it is missing.
+
+        Args:
+            kind (str): Type of figure, e.g. "monthly_listeners".
+            entity_id (str): Spotify ID of the artist or track.
+            scrape (callable): Coroutine function returning (value, msg), called on a miss or refresh.
+
+        Returns:
+            tuple: (value, msg) in the same format as the scrape functions.
+        """
+        await self._ensure_loaded()
+        key = self._key(kind, entity_id)
+        entry = self._entries.get(key)
+        age = time.time() - entry["fetched_at"] if entry else None
+
+        if entry is not None and age < self.ttl:
+            self.hits += 1
+            return entry["value"], None
+
+        if entry is not None and age < self.max_stale:
+            self.stale_hits += 1
+            self._refresh_in_background(key, scrape)
+            return entry["value"], None
+
+        self.misses += 1
+        # Concurrent misses of the same entity share one scrape
+        self._refresh_in_background(key, scrape)
+        task = self._refreshing[key]
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Stop the scrape once nobody is waiting for it anymore
+            if self._waiters[key] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    async def get(self, kind, entity_id):
+        """
+        Returns the cached value regardless of age, or None if there is none.
+        """
+        await self._ensure_loaded()
+        entry = self._entries.get(self._key(kind, entity_id))
+        return entry["value"] if entry else None
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries or {}),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshing": len(self._refreshing),
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0
+        }
+
+    async def close(self):
+        """
+        Stops pending refreshes and writes the cache to disk.
+        """
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        if self._save_task is not None and not self._save_task.done():
+            await self._save_task
+        await self.flush()
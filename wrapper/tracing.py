@@ -0,0 +1,176 @@
+#Lightweight Tracing: Nested Timing Spans per Command
+import contextvars, functools, inspect, json, random, time
+from contextlib import contextmanager
+
+#Span the running code belongs to, None when the current command is not being traced
+current_span = contextvars.ContextVar("current_span", default=None)
+
+class Span:
+    """
+    A timed phase of a traced command. Spans started while another is current become its
+    children, including in tasks created from inside it (they inherit the context).
+    """
+    __slots__ = ("name", "attrs", "start", "end", "children", "root", "span_count", "dropped")
+
+    def __init__(self, name, attrs, root=None):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end = None
+        self.children = []
+        self.root = root or self
+        # Only used on the root span
+        self.span_count = 1
+        self.dropped = 0
+
+    @property
+    def duration(self):
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self, origin):
+        entry = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": round(self.duration * 1000, 2)
+        }
+        if self.attrs:
+            entry["attrs"] = self.attrs
+        if self.end is None:
+            # Still running when the command returned (e.g. a background scrape)
+            entry["unfinished"] = True
+        if self.children:
+            entry["spans"] = [child.to_dict(origin) for child in self.children]
+        return entry
+
+class Tracer:
+    """
+    Decides which commands are traced and reports the slow ones.
+
+    A sampled command gets a root span, and every span() or @traced call made while it runs
+    is recorded beneath it. Commands that are not sampled cost a context variable lookup per
+    span. A traced command that takes at least `slow_threshold` seconds is printed as one
+    JSON line with its full phase breakdown.
+
+    Args:
+        sample_rate (float): Share of commands traced, 0 turns tracing off and 1 traces all.
+        slow_threshold (float): Seconds a traced command must take to be reported.
+        max_spans (int): Spans kept per trace, later ones are only counted, so a long paging loop
+                         cannot grow a trace without bound.
+    """
+    def __init__(self, sample_rate=0.05, slow_threshold=2.0, max_spans=200):
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.max_spans = max_spans
+        self.traced = 0
+        self.reported = 0
+
+    @contextmanager
+    def trace(self, name, **attrs):
+        """
+        Starts a root span for a command if it is sampled. Yields the span, or None.
+        """
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate or current_span.get() is not None:
+            yield None
+            return
+
+        root = Span(name, attrs)
+        reset = current_span.set(root)
+        try:
+            yield root
+        except BaseException as err:
+            root.attrs["error"] = type(err).__name__
+            raise
+        finally:
+            root.end = time.perf_counter()
+            current_span.reset(reset)
+            self.traced += 1
+            if root.duration >= self.slow_threshold:
+                self.report(root)
+
+    def report(self, root):
+        self.reported += 1
+        trace = root.to_dict(root.start)
+        if root.dropped:
+            trace["dropped_spans"] = root.dropped
+        print(f"Slow command trace: {json.dumps(trace, default=str)}")
+
+    def stats(self):
+        return {
+            "sample_rate": self.sample_rate,
+            "traced": self.traced,
+            "reported": self.reported
+        }
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Records a child span of the current one. Yields the span, or None if nothing is being traced.
+    """
+    parent = current_span.get()
+    root = parent.root if parent is not None else None
+    # Nothing traced, or a background task outliving the command it was started from
+    if root is None or root.end is not None:
+        yield None
+        return
+    if root.span_count >= get_tracer().max_spans:
+        root.dropped += 1
+        yield None
+        return
+
+    child = Span(name, attrs, root)
+    root.span_count += 1
+    parent.children.append(child)
+    reset = current_span.set(child)
+    try:
+        yield child
+    except BaseException as err:
+        child.attrs["error"] = type(err).__name__
+        raise
+    finally:
+        child.end = time.perf_counter()
+        current_span.reset(reset)
+
+def set_attributes(**attrs):
+    """
+    Adds attributes to the current span, if any (e.g. a status code known only after the call).
+    """
+    active = current_span.get()
+    if active is not None:
+        active.set(**attrs)
+
+def traced(name=None):
+    """
+    Decorator recording each call of a function (sync or async) as a span named `name`,
+    the function name by default.
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with span(span_name):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+#Shared tracer
+TRACER = None
+
+def set_tracer(tracer):
+    global TRACER
+    TRACER = tracer
+    return TRACER
+
+def get_tracer():
+    global TRACER
+    if TRACER is None:
+        TRACER = Tracer()
+    return TRACER